@@ -17,6 +17,7 @@ import Common.LongFilePathOs as os
 import re
 import os.path as path
 import copy
+import time
 
 import GenC
 import GenMake
@@ -753,6 +754,56 @@ class WorkspaceAutoGen(AutoGen):
     BuildCommand        = property(_GetBuildCommand)
     GenFdsCommand       = property(_GenFdsCommand)
 
+## Index of a PCD list by token name and token space
+#
+#  It finds a PCD in the list without scanning it, the same way as "in" and
+#  index() of list which compare PCDs by token name and token space. The list
+#  must be changed through the index to keep them consistent.
+#
+class PcdListIndex(object):
+    ## Constructor
+    #
+    #   @param  PcdList     The list of PcdClassObject indexed
+    #
+    def __init__(self, PcdList):
+        self.PcdList = PcdList
+        self.Rebuild()
+
+    ## Index all PCDs in the list again
+    def Rebuild(self):
+        self._IndexDict = {}
+        for Index in range(len(self.PcdList) - 1, -1, -1):
+            Pcd = self.PcdList[Index]
+            self._IndexDict[(Pcd.TokenCName, Pcd.TokenSpaceGuidCName)] = Index
+
+    ## "in" test support
+    def __contains__(self, Pcd):
+        return (Pcd.TokenCName, Pcd.TokenSpaceGuidCName) in self._IndexDict
+
+    ## Return the position of the first PCD having the same name and token space
+    def index(self, Pcd):
+        return self._IndexDict[(Pcd.TokenCName, Pcd.TokenSpaceGuidCName)]
+
+    ## [] operator
+    def __getitem__(self, Index):
+        return self.PcdList[Index]
+
+    def __setitem__(self, Index, Pcd):
+        Key = (self.PcdList[Index].TokenCName, self.PcdList[Index].TokenSpaceGuidCName)
+        self.PcdList[Index] = Pcd
+        if (Pcd.TokenCName, Pcd.TokenSpaceGuidCName) != Key:
+            self.Rebuild()
+
+    ## append support
+    def append(self, Pcd):
+        self._IndexDict.setdefault((Pcd.TokenCName, Pcd.TokenSpaceGuidCName), len(self.PcdList))
+        self.PcdList.append(Pcd)
+
+    ## remove support, the positions of PCDs after the removed one are changed
+    def remove(self, Pcd):
+        self.PcdList.remove(Pcd)
+        self.Rebuild()
+
 ## AutoGen class for platform
 #
 #  PlatformAutoGen class will process the original information in platform
@@ -946,14 +997,20 @@ class PlatformAutoGen(AutoGen):
     #  This interface should be invoked explicitly when platform action is created.
     #
     def CollectPlatformDynamicPcds(self):
+        StartTime = time.time()
         # for gathering error information
         NoDatumTypePcdList = set()
-        PcdNotInDb = []
+        PcdNotInDb = set()
         self._GuidValue = {}
         FdfModuleList = []
         for InfName in self._AsBuildInfList:
             InfName = os.path.join(self.WorkspaceDir, InfName)
             FdfModuleList.append(os.path.normpath(InfName))
+        FdfModuleSet = set(FdfModuleList)
+        PlatformPcdKeySet = set(self.Platform.Pcds.keys())
+        DynaPcdIndex = PcdListIndex(self._DynaPcdList_)
+        NonDynaPcdIndex = PcdListIndex(self._NonDynaPcdList_)
+        ModulePcdCount = 0
         for F in self.Platform.Modules.keys():
             M = ModuleAutoGen(self.Workspace, F, self.BuildTarget, self.ToolChain, self.Arch, self.MetaFile)
             #GuidValue.update(M.Guids)
@@ -961,6 +1018,7 @@ class PlatformAutoGen(AutoGen):
             self.Platform.Modules[F].M = M
             
             for PcdFromModule in M.ModulePcdList+M.LibraryPcdList:
+                ModulePcdCount += 1
                 # make sure that the "VOID*" kind of datum has MaxDatumSize set
                 if PcdFromModule.DatumType == "VOID*" and PcdFromModule.MaxDatumSize in [None, '']:
                     NoDatumTypePcdList.add("%s.%s [%s]" % (PcdFromModule.TokenSpaceGuidCName, PcdFromModule.TokenCName, F))
@@ -970,12 +1028,12 @@ class PlatformAutoGen(AutoGen):
                     PcdFromModule.IsFromBinaryInf = True
 
                 # Check the PCD from DSC or not 
-                if (PcdFromModule.TokenCName, PcdFromModule.TokenSpaceGuidCName) in self.Platform.Pcds.keys():
+                if (PcdFromModule.TokenCName, PcdFromModule.TokenSpaceGuidCName) in PlatformPcdKeySet:
                     PcdFromModule.IsFromDsc = True
                 else:
                     PcdFromModule.IsFromDsc = False
                 if PcdFromModule.Type in GenC.gDynamicPcd or PcdFromModule.Type in GenC.gDynamicExPcd:
-                    if F.Path not in FdfModuleList:
+                    if F.Path not in FdfModuleSet:
                         # If one of the Source built modules listed in the DSC is not listed 
                         # in FDF modules, and the INF lists a PCD can only use the PcdsDynamic 
                         # access method (it is only listed in the DEC file that declares the 
@@ -987,8 +1045,7 @@ class PlatformAutoGen(AutoGen):
                         if PcdFromModule.Type in GenC.gDynamicPcd and \
                             PcdFromModule.IsFromBinaryInf == False:
                             # Print warning message to let the developer make a determine.
-                            if PcdFromModule not in PcdNotInDb:
-                                PcdNotInDb.append(PcdFromModule)
+                            PcdNotInDb.add(PcdFromModule)
                             continue
                         # If one of the Source built modules listed in the DSC is not listed in 
                         # FDF modules, and the INF lists a PCD can only use the PcdsDynamicEx 
@@ -996,8 +1053,7 @@ class PlatformAutoGen(AutoGen):
                         # PCD as PcdsDynamicEx), then DO NOT break the build; DO NOT add the 
                         # PCD to the Platform's PCD Database.
                         if PcdFromModule.Type in GenC.gDynamicExPcd:
-                            if PcdFromModule not in PcdNotInDb:
-                                PcdNotInDb.append(PcdFromModule)
+                            PcdNotInDb.add(PcdFromModule)
                             continue
                     #
                     # If a dynamic PCD used by a PEM module/PEI module & DXE module,
@@ -1007,28 +1063,28 @@ class PlatformAutoGen(AutoGen):
                     #
                     if M.ModuleType in ["PEIM", "PEI_CORE"]:
                         PcdFromModule.Phase = "PEI"
-                    if PcdFromModule not in self._DynaPcdList_:
-                        self._DynaPcdList_.append(PcdFromModule)
+                    if PcdFromModule not in DynaPcdIndex:
+                        DynaPcdIndex.append(PcdFromModule)
                     elif PcdFromModule.Phase == 'PEI':
                         # overwrite any the same PCD existing, if Phase is PEI
-                        Index = self._DynaPcdList_.index(PcdFromModule)
-                        self._DynaPcdList_[Index] = PcdFromModule
-                elif PcdFromModule not in self._NonDynaPcdList_:
-                    self._NonDynaPcdList_.append(PcdFromModule)
-                elif PcdFromModule in self._NonDynaPcdList_ and PcdFromModule.IsFromBinaryInf == True:
-                    Index = self._NonDynaPcdList_.index(PcdFromModule)
-                    if self._NonDynaPcdList_[Index].IsFromBinaryInf == False:
+                        Index = DynaPcdIndex.index(PcdFromModule)
+                        DynaPcdIndex[Index] = PcdFromModule
+                elif PcdFromModule not in NonDynaPcdIndex:
+                    NonDynaPcdIndex.append(PcdFromModule)
+                elif PcdFromModule in NonDynaPcdIndex and PcdFromModule.IsFromBinaryInf == True:
+                    Index = NonDynaPcdIndex.index(PcdFromModule)
+                    if NonDynaPcdIndex[Index].IsFromBinaryInf == False:
                         #The PCD from Binary INF will override the same one from source INF
-                        self._NonDynaPcdList_.remove (self._NonDynaPcdList_[Index])
+                        NonDynaPcdIndex.remove (NonDynaPcdIndex[Index])
                         PcdFromModule.Pending = False
-                        self._NonDynaPcdList_.append (PcdFromModule)
+                        NonDynaPcdIndex.append (PcdFromModule)
         # Parse the DynamicEx PCD from the AsBuild INF module list of FDF.
-        DscModuleList = []
+        DscModuleSet = set()
         for ModuleInf in self.Platform.Modules.keys():
-            DscModuleList.append (os.path.normpath(ModuleInf.Path))
+            DscModuleSet.add (os.path.normpath(ModuleInf.Path))
         # add the PCD from modules that listed in FDF but not in DSC to Database 
         for InfName in FdfModuleList:
-            if InfName not in DscModuleList:
+            if InfName not in DscModuleSet:
                 InfClass = PathClass(InfName)
                 M = self.BuildDatabase[InfClass, self.Arch, self.BuildTarget, self.ToolChain]
                 # If a module INF in FDF but not in current arch's DSC module list, it must be module (either binary or source) 
@@ -1039,6 +1095,7 @@ class PlatformAutoGen(AutoGen):
                 # Override the module PCD setting by platform setting
                 ModulePcdList = self.ApplyPcdSetting(M, M.Pcds)
                 for PcdFromModule in ModulePcdList:
+                    ModulePcdCount += 1
                     PcdFromModule.IsFromBinaryInf = True
                     PcdFromModule.IsFromDsc = False
                     # Only allow the DynamicEx and Patchable PCD in AsBuild INF
@@ -1052,19 +1109,19 @@ class PlatformAutoGen(AutoGen):
                         NoDatumTypePcdList.add("%s.%s [%s]" % (PcdFromModule.TokenSpaceGuidCName, PcdFromModule.TokenCName, InfName))
                     if M.ModuleType in ["PEIM", "PEI_CORE"]:
                         PcdFromModule.Phase = "PEI"
-                    if PcdFromModule not in self._DynaPcdList_ and PcdFromModule.Type in GenC.gDynamicExPcd:
-                        self._DynaPcdList_.append(PcdFromModule)
-                    elif PcdFromModule not in self._NonDynaPcdList_ and PcdFromModule.Type in TAB_PCDS_PATCHABLE_IN_MODULE:
-                        self._NonDynaPcdList_.append(PcdFromModule)
-                    if PcdFromModule in self._DynaPcdList_ and PcdFromModule.Phase == 'PEI' and PcdFromModule.Type in GenC.gDynamicExPcd:
+                    if PcdFromModule not in DynaPcdIndex and PcdFromModule.Type in GenC.gDynamicExPcd:
+                        DynaPcdIndex.append(PcdFromModule)
+                    elif PcdFromModule not in NonDynaPcdIndex and PcdFromModule.Type in TAB_PCDS_PATCHABLE_IN_MODULE:
+                        NonDynaPcdIndex.append(PcdFromModule)
+                    if PcdFromModule in DynaPcdIndex and PcdFromModule.Phase == 'PEI' and PcdFromModule.Type in GenC.gDynamicExPcd:
                         # Overwrite the phase of any the same PCD existing, if Phase is PEI.
                         # It is to solve the case that a dynamic PCD used by a PEM module/PEI 
                         # module & DXE module at a same time.
                         # Overwrite the type of the PCDs in source INF by the type of AsBuild
                         # INF file as DynamicEx. 
-                        Index = self._DynaPcdList_.index(PcdFromModule)
-                        self._DynaPcdList_[Index].Phase = PcdFromModule.Phase
-                        self._DynaPcdList_[Index].Type = PcdFromModule.Type
+                        Index = DynaPcdIndex.index(PcdFromModule)
+                        DynaPcdIndex[Index].Phase = PcdFromModule.Phase
+                        DynaPcdIndex[Index].Type = PcdFromModule.Type
         for PcdFromModule in self._NonDynaPcdList_:
             # If a PCD is not listed in the DSC file, but binary INF files used by 
             # this platform all (that use this PCD) list the PCD in a [PatchPcds] 
@@ -1073,15 +1130,15 @@ class PlatformAutoGen(AutoGen):
             # section, then the tools must NOT add the PCD to the Platform's PCD
             # Database; the build must assign the access method for this PCD as 
             # PcdsPatchableInModule.
-            if PcdFromModule not in self._DynaPcdList_:
+            if PcdFromModule not in DynaPcdIndex:
                 continue
-            Index = self._DynaPcdList_.index(PcdFromModule)
+            Index = DynaPcdIndex.index(PcdFromModule)
             if PcdFromModule.IsFromDsc == False and \
                 PcdFromModule.Type in TAB_PCDS_PATCHABLE_IN_MODULE and \
                 PcdFromModule.IsFromBinaryInf == True and \
-                self._DynaPcdList_[Index].IsFromBinaryInf == False:
-                Index = self._DynaPcdList_.index(PcdFromModule)
-                self._DynaPcdList_.remove (self._DynaPcdList_[Index])
+                DynaPcdIndex[Index].IsFromBinaryInf == False:
+                Index = DynaPcdIndex.index(PcdFromModule)
+                DynaPcdIndex.remove (DynaPcdIndex[Index])
 
         # print out error information and break the build, if error found
         if len(NoDatumTypePcdList) > 0:
@@ -1092,6 +1149,9 @@ class PlatformAutoGen(AutoGen):
                                       % NoDatumTypePcdListString)
         self._NonDynamicPcdList = self._NonDynaPcdList_
         self._DynamicPcdList = self._DynaPcdList_
+        EdkLogger.verbose("Collected %d PCDs of %d modules into %d dynamic and %d non-dynamic PCDs for [%s] in %.3f seconds"
+                          % (ModulePcdCount, len(self.Platform.Modules), len(self._DynaPcdList_),
+                             len(self._NonDynaPcdList_), self.Arch, time.time() - StartTime))
         #
         # Sort dynamic PCD list to:
         # 1) If PCD's datum type is VOID* and value is unicode string which starts with L, the PCD item should 
@@ -1150,16 +1210,13 @@ class PlatformAutoGen(AutoGen):
             # Fix the PCDs define in VPD PCD section that never referenced by module.
             # An example is PCD for signature usage.
             #            
+            VpdPcdKeySet = set([(VpdPcd.TokenSpaceGuidCName, VpdPcd.TokenCName) for VpdPcd in VpdFile._VpdArray.keys()])
             for DscPcd in PlatformPcds:
                 DscPcdEntry = self.Platform.Pcds[DscPcd]
                 if DscPcdEntry.Type in [TAB_PCDS_DYNAMIC_VPD, TAB_PCDS_DYNAMIC_EX_VPD]:
                     if not (self.Platform.VpdToolGuid == None or self.Platform.VpdToolGuid == ''):
-                        FoundFlag = False
-                        for VpdPcd in VpdFile._VpdArray.keys():
-                            # This PCD has been referenced by module
-                            if (VpdPcd.TokenSpaceGuidCName == DscPcdEntry.TokenSpaceGuidCName) and \
-                               (VpdPcd.TokenCName == DscPcdEntry.TokenCName):
-                                    FoundFlag = True
+                        # This PCD has been referenced by module
+                        FoundFlag = (DscPcdEntry.TokenSpaceGuidCName, DscPcdEntry.TokenCName) in VpdPcdKeySet
                         
                         # Not found, it should be signature
                         if not FoundFlag :
@@ -1187,8 +1244,8 @@ class PlatformAutoGen(AutoGen):
                                             if (Sku.DefaultValue == "" or Sku.DefaultValue==None):
                                                 DscPcdEntry.SkuInfoList[DscPcdEntry.SkuInfoList.keys()[0]].DefaultValue = DecPcdEntry.DefaultValue
                                                                                                                     
-                                if DscPcdEntry not in self._DynamicPcdList:
-                                    self._DynamicPcdList.append(DscPcdEntry)
+                                if DscPcdEntry not in DynaPcdIndex:
+                                    DynaPcdIndex.append(DscPcdEntry)
 #                                Sku = DscPcdEntry.SkuInfoList[DscPcdEntry.SkuInfoList.keys()[0]]
                                 Sku.VpdOffset = Sku.VpdOffset.strip()
                                 PcdValue = Sku.DefaultValue
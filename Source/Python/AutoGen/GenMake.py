@@ -32,8 +32,6 @@ gIncludePattern = re.compile(r"^[ \t]*#?[ \t]*include(?:[ \t]*(?:\\(?:\r\n|\r|\n
 ## Regular expression for matching macro used in header file inclusion
 gMacroPattern = re.compile("([_A-Z][_A-Z0-9]*)[ \t]*\((.+)\)", re.UNICODE)
 
-gIsFileMap = {}
-
 ## pattern for include style in Edk.x code
 gProtocolDefinition = "Protocol/%(HeaderKey)s/%(HeaderKey)s.h"
 gGuidDefinition = "Guid/%(HeaderKey)s/%(HeaderKey)s.h"
@@ -754,22 +752,27 @@ cleanlib:
             if F in DepDb:
                 CurrentFileDependencyList = DepDb[F]
             else:
-                try:
-                    Fd = open(F.Path, 'r')
-                except BaseException, X:
-                    EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=F.Path+"\n\t"+str(X))
-
-                FileContent = Fd.read()
-                Fd.close()
-                if len(FileContent) == 0:
-                    continue
+                # only read the file if it's changed since last scanning
+                IncludedFileList = gIncludeCache.Get(F.Path)
+                if IncludedFileList == None:
+                    Stamp = gIncludeCache.GetStamp(F.Path)
+                    try:
+                        Fd = open(F.Path, 'r')
+                    except BaseException, X:
+                        EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=F.Path+"\n\t"+str(X))
+
+                    FileContent = Fd.read()
+                    Fd.close()
+                    if len(FileContent) == 0:
+                        gIncludeCache.Set(F.Path, Stamp, [])
+                        continue
 
-                if FileContent[0] == 0xff or FileContent[0] == 0xfe:
-                    FileContent = unicode(FileContent, "utf-16")
-                IncludedFileList = gIncludePattern.findall(FileContent)
+                    if FileContent[0] == 0xff or FileContent[0] == 0xfe:
+                        FileContent = unicode(FileContent, "utf-16")
+                    IncludedFileList = [Inc.strip() for Inc in gIncludePattern.findall(FileContent)]
+                    gIncludeCache.Set(F.Path, Stamp, IncludedFileList)
 
                 for Inc in IncludedFileList:
-                    Inc = Inc.strip()
                     # if there's macro used to reference header file, expand it
                     HeaderList = gMacroPattern.findall(Inc)
                     if len(HeaderList) == 1 and len(HeaderList[0]) == 2:
@@ -791,15 +794,9 @@ cleanlib:
             for Inc in CurrentFileDependencyList:
                 for SearchPath in PathList:
                     FilePath = os.path.join(SearchPath, Inc)
-                    if FilePath in gIsFileMap:
-                        if not gIsFileMap[FilePath]:
-                            continue
                     # If isfile is called too many times, the performance is slow down.
-                    elif not os.path.isfile(FilePath):
-                        gIsFileMap[FilePath] = False
+                    if not gDirectoryIndex.IsFile(FilePath):
                         continue
-                    else:
-                        gIsFileMap[FilePath] = True
                     FilePath = PathClass(FilePath)
                     FullPathDependList.append(FilePath)
                     if FilePath not in DependencySet:
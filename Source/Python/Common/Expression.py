@@ -112,6 +112,64 @@ def ReplaceExprMacro(String, Macros, ExceptionList = None):
 
 SupportedInMacroList = ['TARGET', 'TOOL_CHAIN_TAG', 'ARCH', 'FAMILY']
 
+## The value of symbol not in symbol table, used in the keys of ValueExpression caches
+_SymbolNotFound = ('<not found>',)
+
+## SymbolRecorder
+#
+#  A wrapper of symbol table recording the names of symbols looked up, so that
+#  the result of macro replacement or evaluation can be reused as long as the
+#  same symbols have the same values.
+#
+class SymbolRecorder(object):
+    def __init__(self, SymbolTable):
+        self.SymbolTable = SymbolTable
+        self.NameList = []
+        self._NameSet = set()
+
+    def _Record(self, Name):
+        if Name not in self._NameSet:
+            self._NameSet.add(Name)
+            self.NameList.append(Name)
+
+    def __contains__(self, Name):
+        self._Record(Name)
+        return Name in self.SymbolTable
+
+    def __getitem__(self, Name):
+        self._Record(Name)
+        return self.SymbolTable[Name]
+
+    def update(self, *Args, **Kwargs):
+        self.SymbolTable.update(*Args, **Kwargs)
+
+    ## Get the values of recorded symbols
+    def GetValues(self):
+        return GetSymbolValues(self.SymbolTable, self.NameList)
+
+## Get the values of symbols in table, _SymbolNotFound for symbol not in table
+def GetSymbolValues(SymbolTable, NameList):
+    ValueList = []
+    for Name in NameList:
+        if Name in SymbolTable:
+            ValueList.append(SymbolTable[Name])
+        else:
+            ValueList.append(_SymbolNotFound)
+    return tuple(ValueList)
+
+## Get the cached result whose symbols have the same values in table
+#
+#  @param EntryList:    The list of (symbol name list, symbol values, result)
+#  @param SymbolTable:  The symbol table
+#
+#  @retval The entry found, None if there's no such entry
+#
+def FindCacheEntry(EntryList, SymbolTable):
+    for Entry in EntryList:
+        if GetSymbolValues(SymbolTable, Entry[0]) == Entry[1]:
+            return Entry
+    return None
+
 class ValueExpression(object):
     # Logical operator mapping
     LogicalOperators = {
@@ -138,6 +196,43 @@ class ValueExpression(object):
                                  "(?<=\W)EQ(?=\W)|(?<=\W)NE(?=\W)|(?<=\W)GT(?=\W)|(?<=\W)LT(?=\W)|(?<=\W)GE(?=\W)|(?<=\W)LE(?=\W)"
                                ")")
 
+    #
+    # The results of macro replacement and evaluation are cached by expression
+    # string, together with the names and values of symbols they looked up:
+    #   {expression : [(symbol name list, symbol values, expression replaced)]}
+    #   {(expression, RealValue, Depth == 0) : [(symbol name list, symbol values, (result, warning))]}
+    # An expression gets more than one entry only if its symbols change, like
+    # the same directive evaluated for different ARCH.
+    #
+    _MacroCache = {}
+    _ValueCache = {}
+    MaxCacheSize = 0x10000
+    MaxEntryNumber = 8
+
+    ## Add an entry of cache, limiting the size of cache
+    @staticmethod
+    def _AddCacheEntry(Cache, Key, Entry):
+        if len(Cache) >= ValueExpression.MaxCacheSize:
+            Cache.clear()
+        EntryList = Cache.setdefault(Key, [])
+        if len(EntryList) >= ValueExpression.MaxEntryNumber:
+            del EntryList[0]
+        EntryList.append(Entry)
+
+    ## Replace the macros in expression, see ReplaceExprMacro()
+    @staticmethod
+    def _ReplaceMacro(Expression, SymbolTable):
+        EntryList = ValueExpression._MacroCache.get(Expression)
+        if EntryList:
+            Entry = FindCacheEntry(EntryList, SymbolTable)
+            if Entry != None:
+                return Entry[2]
+        Recorder = SymbolRecorder(SymbolTable)
+        Result = ReplaceExprMacro(Expression, Recorder, SupportedInMacroList)
+        ValueExpression._AddCacheEntry(ValueExpression._MacroCache, Expression,
+                                       (Recorder.NameList, Recorder.GetValues(), Result))
+        return Result
+
     @staticmethod
     def Eval(Operator, Oprand1, Oprand2 = None):
         WrnExp = None
@@ -219,9 +314,7 @@ class ValueExpression(object):
             self._NoProcess = True
             return
 
-        self._Expr = ReplaceExprMacro(Expression.strip(),
-                                  SymbolTable,
-                                  SupportedInMacroList)
+        self._Expr = self._ReplaceMacro(Expression.strip(), SymbolTable)
 
         if not self._Expr.strip():
             raise BadExpression(ERR_EMPTY_EXPR)
@@ -246,13 +339,42 @@ class ValueExpression(object):
     #   @return: True or False if RealValue is False
     #            Evaluated value of string format if RealValue is True
     #
+    #   The result is reused for the same expression string as long as the
+    #   symbols looked up by the evaluation have the same values.
+    #
     def __call__(self, RealValue=False, Depth=0):
         if self._NoProcess:
             return self._Expr
 
+        self._Expr = self._Expr.strip()
+        Key = (self._Expr, RealValue, Depth == 0)
+        EntryList = self._ValueCache.get(Key)
+        Entry = None
+        if EntryList:
+            Entry = FindCacheEntry(EntryList, self._Symb)
+        if Entry == None:
+            SymbolTable = self._Symb
+            self._Symb = SymbolRecorder(SymbolTable)
+            try:
+                try:
+                    Result = (self.__Evaluate(RealValue, Depth), None)
+                except WrnExpression, Warn:
+                    Result = (Warn.result, Warn.args)
+                Entry = (self._Symb.NameList, self._Symb.GetValues(), Result)
+            finally:
+                self._Symb = SymbolTable
+            self._AddCacheEntry(self._ValueCache, Key, Entry)
+
+        RetVal, WarnArgs = Entry[2]
+        if WarnArgs != None:
+            Warn = WrnExpression(*WarnArgs)
+            Warn.result = RetVal
+            raise Warn
+        return RetVal
+
+    def __Evaluate(self, RealValue, Depth):
         self._Depth = Depth
 
-        self._Expr = self._Expr.strip()
         if RealValue and Depth == 0:
             self._Token = self._Expr
             if self.__IsNumberToken():
@@ -397,6 +397,7 @@ def CreateDirectory(Directory):
     try:
         if not os.access(Directory, os.F_OK):
             os.makedirs(Directory)
+            gDirectoryIndex.Add(Directory)
     except:
         return False
     return True
@@ -494,6 +495,7 @@ def SaveFileOnChange(File, Content, IsBinaryFile=True):
     except IOError, X:
         EdkLogger.error(None, FILE_CREATE_FAILURE, ExtraData='IOError %s'%X)
 
+    gDirectoryIndex.Add(File)
     return True
 
 ## Make a Python object persistent on file system
@@ -533,6 +535,259 @@ def DataRestore(File):
             Fd.close()
     return Data
 
+## Index of directory listings shared by the whole process
+#
+#  Each directory is listed only once, and the existence and the real name in
+#  file system of a path are then resolved by dictionary lookup instead of
+#  calling stat() for every candidate. This is used to resolve "#include" files
+#  in search paths, and the case-corrected paths of files in workspace.
+#
+#  Files created by the tools themselves (through SaveFileOnChange) are added
+#  to the index, other changes to file system during the run are not seen.
+#
+class DirectoryIndex(object):
+    def __init__(self):
+        # {directory : (set of names, {upper case name : name})}, None for non-existing directory
+        self._Listing = {}
+        # {path : True/False}, for names found in listing but not known as file or not
+        self._IsFile = {}
+        self._CaseSensitive = os.path.normcase('A') == 'A'
+
+    ## Get the listing of a directory
+    #
+    #   @param      Dir         The path of directory
+    #
+    #   @retval     tuple       (set of names, {upper case name : name})
+    #   @retval     None        If the directory doesn't exist
+    #
+    def GetListing(self, Dir):
+        if Dir in self._Listing:
+            return self._Listing[Dir]
+        try:
+            NameList = os.listdir(Dir or '.')
+        except (OSError, IOError):
+            Listing = None
+        else:
+            UpperNames = {}
+            for Name in NameList:
+                UpperNames[Name.upper()] = Name
+            Listing = (set(NameList), UpperNames)
+        self._Listing[Dir] = Listing
+        return Listing
+
+    ## Get the real name of a file or directory in given directory
+    #
+    #   @param      Dir             The path of directory
+    #   @param      Name            The name of file or directory
+    #   @param      CaseSensitive   If the name must match in case
+    #
+    #   @retval     string      The name in file system
+    #   @retval     None        If there's no such file or directory
+    #
+    def GetRealName(self, Dir, Name, CaseSensitive=True):
+        Listing = self.GetListing(Dir)
+        if Listing == None:
+            return None
+        if Name in Listing[0]:
+            return Name
+        if CaseSensitive and self._CaseSensitive:
+            return None
+        return Listing[1].get(Name.upper())
+
+    ## Check if a path exists
+    #
+    #   The path is checked in the same case sensitivity as os.path.exists().
+    #
+    #   @param      Path        The path to be checked
+    #
+    #   @retval     True        If the path exists
+    #   @retval     False       If the path doesn't exist
+    #
+    def Exists(self, Path):
+        if '..' in Path.split(os.sep):
+            # "dir/link/.." is not always "dir", let the file system resolve it
+            return os.path.exists(Path)
+        Dir, Name = os.path.split(os.path.normpath(Path))
+        if not Name:
+            return os.path.exists(Path)
+        return self.GetRealName(Dir, Name) != None
+
+    ## Check if a path is an existing file
+    #
+    #   Only the paths found in directory listing are checked by file system.
+    #
+    #   @param      Path        The path to be checked
+    #
+    #   @retval     True        If the path is a file
+    #   @retval     False       If the path is not a file
+    #
+    def IsFile(self, Path):
+        if Path in self._IsFile:
+            return self._IsFile[Path]
+        if not self.Exists(Path):
+            Result = False
+        else:
+            Result = os.path.isfile(Path)
+        self._IsFile[Path] = Result
+        return Result
+
+    ## Get the path with the real case of each part in file system
+    #
+    #   @param      Root        The root directory Path is relative to
+    #   @param      Path        The relative path
+    #
+    #   @retval     string      The relative path in file system
+    #   @retval     None        If the path doesn't exist
+    #
+    def GetRealPath(self, Root, Path):
+        Dir = Root and os.path.normpath(Root)
+        RealPartList = []
+        for Part in Path.split(os.sep):
+            if not Part or Part == '.':
+                continue
+            if Part == '..':
+                return None
+            RealPart = self.GetRealName(Dir, Part, False)
+            if RealPart == None:
+                return None
+            RealPartList.append(RealPart)
+            Dir = os.path.join(Dir, RealPart)
+        return os.sep.join(RealPartList)
+
+    ## Add a newly created file or directory to the index
+    #
+    #   @param      Path        The path of the new file or directory
+    #
+    def Add(self, Path):
+        Path = os.path.normpath(Path)
+        self._IsFile.pop(Path, None)
+        while True:
+            Dir, Name = os.path.split(Path)
+            if not Name or Dir == Path:
+                break
+            if Dir in self._Listing:
+                Listing = self._Listing[Dir]
+                if Listing == None:
+                    # the directory is created, list it again when needed
+                    del self._Listing[Dir]
+                elif Name in Listing[0]:
+                    break
+                else:
+                    Listing[0].add(Name)
+                    Listing[1][Name.upper()] = Name
+            Path = Dir
+
+gDirectoryIndex = DirectoryIndex()
+
+## Cache of the files included by source files
+#
+#  The names in "#include" directives of a source file are kept together with
+#  the time stamp and size of the file, so that a source file is read and scanned
+#  again only when it's changed. The cache can be saved into and restored from
+#  the build cache directory, which lets a build reuse the scanning result of
+#  previous builds.
+#
+class IncludeCache(object):
+    # version of the cache file layout, cache in other layout is discarded
+    _VERSION_ = 1
+
+    def __init__(self):
+        self._Cache = {}        # {file path : (time stamp, size, (included name, ...))}
+        self._Validated = set() # files checked against file system in this process
+        self._NewEntries = {}   # entries scanned in this process
+
+    ## Get the stamp of a file used to check if it's changed
+    #
+    #   @param      FilePath    The path of file
+    #
+    #   @retval     tuple       (time stamp, size) of the file
+    #   @retval     None        If the file cannot be accessed
+    #
+    @staticmethod
+    def GetStamp(FilePath):
+        try:
+            FileState = os.stat(FilePath)
+        except OSError:
+            return None
+        return (FileState.st_mtime, FileState.st_size)
+
+    ## Get the names included by a file
+    #
+    #   @param      FilePath    The path of file
+    #
+    #   @retval     tuple       The included names if the file is not changed
+    #   @retval     None        If the file is not in cache or is changed
+    #
+    def Get(self, FilePath):
+        Entry = self._Cache.get(FilePath)
+        if Entry == None:
+            return None
+        if FilePath not in self._Validated:
+            if self.GetStamp(FilePath) != Entry[:2]:
+                del self._Cache[FilePath]
+                return None
+            self._Validated.add(FilePath)
+        return Entry[2]
+
+    ## Set the names included by a file
+    #
+    #   @param      FilePath    The path of file
+    #   @param      Stamp       The stamp of file got by GetStamp() before reading it
+    #   @param      IncludeList The list of included names
+    #
+    def Set(self, FilePath, Stamp, IncludeList):
+        if Stamp == None:
+            return
+        # the same header name is used by many files, share the string object
+        Entry = Stamp + (tuple([type(Name) == str and intern(Name) or Name for Name in IncludeList]),)
+        self._Cache[FilePath] = Entry
+        self._NewEntries[FilePath] = Entry
+        self._Validated.add(FilePath)
+
+    ## Get and clear the entries scanned in this process
+    #
+    #   @retval     dict        The new entries since last call
+    #
+    def PopNewEntries(self):
+        NewEntries = self._NewEntries
+        self._NewEntries = {}
+        return NewEntries
+
+    ## Merge entries scanned in other process
+    #
+    #   @param      Entries     The entries got by PopNewEntries() in other process
+    #
+    def Merge(self, Entries):
+        self._Cache.update(Entries)
+        self._Validated.update(Entries)
+
+    ## Save the cache into a file
+    #
+    #   The entries of files deleted or renamed are dropped, so that the cache
+    #   doesn't keep growing. The files validated in this process are known to exist.
+    #
+    #   @param      File        The path of file to store the cache
+    #
+    def Save(self, File):
+        Cache = {}
+        for FilePath in self._Cache:
+            if FilePath in self._Validated or os.path.exists(FilePath):
+                Cache[FilePath] = self._Cache[FilePath]
+        DataDump((self._VERSION_, Cache), File)
+
+    ## Restore the cache from a file
+    #
+    #   @param      File        The path of file stored the cache
+    #
+    def Restore(self, File):
+        Data = DataRestore(File)
+        if type(Data) != type(()) or len(Data) != 2 or Data[0] != self._VERSION_:
+            return
+        Data[1].update(self._Cache)
+        self._Cache = Data[1]
+
+gIncludeCache = IncludeCache()
+
 ## Retrieve and cache the real path name in file system
 #
 #   @param      Root    The root directory of path relative to
@@ -541,14 +796,9 @@ def DataRestore(File):
 #   @retval     None    If path doesn't exist
 #
 class DirCache:
-    _CACHE_ = set()
-    _UPPER_CACHE_ = {}
-
     def __init__(self, Root):
         self._Root = Root
-        for F in os.listdir(Root):
-            self._CACHE_.add(F)
-            self._UPPER_CACHE_[F.upper()] = F
+        gDirectoryIndex.GetListing(os.path.normpath(Root))
 
     # =[] operator
     def __getitem__(self, Path):
@@ -557,52 +807,10 @@ class DirCache:
             return self._Root
         if Path and Path[0] == os.path.sep:
             Path = Path[1:]
-        if Path in self._CACHE_:
-            return os.path.join(self._Root, Path)
-        UpperPath = Path.upper()
-        if UpperPath in self._UPPER_CACHE_:
-            return os.path.join(self._Root, self._UPPER_CACHE_[UpperPath])
-
-        IndexList = []
-        LastSepIndex = -1
-        SepIndex = Path.find(os.path.sep)
-        while SepIndex > -1:
-            Parent = UpperPath[:SepIndex]
-            if Parent not in self._UPPER_CACHE_:
-                break
-            LastSepIndex = SepIndex
-            SepIndex = Path.find(os.path.sep, LastSepIndex + 1)
-
-        if LastSepIndex == -1:
+        RealPath = gDirectoryIndex.GetRealPath(self._Root, Path)
+        if RealPath == None:
             return None
-
-        Cwd = os.getcwd()
-        os.chdir(self._Root)
-        SepIndex = LastSepIndex
-        while SepIndex > -1:
-            Parent = Path[:SepIndex]
-            ParentKey = UpperPath[:SepIndex]
-            if ParentKey not in self._UPPER_CACHE_:
-                os.chdir(Cwd)
-                return None
-
-            if Parent in self._CACHE_:
-                ParentDir = Parent
-            else:
-                ParentDir = self._UPPER_CACHE_[ParentKey]
-            for F in os.listdir(ParentDir):
-                Dir = os.path.join(ParentDir, F)
-                self._CACHE_.add(Dir)
-                self._UPPER_CACHE_[Dir.upper()] = Dir
-
-            SepIndex = Path.find(os.path.sep, SepIndex + 1)
-
-        os.chdir(Cwd)
-        if Path in self._CACHE_:
-            return os.path.join(self._Root, Path)
-        elif UpperPath in self._UPPER_CACHE_:
-            return os.path.join(self._Root, self._UPPER_CACHE_[UpperPath])
-        return None
+        return os.path.join(self._Root, RealPath)
 
 ## Get all files of a directory
 #
@@ -666,8 +874,11 @@ def RealPath2(File, Dir='', OverrideDir=''):
         NewFile = GlobalData.gAllFiles[os.path.normpath(os.path.join(Dir, File))]
     if not NewFile:
         NewFile = os.path.normpath(os.path.join(Dir, File))
-        if not os.path.exists(NewFile):
-            return None, None
+        if not gDirectoryIndex.Exists(NewFile):
+            # the file may be created by other tools after its directory is listed
+            if not os.path.exists(NewFile):
+                return None, None
+            gDirectoryIndex.Add(NewFile)
     if NewFile:
         if Dir:
             if Dir[-1] == os.path.sep:
@@ -1071,86 +1282,151 @@ class Progressor:
 #
 #  The class implements a new kind of dict which its keys or values can be
 #  accessed in the order they are added into the dict. It guarantees the order
-#  by making use of an internal list to keep a copy of keys.
+#  by linking the keys in a circular doubly linked list, whose nodes are kept
+#  in a dict too, so that searching, adding, removing and inserting a key
+#  before or after another one take constant time. The keys in order are
+#  cached in a tuple for iteration until the list is changed.
 #
 class sdict(IterableUserDict):
     ## Constructor
     def __init__(self):
         IterableUserDict.__init__(self)
-        self._key_list = []
+        self.__InitList()
+
+    ## Initialize the empty list of keys
+    def __InitList(self):
+        # each node is [previous node, next node, key], the root node is a sentinel
+        self._root = []
+        self._root[:] = [self._root, self._root, None]
+        # {key : node}
+        self._node_map = {}
+        # the tuple of keys in order, None if the list is changed
+        self._key_tuple = None
+
+    ## Link a new node of key before the given node
+    def __Link(self, key, next):
+        prev = next[0]
+        node = [prev, next, key]
+        prev[1] = node
+        next[0] = node
+        self._node_map[key] = node
+        self._key_tuple = None
+
+    ## Unlink the node of key from list
+    def __Unlink(self, key):
+        prev, next, key = self._node_map.pop(key)
+        prev[1] = next
+        next[0] = prev
+        self._key_tuple = None
+
+    ## Get the keys in order from the list, or from the cache if not changed
+    def __GetKeyTuple(self):
+        if self._key_tuple == None:
+            keys = []
+            root = self._root
+            node = root[1]
+            while node is not root:
+                keys.append(node[2])
+                node = node[1]
+            self._key_tuple = tuple(keys)
+        return self._key_tuple
 
     ## [] operator
     def __setitem__(self, key, value):
-        if key not in self._key_list:
-            self._key_list.append(key)
+        if key not in self._node_map:
+            self.__Link(key, self._root)
         IterableUserDict.__setitem__(self, key, value)
 
     ## del operator
     def __delitem__(self, key):
-        self._key_list.remove(key)
         IterableUserDict.__delitem__(self, key)
+        self.__Unlink(key)
 
     ## used in "for k in dict" loop to ensure the correct order
     def __iter__(self):
-        return self.iterkeys()
+        return iter(self.__GetKeyTuple())
 
     ## len() support
     def __len__(self):
-        return len(self._key_list)
+        return len(self._node_map)
 
     ## "in" test support
     def __contains__(self, key):
-        return key in self._key_list
+        return key in self._node_map
+
+    ## pickle and copy support, the list of keys is too deep to be pickled by itself
+    def __getstate__(self):
+        return self.items()
+
+    def __setstate__(self, state):
+        IterableUserDict.__init__(self)
+        self.__InitList()
+        for key, value in state:
+            self[key] = value
+
+    ## Return a copy of the dict
+    def copy(self):
+        new = self.__class__()
+        new.append(self)
+        return new
 
     ## indexof support
     def index(self, key):
-        return self._key_list.index(key)
+        if key not in self._node_map:
+            raise ValueError("%s is not in sdict" % str(key))
+        target = self._node_map[key]
+        index = 0
+        node = self._root[1]
+        while node is not target:
+            node = node[1]
+            index += 1
+        return index
 
     ## insert support
     def insert(self, key, newkey, newvalue, order):
-        index = self._key_list.index(key)
+        node = self._node_map[key]
         if order == 'BEFORE':
-            self._key_list.insert(index, newkey)
-            IterableUserDict.__setitem__(self, newkey, newvalue)
+            next = node
         elif order == 'AFTER':
-            self._key_list.insert(index + 1, newkey)
+            next = node[1]
+        else:
+            return
+        if newkey == key:
             IterableUserDict.__setitem__(self, newkey, newvalue)
+            return
+        if newkey in self._node_map:
+            if self._node_map[newkey] is next:
+                next = next[1]
+            self.__Unlink(newkey)
+        self.__Link(newkey, next)
+        IterableUserDict.__setitem__(self, newkey, newvalue)
 
     ## append support
     def append(self, sdict):
         for key in sdict:
-            if key not in self._key_list:
-                self._key_list.append(key)
-            IterableUserDict.__setitem__(self, key, sdict[key])
+            self[key] = sdict[key]
 
     def has_key(self, key):
-        return key in self._key_list
+        return key in self._node_map
 
     ## Empty the dict
     def clear(self):
-        self._key_list = []
+        self.__InitList()
         IterableUserDict.clear(self)
 
     ## Return a copy of keys
     def keys(self):
-        keys = []
-        for key in self._key_list:
-            keys.append(key)
-        return keys
+        return list(self.__GetKeyTuple())
 
     ## Return a copy of values
     def values(self):
-        values = []
-        for key in self._key_list:
-            values.append(self[key])
-        return values
+        data = self.data
+        return [data[key] for key in self.__GetKeyTuple()]
 
     ## Return a copy of (key, value) list
     def items(self):
-        items = []
-        for key in self._key_list:
-            items.append((key, self[key]))
-        return items
+        data = self.data
+        return [(key, data[key]) for key in self.__GetKeyTuple()]
 
     ## Iteration support
     def iteritems(self):
@@ -1158,7 +1434,7 @@ class sdict(IterableUserDict):
 
     ## Keys interation support
     def iterkeys(self):
-        return iter(self.keys())
+        return iter(self.__GetKeyTuple())
 
     ## Values interation support
     def itervalues(self):
@@ -1167,16 +1443,18 @@ class sdict(IterableUserDict):
     ## Return value related to a key, and remove the (key, value) from the dict
     def pop(self, key, *dv):
         value = None
-        if key in self._key_list:
+        if key in self._node_map:
             value = self[key]
             self.__delitem__(key)
         elif len(dv) != 0 :
-            value = kv[0]
+            value = dv[0]
         return value
 
     ## Return (key, value) pair, and remove the (key, value) from the dict
     def popitem(self):
-        key = self._key_list[-1]
+        if not self._node_map:
+            raise KeyError("popitem(): sdict is empty")
+        key = self._root[0][2]
         value = self[key]
         self.__delitem__(key)
         return key, value
@@ -1229,6 +1507,11 @@ class rdict(dict):
 
 ## Dictionary using prioritized list as key
 #
+# The result of a key, in which the wildcards are resolved through all
+# levels, is kept in a flat index of the top level dictionary. So the same
+# key is answered by one lookup of the index until the dictionary or its
+# mode is changed.
+#
 class tdict:
     _ListType = type([])
     _TupleType = type(())
@@ -1239,9 +1522,33 @@ class tdict:
         self._Level_ = _Level_
         self.data = {}
         self._Single_ = _Single_
+        # {key : result}, created at the first lookup
+        self._Index = None
+        # the rest keys used for the levels missing in a key
+        self._RestWildcards = tuple([self._Wildcard for i in range(0, self._Level_-1)])
 
     # =[] operator
     def __getitem__(self, key):
+        if type(key) == self._ListType:
+            key = tuple(key)
+        Index = self._Index
+        if Index == None:
+            Index = self._Index = {}
+        try:
+            Value = Index[key]
+        except KeyError:
+            Value = self._Lookup(key)
+            Index[key] = Value
+        except TypeError:
+            # key not hashable
+            return self._Lookup(key)
+        if not self._Single_:
+            # the caller owns the list of all values
+            return Value[:]
+        return Value
+
+    ## Resolve the wildcards of a key through all levels
+    def _Lookup(self, key):
         KeyType = type(key)
         RestKeys = None
         if KeyType == self._ListType or KeyType == self._TupleType:
@@ -1249,11 +1556,11 @@ class tdict:
             if len(key) > 1:
                 RestKeys = key[1:]
             elif self._Level_ > 1:
-                RestKeys = [self._Wildcard for i in range(0, self._Level_-1)]
+                RestKeys = self._RestWildcards
         else:
             FirstKey = key
             if self._Level_ > 1:
-                RestKeys = [self._Wildcard for i in range(0, self._Level_-1)]
+                RestKeys = self._RestWildcards
 
         if FirstKey == None or str(FirstKey).upper() in self._ValidWildcardList:
             FirstKey = self._Wildcard
@@ -1269,17 +1576,17 @@ class tdict:
         if self._Level_ > 1:
             if FirstKey == self._Wildcard:
                 if FirstKey in self.data:
-                    Value = self.data[FirstKey][RestKeys]
+                    Value = self.data[FirstKey]._Lookup(RestKeys)
                 if Value == None:
                     for Key in self.data:
-                        Value = self.data[Key][RestKeys]
+                        Value = self.data[Key]._Lookup(RestKeys)
                         if Value != None: break
             else:
                 if FirstKey in self.data:
-                    Value = self.data[FirstKey][RestKeys]
+                    Value = self.data[FirstKey]._Lookup(RestKeys)
                 if Value == None and self._Wildcard in self.data:
                     #print "Value=None"
-                    Value = self.data[self._Wildcard][RestKeys]
+                    Value = self.data[self._Wildcard]._Lookup(RestKeys)
         else:
             if FirstKey == self._Wildcard:
                 if FirstKey in self.data:
@@ -1300,12 +1607,12 @@ class tdict:
         if self._Level_ > 1:
             if FirstKey == self._Wildcard:
                 for Key in self.data:
-                    Value += self.data[Key][RestKeys]
+                    Value += self.data[Key]._Lookup(RestKeys)
             else:
                 if FirstKey in self.data:
-                    Value += self.data[FirstKey][RestKeys]
+                    Value += self.data[FirstKey]._Lookup(RestKeys)
                 if self._Wildcard in self.data:
-                    Value += self.data[self._Wildcard][RestKeys]
+                    Value += self.data[self._Wildcard]._Lookup(RestKeys)
         else:
             if FirstKey == self._Wildcard:
                 for Key in self.data:
@@ -1319,6 +1626,7 @@ class tdict:
 
     ## []= operator
     def __setitem__(self, key, value):
+        self._Index = None
         KeyType = type(key)
         RestKeys = None
         if KeyType == self._ListType or KeyType == self._TupleType:
@@ -1326,11 +1634,11 @@ class tdict:
             if len(key) > 1:
                 RestKeys = key[1:]
             else:
-                RestKeys = [self._Wildcard for i in range(0, self._Level_-1)]
+                RestKeys = self._RestWildcards
         else:
             FirstKey = key
             if self._Level_ > 1:
-                RestKeys = [self._Wildcard for i in range(0, self._Level_-1)]
+                RestKeys = self._RestWildcards
 
         if FirstKey in self._ValidWildcardList:
             FirstKey = self._Wildcard
@@ -1345,12 +1653,14 @@ class tdict:
 
     def SetGreedyMode(self):
         self._Single_ = False
+        self._Index = None
         if self._Level_ > 1:
             for Key in self.data:
                 self.data[Key].SetGreedyMode()
 
     def SetSingleMode(self):
         self._Single_ = True
+        self._Index = None
         if self._Level_ > 1:
             for Key in self.data:
                 self.data[Key].SetSingleMode()
@@ -1713,48 +2023,136 @@ def ConvertStringToByteArray(Value):
     Value = NewValue + '0}'
     return Value
 
-class PathClass(object):
-    def __init__(self, File='', Root='', AlterRoot='', Type='', IsBinary=False,
-                 Arch='COMMON', ToolChainFamily='', Target='', TagName='', ToolCode=''):
-        self.Arch = Arch
-        self.File = str(File)
-        if os.path.isabs(self.File):
-            self.Root = ''
-            self.AlterRoot = ''
+## Intern a path string, which is shared by many PathClass objects
+def _InternPath(Path):
+    if type(Path) == str:
+        return intern(Path)
+    return Path
+
+## The path information shared by the PathClass objects of the same file
+#
+# The parts of path are split only when any of them is used.
+#
+class _PathInfo(object):
+    __slots__ = ('File', 'Root', 'AlterRoot', 'Path', 'Hash', 'Key', 'SubDir', 'Name', 'BaseName', 'Ext', 'Dir')
+
+    def __init__(self, File, Root, AlterRoot, Path):
+        self.File = _InternPath(File)
+        self.Root = _InternPath(Root)
+        self.AlterRoot = _InternPath(AlterRoot)
+        self.Path = _InternPath(Path)
+        self.Hash = hash(self.Path)
+        self.Key = None
+        self.SubDir = None
+        self.Name = None
+        self.BaseName = None
+        self.Ext = None
+        self.Dir = None
+
+    ## Split the path into sub-directory, name and extension
+    def Split(self):
+        if self.SubDir != None:
+            return
+        SubDir, Name = os.path.split(self.File)
+        BaseName, Ext = os.path.splitext(Name)
+        if SubDir:
+            self.Dir = _InternPath(os.path.join(self.Root, SubDir))
         else:
-            self.Root = str(Root)
-            self.AlterRoot = str(AlterRoot)
-
-        # Remove any '.' and '..' in path
-        if self.Root:
-            self.Path = os.path.normpath(os.path.join(self.Root, self.File))
-            self.Root = os.path.normpath(CommonPath([self.Root, self.Path]))
-            # eliminate the side-effect of 'C:'
-            if self.Root[-1] == ':':
-                self.Root += os.path.sep
-            # file path should not start with path separator
-            if self.Root[-1] == os.path.sep:
-                self.File = self.Path[len(self.Root):]
-            else:
-                self.File = self.Path[len(self.Root)+1:]
+            self.Dir = self.Root
+        self.Name = _InternPath(Name)
+        self.BaseName = _InternPath(BaseName)
+        self.Ext = _InternPath(Ext)
+        self.SubDir = _InternPath(SubDir)
+
+    def GetKey(self):
+        if self.Key == None:
+            self.Key = _InternPath(self.Path.upper())   # + self.ToolChainFamily + self.TagName + self.ToolCode + self.Target
+        return self.Key
+
+    ## Get a copy which can be changed without affecting other PathClass objects
+    def Copy(self):
+        self.Split()
+        Info = _PathInfo.__new__(_PathInfo)
+        Info.__setstate__(self.__getstate__())
+        return Info
+
+    def __getstate__(self):
+        return tuple([getattr(self, Name) for Name in self.__slots__])
+
+    def __setstate__(self, State):
+        for Name, Value in zip(self.__slots__, State):
+            setattr(self, Name, Value)
+
+## {(File, Root, AlterRoot) : _PathInfo} of the PathClass objects created in this process
+_PathInfoCache = {}
+
+## Get the path information of a file, which is normalized only once in a process
+def _GetPathInfo(File, Root, AlterRoot):
+    CacheKey = (File, Root, AlterRoot)
+    Info = _PathInfoCache.get(CacheKey)
+    if Info != None:
+        return Info
+
+    if os.path.isabs(File):
+        Root = ''
+        AlterRoot = ''
+
+    # Remove any '.' and '..' in path
+    if Root:
+        Path = os.path.normpath(os.path.join(Root, File))
+        Root = os.path.normpath(CommonPath([Root, Path]))
+        # eliminate the side-effect of 'C:'
+        if Root[-1] == ':':
+            Root += os.path.sep
+        # file path should not start with path separator
+        if Root[-1] == os.path.sep:
+            File = Path[len(Root):]
         else:
-            self.Path = os.path.normpath(self.File)
+            File = Path[len(Root)+1:]
+    else:
+        Path = os.path.normpath(File)
+
+    Info = _PathInfo(File, Root, AlterRoot, Path)
+    _PathInfoCache[CacheKey] = Info
+    return Info
+
+## Get the path information of a file validated in file system
+def _GetRealPathInfo(File, Root, AlterRoot):
+    CacheKey = (None, File, Root, AlterRoot)
+    Info = _PathInfoCache.get(CacheKey)
+    if Info == None:
+        Info = _PathInfo(File, Root, AlterRoot, os.path.join(Root, File))
+        _PathInfoCache[CacheKey] = Info
+    return Info
+
+## Get the property of a path part, which is kept in the shared _PathInfo object
+def _PathInfoProperty(Name, Split=False):
+    if Split:
+        def GetPart(self):
+            Info = self._Info
+            if Info.SubDir == None:
+                Info.Split()
+            return getattr(Info, Name)
+    else:
+        def GetPart(self):
+            return getattr(self._Info, Name)
+    def SetPart(self, Value):
+        self._SetInfo(Name, Value)
+    return property(GetPart, SetPart)
 
-        self.SubDir, self.Name = os.path.split(self.File)
-        self.BaseName, self.Ext = os.path.splitext(self.Name)
+class PathClass(object):
+    __slots__ = ('_Info', '_Type', 'Arch', 'IsBinary', 'Target', 'TagName', 'ToolCode', 'ToolChainFamily')
 
-        if self.Root:
-            if self.SubDir:
-                self.Dir = os.path.join(self.Root, self.SubDir)
-            else:
-                self.Dir = self.Root
-        else:
-            self.Dir = self.SubDir
+    def __init__(self, File='', Root='', AlterRoot='', Type='', IsBinary=False,
+                 Arch='COMMON', ToolChainFamily='', Target='', TagName='', ToolCode=''):
+        self.Arch = Arch
+        self._Info = _GetPathInfo(str(File), str(Root), str(AlterRoot))
 
+        # the type of source file is got from its extension when it's used
         if IsBinary:
-            self.Type = Type
+            self._Type = Type
         else:
-            self.Type = self.Ext.lower()
+            self._Type = None
 
         self.IsBinary = IsBinary
         self.Target = Target
@@ -1762,7 +2160,24 @@ class PathClass(object):
         self.ToolCode = ToolCode
         self.ToolChainFamily = ToolChainFamily
 
-        self._Key = None
+    ## Change a part of path of this object only
+    def _SetInfo(self, Name, Value):
+        # the type is of the path given in constructor
+        if self._Type == None:
+            self._Type = self.Type
+        Info = self._Info.Copy()
+        setattr(Info, Name, Value)
+        if Name == 'Path':
+            Info.Hash = hash(Value)
+            Info.Key = None
+        self._Info = Info
+
+    def __getstate__(self):
+        return tuple([getattr(self, Name) for Name in self.__slots__])
+
+    def __setstate__(self, State):
+        for Name, Value in zip(self.__slots__, State):
+            setattr(self, Name, Value)
 
     ## Convert the object of this class to a string
     #
@@ -1771,7 +2186,7 @@ class PathClass(object):
     #  @retval string Formatted String
     #
     def __str__(self):
-        return self.Path
+        return self._Info.Path
 
     ## Override __eq__ function
     #
@@ -1781,10 +2196,12 @@ class PathClass(object):
     # @retval True  The two PathClass are the same
     #
     def __eq__(self, Other):
+        if Other is self:
+            return True
         if type(Other) == type(self):
-            return self.Path == Other.Path
+            return self._Info is Other._Info or self._Info.Path == Other._Info.Path
         else:
-            return self.Path == str(Other)
+            return self._Info.Path == str(Other)
 
     ## Override __cmp__ function
     #
@@ -1814,16 +2231,22 @@ class PathClass(object):
     # @retval string Key for hash table
     #
     def __hash__(self):
-        return hash(self.Path)
+        return self._Info.Hash
 
     def _GetFileKey(self):
-        if self._Key == None:
-            self._Key = self.Path.upper()   # + self.ToolChainFamily + self.TagName + self.ToolCode + self.Target
-        return self._Key
+        return self._Info.GetKey()
 
     def _GetTimeStamp(self):
         return os.stat(self.Path)[8]
 
+    def _GetType(self):
+        if self._Type == None:
+            self._Type = _InternPath(self.Ext.lower())
+        return self._Type
+
+    def _SetType(self, Value):
+        self._Type = Value
+
     def Validate(self, Type='', CaseSensitive=True):
         if GlobalData.gCaseInsensitive:
             CaseSensitive = False
@@ -1846,17 +2269,22 @@ class PathClass(object):
                 ErrorCode = FILE_CASE_MISMATCH
                 ErrorInfo = self.File + '\n\t' + RealFile + " [in file system]"
 
-            self.SubDir, self.Name = os.path.split(RealFile)
-            self.BaseName, self.Ext = os.path.splitext(self.Name)
-            if self.SubDir:
-                self.Dir = os.path.join(RealRoot, self.SubDir)
-            else:
-                self.Dir = RealRoot
-            self.File = RealFile
-            self.Root = RealRoot
-            self.Path = os.path.join(RealRoot, RealFile)
+            # the type is of the path given in constructor
+            if self._Type == None:
+                self._Type = self.Type
+            self._Info = _GetRealPathInfo(RealFile, RealRoot, self.AlterRoot)
         return ErrorCode, ErrorInfo
 
+    File = _PathInfoProperty('File')
+    Root = _PathInfoProperty('Root')
+    AlterRoot = _PathInfoProperty('AlterRoot')
+    Path = _PathInfoProperty('Path')
+    SubDir = _PathInfoProperty('SubDir', True)
+    Name = _PathInfoProperty('Name', True)
+    BaseName = _PathInfoProperty('BaseName', True)
+    Ext = _PathInfoProperty('Ext', True)
+    Dir = _PathInfoProperty('Dir', True)
+    Type = property(_GetType, _SetType)
     Key = property(_GetFileKey)
     TimeStamp = property(_GetTimeStamp)
 
@@ -0,0 +1,143 @@
+## @file
+# Command graph of the image generation, saved as ninja or make file
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import Common.LongFilePathOs as os
+import sys
+import pipes
+import subprocess
+import threading
+from Common.Misc import CreateDirectory
+from Common.Misc import SaveFileOnChange
+
+## The formats the graph can be saved in
+FORMAT_NINJA = 'ninja'
+FORMAT_MAKE = 'make'
+FormatList = [FORMAT_NINJA, FORMAT_MAKE]
+
+## Join the arguments into a command line for the shell of the platform
+#
+#   @param  Argv        The arguments in list, not quoted
+#
+#   @retval string      The command line with every argument quoted as needed
+#
+def JoinCommand(Argv):
+    if sys.platform == "win32":
+        return subprocess.list2cmdline(Argv)
+    return ' '.join([pipes.quote(Arg) for Arg in Argv])
+
+## Command graph of sections, FFS files, FV images and option ROMs
+#
+# The command of each output checked by NeedsUpdate() is recorded with its
+# input files, whether the output is up to date or not, so that the graph
+# covers all images of the run. An input is a dependency on the command
+# generating it, if any. The FD and capsule images are assembled by GenFds
+# itself instead of any command, so they are not in the graph.
+#
+class CommandGraph:
+    ## The constructor
+    #
+    #   @param  self        The object pointer
+    #
+    def __init__(self):
+        self.Lock = threading.Lock()
+        # {output : (command line, [input])}
+        self.CommandDict = {}
+        # outputs in the order their commands are recorded
+        self.OutputList = []
+
+    ## Add() method
+    #
+    #   Record the command generating an output. The latest command is kept
+    #   if an output is generated more than once, like the FV images rebased
+    #   in the second pass of GenFv.
+    #
+    #   @param  self        The object pointer
+    #   @param  Output      The output file
+    #   @param  Input       The list of input files
+    #   @param  Command     The arguments of command line in list, not quoted
+    #
+    def Add(self, Output, Input, Command):
+        Output = os.path.normpath(Output)
+        InputList = []
+        for File in Input or []:
+            File = os.path.normpath(File)
+            if File != Output and File not in InputList:
+                InputList.append(File)
+        self.Lock.acquire()
+        try:
+            if Output not in self.CommandDict:
+                self.OutputList.append(Output)
+            self.CommandDict[Output] = (JoinCommand(Command), InputList)
+        finally:
+            self.Lock.release()
+
+    ## Get the outputs which are not input of any other command
+    def __GetRootList(self):
+        InputSet = set()
+        for Command, InputList in self.CommandDict.values():
+            InputSet.update(InputList)
+        return [Output for Output in self.OutputList if Output not in InputSet]
+
+    def __GetNinjaFile(self):
+        Escape = lambda Path: Path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+        Lines = [
+            '# Generated by GenFds, DO NOT EDIT',
+            '',
+            'rule GenFds',
+            '  command = $cmd',
+            '  description = $out',
+            ''
+        ]
+        for Output in self.OutputList:
+            Command, InputList = self.CommandDict[Output]
+            Lines.append('build %s: GenFds %s' % (Escape(Output), ' '.join([Escape(File) for File in InputList])))
+            Lines.append('  cmd = %s' % Command.replace('$', '$$'))
+        Lines.append('')
+        Lines.append('build all: phony %s' % ' '.join([Escape(Output) for Output in self.__GetRootList()]))
+        Lines.append('default all')
+        return '\n'.join(Lines) + '\n'
+
+    def __GetMakeFile(self):
+        Escape = lambda Path: Path.replace('$', '$$').replace(' ', '\\ ').replace('#', '\\#')
+        Lines = [
+            '# Generated by GenFds, DO NOT EDIT',
+            '',
+            '.PHONY: all',
+            'all: %s' % ' '.join([Escape(Output) for Output in self.__GetRootList()]),
+        ]
+        for Output in self.OutputList:
+            Command, InputList = self.CommandDict[Output]
+            Lines.append('')
+            Lines.append('%s: %s' % (Escape(Output), ' '.join([Escape(File) for File in InputList])))
+            Lines.append('\t%s' % Command.replace('$', '$$'))
+        return '\n'.join(Lines) + '\n'
+
+    ## Save() method
+    #
+    #   @param  self        The object pointer
+    #   @param  FileName    The path of ninja or make file
+    #   @param  Format      FORMAT_NINJA or FORMAT_MAKE
+    #
+    def Save(self, FileName, Format=FORMAT_NINJA):
+        self.Lock.acquire()
+        try:
+            if Format == FORMAT_MAKE:
+                Content = self.__GetMakeFile()
+            else:
+                Content = self.__GetNinjaFile()
+        finally:
+            self.Lock.release()
+        CreateDirectory(os.path.dirname(os.path.abspath(FileName)))
+        SaveFileOnChange(FileName, Content, False)
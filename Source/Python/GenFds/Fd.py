@@ -18,14 +18,14 @@
 import Region
 import Fv
 import Common.LongFilePathOs as os
-import StringIO
 import sys
+import mmap
 from struct import *
 from GenFdsGlobalVariable import GenFdsGlobalVariable
 from CommonDataClass.FdfClass import FDClassObject
 from Common import EdkLogger
 from Common.BuildToolError import *
-from Common.Misc import SaveFileOnChange
+from Common.LongFilePathSupport import OpenLongFilePath as open
 from GenFds import GenFds
 
 ## generate FD
@@ -65,34 +65,11 @@ class FD(FDClassObject):
         GenFdsGlobalVariable.VerboseLogger('################### Gen VTF ####################')
         self.GenVtfFile()
 
-        TempFdBuffer = StringIO.StringIO('')
-        PreviousRegionStart = -1
-        PreviousRegionSize = 1
-        
-        for RegionObj in self.RegionList :
-            if RegionObj.RegionType == 'CAPSULE':
-                continue
-            if RegionObj.Offset + RegionObj.Size <= PreviousRegionStart:
-                pass
-            elif RegionObj.Offset <= PreviousRegionStart or (RegionObj.Offset >=PreviousRegionStart and RegionObj.Offset < PreviousRegionStart + PreviousRegionSize):
-                pass
-            elif RegionObj.Offset > PreviousRegionStart + PreviousRegionSize:
-                GenFdsGlobalVariable.InfLogger('Padding region starting from offset 0x%X, with size 0x%X' %(PreviousRegionStart + PreviousRegionSize, RegionObj.Offset - (PreviousRegionStart + PreviousRegionSize)))
-                PadRegion = Region.Region()
-                PadRegion.Offset = PreviousRegionStart + PreviousRegionSize
-                PadRegion.Size = RegionObj.Offset - PadRegion.Offset
-                PadRegion.AddToBuffer(TempFdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
-            PreviousRegionStart = RegionObj.Offset
-            PreviousRegionSize = RegionObj.Size
-            #
-            # Call each region's AddToBuffer function
-            #
-            if PreviousRegionSize > self.Size:
-                pass
-            GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
-            RegionObj.AddToBuffer (TempFdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
-        
-        FdBuffer = StringIO.StringIO('')
+        #
+        # Check the regions before generating any of them, and get the padding
+        # regions between them
+        #
+        RegionList = []
         PreviousRegionStart = -1
         PreviousRegionSize = 1
         for RegionObj in self.RegionList :
@@ -109,7 +86,7 @@ class FD(FDClassObject):
                 PadRegion = Region.Region()
                 PadRegion.Offset = PreviousRegionStart + PreviousRegionSize
                 PadRegion.Size = RegionObj.Offset - PadRegion.Offset
-                PadRegion.AddToBuffer(FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
+                RegionList.append(PadRegion)
             PreviousRegionStart = RegionObj.Offset
             PreviousRegionSize = RegionObj.Size
             #
@@ -119,22 +96,41 @@ class FD(FDClassObject):
                 EdkLogger.error("GenFds", GENFDS_ERROR,
                                 'FD %s size too small to fit region with offset 0x%X and size 0x%X'
                                 % (self.FdUiName, PreviousRegionStart, PreviousRegionSize))
-            #
-            # Call each region's AddToBuffer function
-            #
-            GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
-            RegionObj.AddToBuffer (FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
+            RegionList.append(RegionObj)
+        FdSize = PreviousRegionStart + PreviousRegionSize
+
         #
-        # Create a empty Fd file
+        # Create the Fd file in its final size, and write each region at its
+        # offset. The FV regions are generated before the capsule regions, since
+        # the capsules may contain the FVs in the same Fd.
         #
         GenFdsGlobalVariable.VerboseLogger ('Create an empty Fd file')
         FdFileName = os.path.join(GenFdsGlobalVariable.FvDir,self.FdUiName + '.fd')
-        #
-        # Write the buffer contents to Fd file
-        #
-        GenFdsGlobalVariable.VerboseLogger('Write the buffer contents to Fd file')
-        SaveFileOnChange(FdFileName, FdBuffer.getvalue())
-        FdBuffer.close();
+        TempFileName = FdFileName + '.tmp'
+        FdFile = open(TempFileName, 'w+b')
+        try:
+            if FdSize > 0:
+                FdFile.seek(FdSize - 1)
+                FdFile.write('\0')
+                FdFile.flush()
+                FdBuffer = mmap.mmap(FdFile.fileno(), FdSize, access=mmap.ACCESS_WRITE)
+                try:
+                    for RegionObj in [Item for Item in RegionList if Item.RegionType != 'CAPSULE'] + \
+                                     [Item for Item in RegionList if Item.RegionType == 'CAPSULE']:
+                        #
+                        # Call each region's AddToBuffer function
+                        #
+                        GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
+                        FdBuffer.seek(RegionObj.Offset)
+                        RegionObj.AddToBuffer (FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
+                    FdBuffer.flush()
+                finally:
+                    FdBuffer.close()
+        finally:
+            FdFile.close()
+        if os.path.exists(FdFileName):
+            os.remove(FdFileName)
+        os.rename(TempFileName, FdFileName)
         GenFds.ImageBinDict[self.FdUiName.upper() + 'fd'] = FdFileName
         return FdFileName
 
@@ -17,6 +17,7 @@
 # Import Modules
 #
 import Rule
+from Rule import CopyRule
 import Common.LongFilePathOs as os
 import StringIO
 from struct import *
@@ -70,6 +71,8 @@ class FfsInfStatement(FfsInfStatementClassObject):
         self.OverrideGuid = None
         self.PatchedBinFile = ''
         self.MacroDict = {}
+        # (rule in FDF, copy of the rule used by this statement)
+        self.RuleCopy = None
 
     ## GetFinalTargetSuffixMap() method
     #
@@ -452,12 +455,28 @@ class FfsInfStatement(FfsInfStatementClassObject):
 
     ## __GetRule__() method
     #
-    #   Get correct rule for generating FFS for this INF
+    #   Get correct rule for generating FFS for this INF. The sections of rule
+    #   are changed during generation, so this statement works on its own copy
+    #   of the rule, which is kept for later generations of the same statement.
     #
     #   @param  self        The object pointer
     #   @retval Rule        Rule object
     #
     def __GetRule__ (self) :
+        Rule = self.__FindRule__()
+        # the rule may be shared with the FFS files generated in other threads
+        if self.RuleCopy == None or self.RuleCopy[0] is not Rule:
+            self.RuleCopy = (Rule, CopyRule(Rule))
+        return self.RuleCopy[1]
+
+    ## __FindRule__() method
+    #
+    #   Find the rule in FDF for this INF
+    #
+    #   @param  self        The object pointer
+    #   @retval Rule        Rule object
+    #
+    def __FindRule__ (self) :
         CurrentArchList = []
         if self.CurrentArch == None:
             CurrentArchList = ['common']
@@ -17,11 +17,15 @@
 #
 import Common.LongFilePathOs as os
 import subprocess
+import time
 import StringIO
 from struct import *
 
 import Ffs
 import AprioriSection
+from FfsInfStatement import FfsInfStatement
+from FvImageSection import FvImageSection
+from GuidSection import GuidSection
 from GenFdsGlobalVariable import GenFdsGlobalVariable
 from GenFds import GenFds
 from CommonDataClass.FdfClass import FvClassObject
@@ -55,7 +59,8 @@ class FV (FvClassObject):
     #   Generate Fv and add it to the Buffer
     #
     #   @param  self        The object pointer
-    #   @param  Buffer      The buffer generated FV data will be put
+    #   @param  Buffer      The buffer generated FV data will be put, None if
+    #                       only the FV file is needed
     #   @param  BaseAddress base address of FV
     #   @param  BlockSize   block size of FV
     #   @param  BlockNum    How many blocks in FV
@@ -87,7 +92,8 @@ class FV (FvClassObject):
                                 GenFdsGlobalVariable.ErrorLogger("Capsule %s in FD region can't contain a FV %s in FD region." % (self.CapsuleName, self.UiFvName.upper()))
 
         GenFdsGlobalVariable.InfLogger( "\nGenerating %s FV" %self.UiFvName)
-        GenFdsGlobalVariable.LargeFileInFvFlags.append(False)
+        StartTime = time.time()
+        GenFdsGlobalVariable.GetLargeFileInFvFlags().append(False)
         FFSGuid = None
         
         if self.FvBaseAddress != None:
@@ -109,9 +115,10 @@ class FV (FvClassObject):
                                        FileName          + \
                                            T_CHAR_LF)
 
-        # Process Modules in FfsList
-        for FfsFile in self.FfsList :
-            FileName = FfsFile.GenFfs(MacroDict, FvParentAddr=BaseAddress)
+        # Process Modules in FfsList, maybe in several threads. The file names
+        # are still written in the order of FfsList.
+        CallList = [self.__GetGenFfsCall__(FfsFile, MacroDict, BaseAddress) for FfsFile in self.FfsList]
+        for FileName in GenFdsGlobalVariable.CallInThreads(CallList):
             FfsFileList.append(FileName)
             self.FvInfFile.writelines("EFI_FILE_NAME = " + \
                                        FileName          + \
@@ -133,7 +140,7 @@ class FV (FvClassObject):
         OrigFvInfo = None
         if os.path.exists (FvInfoFileName):
             OrigFvInfo = open(FvInfoFileName, 'r').read()
-        if GenFdsGlobalVariable.LargeFileInFvFlags[-1]:
+        if GenFdsGlobalVariable.GetLargeFileInFvFlags()[-1]:
             FFSGuid = GenFdsGlobalVariable.EFI_FIRMWARE_FILE_SYSTEM3_GUID;
         GenFdsGlobalVariable.GenerateFirmwareVolume(
                                 FvOutputFile,
@@ -161,11 +168,13 @@ class FV (FvClassObject):
             AddFileObj.close()
 
             if FvChildAddr != []:
-                # Update Ffs again
+                # Update the Ffs taking the addresses of inside FvImage again,
+                # the others don't change with the addresses
                 for FfsFile in self.FfsList :
-                    FileName = FfsFile.GenFfs(MacroDict, FvChildAddr, BaseAddress)
+                    if self.__IncludeFvImageSection__(FfsFile):
+                        FileName = FfsFile.GenFfs(MacroDict, FvChildAddr, BaseAddress)
                 
-                if GenFdsGlobalVariable.LargeFileInFvFlags[-1]:
+                if GenFdsGlobalVariable.GetLargeFileInFvFlags()[-1]:
                     FFSGuid = GenFdsGlobalVariable.EFI_FIRMWARE_FILE_SYSTEM3_GUID;
                 #Update GenFv again
                 GenFdsGlobalVariable.GenerateFirmwareVolume(
@@ -185,8 +194,9 @@ class FV (FvClassObject):
         GenFdsGlobalVariable.VerboseLogger( "\nGenerate %s FV Successfully" %self.UiFvName)
         GenFdsGlobalVariable.SharpCounter = 0
 
-        Buffer.write(FvFileObj.read())
-        FvFileObj.seek(0)
+        if Buffer != None:
+            Buffer.write(FvFileObj.read())
+            FvFileObj.seek(0)
         # PI FvHeader is 0x48 byte
         FvHeaderBuffer = FvFileObj.read(0x48)
         # FV alignment position.
@@ -203,9 +213,48 @@ class FV (FvClassObject):
             self.FvAlignment = str (FvAlignmentValue)
         FvFileObj.close()
         GenFds.ImageBinDict[self.UiFvName.upper() + 'fv'] = FvOutputFile
-        GenFdsGlobalVariable.LargeFileInFvFlags.pop()
+        GenFdsGlobalVariable.GetLargeFileInFvFlags().pop()
+        if GenFdsGlobalVariable.Profile != None:
+            GenFdsGlobalVariable.Profile.AddImage('FV', self.UiFvName, time.time() - StartTime)
         return FvOutputFile
 
+    ## __GetGenFfsCall__()
+    #
+    #   Get the function generating FFS file for an FFS statement in FV
+    #
+    #   @param  FfsFile     The FFS statement object
+    #   @param  MacroDict   macro value pair
+    #   @param  BaseAddress base address of FV
+    #   @retval function    The function returning the generated FFS file path
+    #
+    def __GetGenFfsCall__(self, FfsFile, MacroDict, BaseAddress):
+        return lambda: FfsFile.GenFfs(MacroDict, FvParentAddr=BaseAddress)
+
+    ## __IncludeFvImageSection__()
+    #
+    #   Check whether an FFS statement has FvImage sections which take the
+    #   base addresses of inside FvImage, directly or in GUIDed sections. It
+    #   must be called after the FFS file is generated once.
+    #
+    #   @param  FfsFile     The FFS statement object
+    #   @param  SectionList The sections to check, None for the ones of FfsFile
+    #   @retval True        The FFS file depends on the inside FvImage addresses
+    #   @retval False       The FFS file doesn't depend on them
+    #
+    def __IncludeFvImageSection__(self, FfsFile, SectionList=None):
+        if SectionList == None:
+            if isinstance(FfsFile, FfsInfStatement):
+                # the sections come from the rule of module
+                SectionList = getattr(FfsFile.__GetRule__(), 'SectionList', [])
+            else:
+                SectionList = FfsFile.SectionList
+        for SectionObj in SectionList:
+            if isinstance(SectionObj, FvImageSection):
+                return True
+            if isinstance(SectionObj, GuidSection) and self.__IncludeFvImageSection__(FfsFile, SectionObj.SectionList):
+                return True
+        return False
+
     ## __InitializeInf__()
     #
     #   Initilize the inf file to create FV
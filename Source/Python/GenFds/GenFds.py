@@ -39,12 +39,18 @@ from Common.Misc import SaveFileOnChange
 from Common.Misc import ClearDuplicatedInf
 from Common.Misc import GuidStructureStringToGuidString
 from Common.BuildVersion import gBUILD_VERSION
+from SectionCache import SectionCache
+from ToolProfile import ToolProfile
+import CommandGraph
 
 ## Version and Copyright
 versionNumber = "1.0" + ' ' + gBUILD_VERSION
 __version__ = "%prog Version " + versionNumber
 __copyright__ = "Copyright (c) 2007 - 2014, Intel Corporation  All rights reserved."
 
+## The file name of output manifest in build cache directory, used by --hash
+gManifestFileName = "gGenFdsManifest"
+
 ## Tool entrance method
 #
 # This method mainly dispatch specific methods per the command line options.
@@ -71,6 +77,11 @@ def main():
             
         if Options.FixedAddress != None:
             GenFdsGlobalVariable.FixedLoadAddress = True
+
+        if Options.ThreadNumber != None:
+            if Options.ThreadNumber < 1:
+                EdkLogger.error("GenFds", OPTION_VALUE_INVALID, "Invalid thread number: %d" % Options.ThreadNumber)
+            GenFdsGlobalVariable.ThreadNumber = Options.ThreadNumber
             
         if Options.quiet != None:
             EdkLogger.SetLevel(EdkLogger.QUIET)
@@ -198,6 +209,24 @@ def main():
         GlobalData.gDatabasePath = os.path.normpath(os.path.join(ConfDirectoryPath, GlobalData.gDatabasePath))
         BuildWorkSpace = WorkspaceDatabase(GlobalData.gDatabasePath)
         BuildWorkSpace.InitDatabase()
+
+        if Options.SectionCacheDir:
+            if Options.SectionCacheSize <= 0:
+                EdkLogger.error("GenFds", OPTION_VALUE_INVALID, "Invalid section cache size: %d" % Options.SectionCacheSize)
+            GenFdsGlobalVariable.SectionCache = SectionCache(Options.SectionCacheDir, Options.SectionCacheSize * 1024 * 1024)
+
+        if Options.HashCheck:
+            GenFdsGlobalVariable.HashCheck = True
+            GenFdsGlobalVariable.LoadManifest(os.path.join(os.path.dirname(GlobalData.gDatabasePath), gManifestFileName))
+
+        if Options.ExternalTools:
+            GenFdsGlobalVariable.NativeTools = False
+
+        if Options.ProfileFile:
+            GenFdsGlobalVariable.Profile = ToolProfile()
+
+        if Options.CommandGraphFile:
+            GenFdsGlobalVariable.CommandGraph = CommandGraph.CommandGraph()
         
         #
         # Get files real name in workspace dir
@@ -302,6 +331,22 @@ def main():
         ReturnCode = CODE_ERROR
     finally:
         ClearDuplicatedInf()
+        # outputs generated before any failure are still valid
+        GenFdsGlobalVariable.SaveManifest()
+        if GenFdsGlobalVariable.SectionCache != None:
+            EdkLogger.verbose("Section cache: %d hit, %d miss" % (GenFdsGlobalVariable.SectionCache.HitCount,
+                                                                 GenFdsGlobalVariable.SectionCache.MissCount))
+            GenFdsGlobalVariable.SectionCache.Trim()
+        if GenFdsGlobalVariable.Profile != None:
+            if GenFdsGlobalVariable.SectionCache != None:
+                GenFdsGlobalVariable.Profile.SectionCacheHit = GenFdsGlobalVariable.SectionCache.HitCount
+                GenFdsGlobalVariable.Profile.SectionCacheMiss = GenFdsGlobalVariable.SectionCache.MissCount
+            EdkLogger.verbose(GenFdsGlobalVariable.Profile.Save(Options.ProfileFile, GenFdsGlobalVariable.FfsDir))
+            EdkLogger.quiet("Tool profile is saved in %s.json and %s.txt" % (Options.ProfileFile, Options.ProfileFile))
+    # the graph of a failed run misses the commands of images not generated
+    if GenFdsGlobalVariable.CommandGraph != None and ReturnCode == 0:
+        GenFdsGlobalVariable.CommandGraph.Save(Options.CommandGraphFile, Options.CommandGraphFormat)
+        EdkLogger.quiet("Command graph is saved in %s" % Options.CommandGraphFile)
     return ReturnCode
 
 gParamCheck = []
@@ -343,7 +388,15 @@ def myOptionParser():
     Parser.add_option("-D", "--define", action="append", type="string", dest="Macros", help="Macro: \"Name [= Value]\".")
     Parser.add_option("-s", "--specifyaddress", dest="FixedAddress", action="store_true", type=None, help="Specify driver load address.")
     Parser.add_option("--conf", action="store", type="string", dest="ConfDirectory", help="Specify the customized Conf directory.")
+    Parser.add_option("-n", "--jobs", action="store", type="int", dest="ThreadNumber", help="Generate independent images and the FFS files of an FV in at most the specified number of threads. Default is 1, generating them one by one.")
     Parser.add_option("--ignore-sources", action="store_true", dest="IgnoreSources", default=False, help="Focus to a binary build and ignore all source files")
+    Parser.add_option("--section-cache", action="store", type="string", dest="SectionCacheDir", help="Keep the outputs of compression and GUIDed section tools in the specified directory, and reuse them for the same tool, options and input. The directory can be shared by different workspaces.")
+    Parser.add_option("--section-cache-size", action="store", type="int", dest="SectionCacheSize", default=1024, help="The max size of section cache in MB, the least recently used outputs are removed once it's exceeded. Default is 1024.")
+    Parser.add_option("--hash", action="store_true", dest="HashCheck", default=False, help="Regenerate an output only if its command line or the content of its input files is changed since last run, instead of comparing time stamps.")
+    Parser.add_option("--external-tools", action="store_true", dest="ExternalTools", default=False, help="Generate all sections and FFS files by GenSec and GenFfs, instead of generating the common ones in GenFds.")
+    Parser.add_option("--profile", action="store", type="string", dest="ProfileFile", help="Record every tool invocation with its output, inputs, duration and whether it's skipped, and save them with the time per tool, FV and module in the specified file with .json and .txt extensions.")
+    Parser.add_option("--command-graph", action="store", type="string", dest="CommandGraphFile", help="Save the command and input files of every section, FFS file, FV image and option ROM in the specified file, so that the images can be regenerated by ninja or make with dependency tracking.")
+    Parser.add_option("--command-graph-format", action="store", type="choice", choices=CommandGraph.FormatList, dest="CommandGraphFormat", default=CommandGraph.FORMAT_NINJA, help="The format of command graph file, ninja or make. Default is ninja.")
 
     (Options, args) = Parser.parse_args()
     return Options
@@ -385,12 +438,15 @@ class GenFds :
             if FdObj != None:
                 FdObj.GenFd()
                 return
-        elif GenFds.OnlyGenerateThisFd == None and GenFds.OnlyGenerateThisFv == None:
+        #
+        # The images are put in the list in the order they were generated one
+        # by one, which is still the order if there's only one thread.
+        #
+        ImageList = []
+        if GenFds.OnlyGenerateThisFd == None and GenFds.OnlyGenerateThisFv == None:
             for FdName in GenFdsGlobalVariable.FdfParser.Profile.FdDict.keys():
-                FdObj = GenFdsGlobalVariable.FdfParser.Profile.FdDict[FdName]
-                FdObj.GenFd()
+                ImageList.append(('fd', FdName))
 
-        GenFdsGlobalVariable.VerboseLogger("\n Generate other FV images! ")
         if GenFds.OnlyGenerateThisFv != None and GenFds.OnlyGenerateThisFv.upper() in GenFdsGlobalVariable.FdfParser.Profile.FvDict.keys():
             FvObj = GenFdsGlobalVariable.FdfParser.Profile.FvDict.get(GenFds.OnlyGenerateThisFv.upper())
             if FvObj != None:
@@ -400,23 +456,118 @@ class GenFds :
                 return
         elif GenFds.OnlyGenerateThisFv == None:
             for FvName in GenFdsGlobalVariable.FdfParser.Profile.FvDict.keys():
-                Buffer = StringIO.StringIO('')
-                FvObj = GenFdsGlobalVariable.FdfParser.Profile.FvDict[FvName]
-                FvObj.AddToBuffer(Buffer)
-                Buffer.close()
+                ImageList.append(('fv', FvName))
         
         if GenFds.OnlyGenerateThisFv == None and GenFds.OnlyGenerateThisFd == None and GenFds.OnlyGenerateThisCap == None:
-            if GenFdsGlobalVariable.FdfParser.Profile.CapsuleDict != {}:
-                GenFdsGlobalVariable.VerboseLogger("\n Generate other Capsule images!")
-                for CapsuleName in GenFdsGlobalVariable.FdfParser.Profile.CapsuleDict.keys():
-                    CapsuleObj = GenFdsGlobalVariable.FdfParser.Profile.CapsuleDict[CapsuleName]
-                    CapsuleObj.GenCapsule()
-
-            if GenFdsGlobalVariable.FdfParser.Profile.OptRomDict != {}:
-                GenFdsGlobalVariable.VerboseLogger("\n Generate all Option ROM!")
-                for DriverName in GenFdsGlobalVariable.FdfParser.Profile.OptRomDict.keys():
-                    OptRomObj = GenFdsGlobalVariable.FdfParser.Profile.OptRomDict[DriverName]
-                    OptRomObj.AddToBuffer(None)
+            for CapsuleName in GenFdsGlobalVariable.FdfParser.Profile.CapsuleDict.keys():
+                ImageList.append(('cap', CapsuleName))
+            for DriverName in GenFdsGlobalVariable.FdfParser.Profile.OptRomDict.keys():
+                ImageList.append(('rom', DriverName))
+
+        GenFdsGlobalVariable.VerboseLogger("\n Generate %d FD, FV, Capsule and Option ROM images! " % len(ImageList))
+        GenFds.GenImageList(ImageList)
+
+    ## GenImageList()
+    #
+    #   Generate the images, in parallel if more than one thread is allowed.
+    #
+    #   An image depends on all images before it in the list which may generate
+    #   any same image or FFS file, directly or through FD regions, capsule
+    #   data, FILE statements and FV image sections. So every image or FFS file
+    #   is still generated by the same image as in sequential generation, and
+    #   the later ones reuse it through ImageBinDict.
+    #
+    #   @param  ImageList       The list of (type, name) of images, type is one
+    #                           of 'fd', 'fv', 'cap' and 'rom'
+    #
+    def GenImageList(ImageList):
+        CallList = []
+        DependencyList = []
+        ReferenceList = []
+        for Type, Name in ImageList:
+            ReferenceSet = GenFds.GetImageReferences(Type, Name)
+            DependencyList.append([Index for Index in range(len(ReferenceList)) if ReferenceList[Index] & ReferenceSet])
+            ReferenceList.append(ReferenceSet)
+            CallList.append(GenFds.GetImageCall(Type, Name))
+        GenFdsGlobalVariable.CallInThreads(CallList, DependencyList)
+
+    ## GetImageCall()
+    #
+    #   @param  Type            The type of image, 'fd', 'fv', 'cap' or 'rom'
+    #   @param  Name            The name of image in FDF
+    #   @retval function        The function generating the image
+    #
+    def GetImageCall(Type, Name):
+        Profile = GenFdsGlobalVariable.FdfParser.Profile
+        if Type == 'fd':
+            return Profile.FdDict[Name].GenFd
+        if Type == 'cap':
+            return Profile.CapsuleDict[Name].GenCapsule
+        if Type == 'rom':
+            return lambda: Profile.OptRomDict[Name].AddToBuffer(None)
+        return lambda: Profile.FvDict[Name].AddToBuffer(None)
+
+    ## GetImageReferences()
+    #
+    #   Get the images and FFS files which may be generated when generating an
+    #   image, including the image itself.
+    #
+    #   @param  Type            The type of image, 'fd', 'fv', 'cap' or 'rom'
+    #   @param  Name            The name of image in FDF
+    #   @param  ReferenceSet    The set to add the references to
+    #   @retval set             The set of (type, name) of images and FFS files
+    #
+    def GetImageReferences(Type, Name, ReferenceSet=None):
+        if ReferenceSet == None:
+            ReferenceSet = set()
+        Key = (Type, Name.upper())
+        if Key in ReferenceSet:
+            return ReferenceSet
+        ReferenceSet.add(Key)
+
+        Profile = GenFdsGlobalVariable.FdfParser.Profile
+        if Type == 'fd' and Key[1] in Profile.FdDict:
+            for RegionObj in Profile.FdDict[Key[1]].RegionList:
+                for RegionData in RegionObj.RegionDataList:
+                    if RegionObj.RegionType == 'FV' and RegionData.upper() in Profile.FvDict:
+                        GenFds.GetImageReferences('fv', RegionData, ReferenceSet)
+                    elif RegionObj.RegionType == 'CAPSULE' and RegionData.upper() in Profile.CapsuleDict:
+                        GenFds.GetImageReferences('cap', RegionData, ReferenceSet)
+        elif Type == 'fv' and Key[1] in Profile.FvDict:
+            for FfsFile in Profile.FvDict[Key[1]].FfsList:
+                GenFds.GetFfsReferences(FfsFile, ReferenceSet)
+        elif Type == 'cap' and Key[1] in Profile.CapsuleDict:
+            for CapsuleDataObj in Profile.CapsuleDict[Key[1]].CapsuleDataList:
+                if getattr(CapsuleDataObj, 'FvName', None) and CapsuleDataObj.FvName.upper() in Profile.FvDict:
+                    GenFds.GetImageReferences('fv', CapsuleDataObj.FvName, ReferenceSet)
+                if getattr(CapsuleDataObj, 'FdName', None) and CapsuleDataObj.FdName.upper() in Profile.FdDict:
+                    GenFds.GetImageReferences('fd', CapsuleDataObj.FdName, ReferenceSet)
+                if CapsuleDataObj.Ffs != None:
+                    GenFds.GetFfsReferences(CapsuleDataObj.Ffs, ReferenceSet)
+        elif Type == 'rom' and Key[1] in Profile.OptRomDict:
+            for FfsFile in Profile.OptRomDict[Key[1]].FfsList:
+                GenFds.GetFfsReferences(FfsFile, ReferenceSet)
+        return ReferenceSet
+
+    ## GetFfsReferences()
+    #
+    #   Get the FFS file of an FFS statement, and the images it may generate.
+    #
+    #   @param  FfsObj          The FFS statement or section object
+    #   @param  ReferenceSet    The set to add the references to
+    #
+    def GetFfsReferences(FfsObj, ReferenceSet):
+        Profile = GenFdsGlobalVariable.FdfParser.Profile
+        if getattr(FfsObj, 'InfFileName', None):
+            ReferenceSet.add(('ffs', os.path.normpath(FfsObj.InfFileName).upper()))
+        elif getattr(FfsObj, 'NameGuid', None) and not hasattr(FfsObj, 'SectionType'):
+            ReferenceSet.add(('ffs', FfsObj.NameGuid.upper()))
+        if getattr(FfsObj, 'FvName', None) and FfsObj.FvName.upper() in Profile.FvDict:
+            GenFds.GetImageReferences('fv', FfsObj.FvName, ReferenceSet)
+        if getattr(FfsObj, 'FdName', None) and FfsObj.FdName.upper() in Profile.FdDict:
+            GenFds.GetImageReferences('fd', FfsObj.FdName, ReferenceSet)
+        for SectionObj in getattr(FfsObj, 'SectionList', []):
+            GenFds.GetFfsReferences(SectionObj, ReferenceSet)
 
     ## GetFvBlockSize()
     #
@@ -562,6 +713,10 @@ class GenFds :
 
     ##Define GenFd as static function
     GenFd = staticmethod(GenFd)
+    GenImageList = staticmethod(GenImageList)
+    GetImageCall = staticmethod(GetImageCall)
+    GetImageReferences = staticmethod(GetImageReferences)
+    GetFfsReferences = staticmethod(GetFfsReferences)
     GetFvBlockSize = staticmethod(GetFvBlockSize)
     DisplayFvSpaceInfo = staticmethod(DisplayFvSpaceInfo)
     PreprocessImage = staticmethod(PreprocessImage)
@@ -20,10 +20,18 @@ import sys
 import subprocess
 import struct
 import array
+import threading
+import hashlib
+import time
+import Queue
+import shlex
 
 from Common.BuildToolError import *
 from Common import EdkLogger
 from Common.Misc import SaveFileOnChange
+from Common.Misc import CreateDirectory
+from Common.Misc import DataDump
+from Common.Misc import DataRestore
 
 from Common.TargetTxtClassObject import TargetTxtClassObject
 from Common.ToolDefClassObject import ToolDefClassObject
@@ -31,6 +39,149 @@ from AutoGen.BuildEngine import BuildRule
 import Common.DataType as DataType
 from Common.Misc import PathClass
 from Common.LongFilePathSupport import OpenLongFilePath as open
+import SectionPacker
+import ToolProfile
+
+## Job of an external tool submitted to ToolExecutor
+#
+# The command line is run as an argument list without shell. An argument
+# quoted for shell, like the string of version section, is passed without
+# the quotes, and empty arguments are dropped as shell would do.
+#
+class ToolJob:
+    # {tool name : full path of tool}, for finding batch files on Windows
+    __ToolPathCache = {}
+
+    ## The constructor
+    #
+    #   @param  self        The object pointer
+    #   @param  Cmd         The command line in list
+    #
+    def __init__(self, Cmd):
+        self.Cmd = Cmd
+        self.Argv = ToolJob.GetArgv(Cmd)
+        if sys.platform == "win32" and self.Argv:
+            self.Argv[0] = ToolJob.__FindTool(self.Argv[0])
+        self.Out = ''
+        self.Error = ''
+        self.ReturnCode = None
+        # the exception raised if the tool cannot be started
+        self.Exception = None
+        # the time spent by tool, not including the time waiting in queue
+        self.Duration = 0.0
+        self.__DoneEvent = threading.Event()
+
+    ## Get the arguments the tool gets from the command line in list
+    @staticmethod
+    def GetArgv(Cmd):
+        Argv = []
+        for Arg in Cmd:
+            if len(Arg) >= 2 and Arg[0] == '"' and Arg[-1] == '"':
+                Arg = Arg[1:-1]
+            elif Arg == '':
+                continue
+            Argv.append(Arg)
+        return Argv
+
+    ## Get the full path of tool, because a batch file isn't found in PATH without shell
+    @staticmethod
+    def __FindTool(Tool):
+        if os.path.dirname(Tool) or os.path.splitext(Tool)[1]:
+            return Tool
+        if Tool not in ToolJob.__ToolPathCache:
+            ToolPath = Tool
+            ExtList = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(os.pathsep)
+            for Dir in [os.getcwd()] + os.environ.get("PATH", "").split(os.pathsep):
+                for Ext in ExtList:
+                    if os.path.isfile(os.path.join(Dir, Tool + Ext)):
+                        ToolPath = os.path.join(Dir, Tool + Ext)
+                        break
+                else:
+                    continue
+                break
+            ToolJob.__ToolPathCache[Tool] = ToolPath
+        return ToolJob.__ToolPathCache[Tool]
+
+    ## Run() method
+    #
+    #   Run the tool and keep its outputs, called by the thread of ToolExecutor
+    #
+    #   @param  self        The object pointer
+    #
+    def Run(self):
+        StartTime = time.time()
+        try:
+            try:
+                PopenObject = subprocess.Popen(self.Argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                (self.Out, self.Error) = PopenObject.communicate()
+                self.ReturnCode = PopenObject.wait()
+            except Exception, X:
+                self.Exception = X
+        finally:
+            self.Duration = time.time() - StartTime
+            self.__DoneEvent.set()
+
+    ## Wait() method
+    #
+    #   @param  self        The object pointer
+    #   @retval int         The return value of tool, None if it cannot be started
+    #
+    def Wait(self):
+        # wait with timeout so that Ctrl+C can still break the thread
+        while not self.__DoneEvent.isSet():
+            self.__DoneEvent.wait(1)
+        return self.ReturnCode
+
+## Run the external tools in a bounded number of threads
+#
+# The jobs are run in the order they are submitted, and at most JobNumber
+# tools run at the same time. The threads are started on demand and live
+# until GenFds exits.
+#
+class ToolExecutor:
+    ## The constructor
+    #
+    #   @param  self        The object pointer
+    #   @param  JobNumber   The max number of tools running at the same time
+    #
+    def __init__(self, JobNumber):
+        self.JobNumber = max(JobNumber, 1)
+        self.__Queue = Queue.Queue()
+        self.__Lock = threading.Lock()
+        self.__ThreadList = []
+        self.__IdleNumber = 0
+
+    def __Worker(self):
+        while True:
+            Job = self.__Queue.get()
+            Job.Run()
+            self.__Lock.acquire()
+            self.__IdleNumber += 1
+            self.__Lock.release()
+
+    ## Submit() method
+    #
+    #   Start a tool asynchronously
+    #
+    #   @param  self        The object pointer
+    #   @param  Cmd         The command line in list
+    #   @retval ToolJob     The job, whose Wait() returns when the tool exits
+    #
+    def Submit(self, Cmd):
+        Job = ToolJob(Cmd)
+        self.__Lock.acquire()
+        try:
+            if self.__IdleNumber > 0:
+                self.__IdleNumber -= 1
+            elif len(self.__ThreadList) < self.JobNumber:
+                WorkerThread = threading.Thread(target=self.__Worker, name="GenFdsTool-%d" % len(self.__ThreadList))
+                WorkerThread.setDaemon(True)
+                WorkerThread.start()
+                self.__ThreadList.append(WorkerThread)
+        finally:
+            self.__Lock.release()
+        self.__Queue.put(Job)
+        return Job
 
 ## Global variables
 #
@@ -82,6 +233,46 @@ class GenFdsGlobalVariable:
     LARGE_FILE_SIZE = 0x1000000
 
     SectionHeader = struct.Struct("3B 1B")
+
+    #
+    # The number of threads generating images (FD, FV, Capsule, Option ROM) and
+    # FFS files of an FV concurrently, 1 means they are generated one by one.
+    #
+    # Only one thread runs the python code of generation at any time, because
+    # the objects of FDF and workspace database are not thread safe. The lock
+    # is released while the thread is waiting for external tools, so that the
+    # tools called by different threads run in parallel.
+    #
+    ThreadNumber = 1
+    __WorkerLock = threading.Lock()
+    __WorkerData = threading.local()
+    # The ToolExecutor object running external tools, created on the first use
+    __Executor = None
+
+    #
+    # Whether NeedsUpdate() compares the digest of command line and input files
+    # with the one recorded when the output was generated last time, instead
+    # of comparing time stamps. The records are kept in a manifest file across
+    # GenFds runs.
+    #
+    HashCheck = False
+    __MANIFEST_VERSION_ = 1
+    __ManifestFile = None
+    # {output file : (digest of command and input, (mtime, size) of output)}
+    __Manifest = {}
+    # {input file : ((mtime, size), digest of content)}
+    __FileDigest = {}
+    # {output file : digest}, for outputs being generated in this run
+    __PendingDigest = {}
+
+    # The SectionCache object keeping outputs of compression and GUIDed tools, None for no cache
+    SectionCache = None
+    # Whether the common sections and FFS files are generated in process, instead of by GenSec and GenFfs
+    NativeTools = True
+    # The ToolProfile object recording the tool invocations, None for no profiling
+    Profile = None
+    # The CommandGraph object recording the command of every output, None for no recording
+    CommandGraph = None
     
     ## LoadBuildRule
     #
@@ -332,14 +523,36 @@ class GenFdsGlobalVariable:
 
     ## Check if the input files are newer than output files
     #
+    #   If HashCheck is on and the command is given, the digest of command and
+    #   content of input files is compared with the one in manifest instead.
+    #   The caller must call CommitUpdate() once the output is generated.
+    #
     #   @param  Output          Path of output file
     #   @param  Input           Path list of input files
+    #   @param  Command         The command line generating the output
+    #   @param  DigestInput     Path list of the files read and then rewritten
+    #                           by the command, like the address file of GenFv.
+    #                           Their content is checked in digest mode only,
+    #                           and they are not recorded as inputs, because
+    #                           they are always newer than the output.
     #
     #   @retval True            if Output doesn't exist, or any Input is newer
     #   @retval False           if all Input is older than Output
     #
     @staticmethod
-    def NeedsUpdate(Output, Input):
+    def NeedsUpdate(Output, Input, Command=None, DigestInput=[]):
+        Update = GenFdsGlobalVariable.__CheckUpdate(Output, Input, Command, DigestInput)
+        if GenFdsGlobalVariable.CommandGraph != None and Command != None:
+            GenFdsGlobalVariable.CommandGraph.Add(Output, Input, ToolJob.GetArgv(Command))
+        if GenFdsGlobalVariable.Profile != None:
+            GenFdsGlobalVariable.Profile.Begin(Output, Input, Command, Update)
+        return Update
+
+    @staticmethod
+    def __CheckUpdate(Output, Input, Command, DigestInput):
+        if GenFdsGlobalVariable.HashCheck and Command != None:
+            return GenFdsGlobalVariable.__NeedsUpdateByDigest(Output, list(Input or []) + list(DigestInput), Command)
+
         if not os.path.exists(Output):
             return True
         # always update "Output" if no "Input" given
@@ -360,6 +573,106 @@ class GenFdsGlobalVariable:
                 return True
         return False
 
+    ## Check if the command or the content of input files is changed
+    @staticmethod
+    def __NeedsUpdateByDigest(Output, Input, Command):
+        Digest = hashlib.md5('\0'.join(Command))
+        for F in Input:
+            FileDigest = GenFdsGlobalVariable.__GetFileDigest(F)
+            if FileDigest == None:
+                GenFdsGlobalVariable.__PendingDigest.pop(Output, None)
+                return True
+            Digest.update('\0%s\0%s' % (F, FileDigest))
+        Digest = Digest.hexdigest()
+
+        GenFdsGlobalVariable.__PendingDigest[Output] = Digest
+        Entry = GenFdsGlobalVariable.__Manifest.get(Output)
+        if Entry == None or Entry[0] != Digest:
+            return True
+        # the output must not be changed since it was recorded
+        return Entry[1] != GenFdsGlobalVariable.__GetFileStamp(Output)
+
+    @staticmethod
+    def __GetFileStamp(File):
+        try:
+            Stat = os.stat(File)
+        except OSError:
+            return None
+        return (Stat.st_mtime, Stat.st_size)
+
+    ## Get the digest of file content, which is reused if the file is not changed
+    @staticmethod
+    def __GetFileDigest(File):
+        Stamp = GenFdsGlobalVariable.__GetFileStamp(File)
+        if Stamp == None:
+            return None
+        Entry = GenFdsGlobalVariable.__FileDigest.get(File)
+        if Entry != None and Entry[0] == Stamp:
+            return Entry[1]
+        try:
+            Fd = open(File, 'rb')
+            try:
+                Digest = hashlib.md5(Fd.read()).hexdigest()
+            finally:
+                Fd.close()
+        except IOError:
+            return None
+        GenFdsGlobalVariable.__FileDigest[File] = (Stamp, Digest)
+        return Digest
+
+    ## Save an output generated in GenFds instead of external tool
+    #
+    #   The output is touched even if its content isn't changed, like the
+    #   tools do, so that it's newer than its inputs in the next time stamp check.
+    #
+    #   @param  Output          Path of output file
+    #   @param  Data            The content of output
+    #
+    @staticmethod
+    def SaveOutput(Output, Data):
+        if not SaveFileOnChange(Output, Data):
+            os.utime(Output, None)
+
+    ## Record the digest of an output generated successfully in manifest
+    #
+    #   @param  Output          Path of output file
+    #
+    @staticmethod
+    def CommitUpdate(Output):
+        if GenFdsGlobalVariable.Profile != None:
+            GenFdsGlobalVariable.Profile.End(Output)
+        Digest = GenFdsGlobalVariable.__PendingDigest.pop(Output, None)
+        if Digest == None:
+            return
+        Stamp = GenFdsGlobalVariable.__GetFileStamp(Output)
+        if Stamp != None:
+            GenFdsGlobalVariable.__Manifest[Output] = (Digest, Stamp)
+
+    ## Load the manifest of outputs generated by previous runs
+    #
+    #   @param  File            Path of manifest file, which is also used by SaveManifest()
+    #
+    @staticmethod
+    def LoadManifest(File):
+        GenFdsGlobalVariable.__ManifestFile = File
+        if not os.path.isfile(File):
+            return
+        Data = DataRestore(File)
+        if type(Data) != type(()) or len(Data) != 3 or Data[0] != GenFdsGlobalVariable.__MANIFEST_VERSION_:
+            return
+        GenFdsGlobalVariable.__Manifest = Data[1]
+        GenFdsGlobalVariable.__FileDigest = Data[2]
+
+    ## Save the manifest into the file given to LoadManifest()
+    @staticmethod
+    def SaveManifest():
+        File = GenFdsGlobalVariable.__ManifestFile
+        if File == None:
+            return
+        CreateDirectory(os.path.dirname(File))
+        DataDump((GenFdsGlobalVariable.__MANIFEST_VERSION_, GenFdsGlobalVariable.__Manifest,
+                  GenFdsGlobalVariable.__FileDigest), File)
+
     @staticmethod
     def GenerateSection(Output, Input, Type=None, CompressionType=None, Guid=None,
                         GuidHdrLen=None, GuidAttr=[], Ui=None, Ver=None, InputAlign=None, BuildNumber=None):
@@ -398,22 +711,139 @@ class GenFdsGlobalVariable:
             Cmd += ["-o", Output]
 
             SaveFileOnChange(CommandFile, ' '.join(Cmd), False)
-            if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+            if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
                 return
 
-            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+            SectionData = None
+            if GenFdsGlobalVariable.NativeTools and Guid == None:
+                SectionData = SectionPacker.GenerateSection(Input, Type, CompressionType, InputAlign, Ver, BuildNumber)
+            if SectionData != None:
+                GenFdsGlobalVariable.SaveOutput(Output, SectionData)
+            else:
+                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+            GenFdsGlobalVariable.CommitUpdate(Output)
         else:
             Cmd += ["-o", Output]
             Cmd += Input
 
             SaveFileOnChange(CommandFile, ' '.join(Cmd), False)
-            if GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+            if GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
                 GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                SectionData = None
+                if GenFdsGlobalVariable.NativeTools and Guid == None:
+                    SectionData = SectionPacker.GenerateSection(Input, Type, CompressionType, InputAlign)
+                if SectionData != None:
+                    GenFdsGlobalVariable.SaveOutput(Output, SectionData)
+                elif CompressionType not in [None, '']:
+                    GenFdsGlobalVariable.__CallCachedTool(Cmd, "Failed to generate section", Output, Input,
+                                                          Cmd[:Cmd.index("-o")])
+                else:
+                    GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                GenFdsGlobalVariable.CommitUpdate(Output)
 
+            LargeFileInFvFlags = GenFdsGlobalVariable.GetLargeFileInFvFlags()
             if (os.path.getsize(Output) >= GenFdsGlobalVariable.LARGE_FILE_SIZE and
-                GenFdsGlobalVariable.LargeFileInFvFlags):
-                GenFdsGlobalVariable.LargeFileInFvFlags[-1] = True 
+                LargeFileInFvFlags):
+                LargeFileInFvFlags[-1] = True 
+
+    ## GetLargeFileInFvFlags()
+    #
+    #   Get the stack of large file flags of current thread. The threads
+    #   started by CallInThreads() have their own stacks, which are merged into
+    #   the FV being generated by caller when the threads are done.
+    #
+    #   @retval list        The stack of large file flags
+    #
+    @staticmethod
+    def GetLargeFileInFvFlags():
+        return getattr(GenFdsGlobalVariable.__WorkerData, 'LargeFileInFvFlags', GenFdsGlobalVariable.LargeFileInFvFlags)
+
+    ## CallInThreads()
+    #
+    #   Call the functions in at most ThreadNumber threads. A function is not
+    #   called until all functions it depends on are done. The functions are
+    #   called one by one, in the order of CallList, if only one thread is
+    #   allowed.
+    #
+    #   The caller may itself be one of the threads, such as an FV generating
+    #   its FFS files in parallel inside a parallel FD generation. It gives up
+    #   the lock while waiting, and the number of external tools running at
+    #   the same time is still limited to ThreadNumber.
+    #
+    #   @param  CallList        The list of functions without parameter
+    #   @param  DependencyList  The list of indexes in CallList each function
+    #                           depends on, which must be smaller than the
+    #                           index of the function itself. None for no
+    #                           dependency at all
+    #   @retval list            The return values of functions, in the same order as CallList
+    #
+    @staticmethod
+    def CallInThreads(CallList, DependencyList=None):
+        ThreadNumber = min(GenFdsGlobalVariable.ThreadNumber, len(CallList))
+        if ThreadNumber <= 1:
+            return [Call() for Call in CallList]
+        if DependencyList == None:
+            DependencyList = [[]] * len(CallList)
+
+        ResultList = [None] * len(CallList)
+        PendingList = range(len(CallList))
+        DoneSet = set()
+        ErrorList = []
+        FlagList = []
+        Condition = threading.Condition(GenFdsGlobalVariable.__WorkerLock)
+
+        def Worker():
+            GenFdsGlobalVariable.__WorkerLock.acquire()
+            try:
+                GenFdsGlobalVariable.__WorkerData.InWorker = True
+                GenFdsGlobalVariable.__WorkerData.LargeFileInFvFlags = [False]
+                # stop taking new jobs once any job fails
+                while PendingList and not ErrorList:
+                    for Index in PendingList:
+                        if DoneSet.issuperset(DependencyList[Index]):
+                            break
+                    else:
+                        # wait for the jobs running in other threads
+                        Condition.wait()
+                        continue
+                    PendingList.remove(Index)
+                    try:
+                        ResultList[Index] = CallList[Index]()
+                    except:
+                        ErrorList.append((Index, sys.exc_info()))
+                    DoneSet.add(Index)
+                    Condition.notifyAll()
+                FlagList.append(GenFdsGlobalVariable.__WorkerData.LargeFileInFvFlags[0])
+            finally:
+                GenFdsGlobalVariable.__WorkerLock.release()
+
+        CallerFlags = GenFdsGlobalVariable.GetLargeFileInFvFlags()
+        InWorker = getattr(GenFdsGlobalVariable.__WorkerData, 'InWorker', False)
+        if InWorker:
+            GenFdsGlobalVariable.__WorkerLock.release()
+        try:
+            ThreadList = []
+            for Index in range(ThreadNumber):
+                WorkerThread = threading.Thread(target=Worker, name="GenFds-%d" % Index)
+                WorkerThread.setDaemon(True)
+                WorkerThread.start()
+                ThreadList.append(WorkerThread)
+            # join with timeout so that Ctrl+C can still break the main thread
+            for WorkerThread in ThreadList:
+                while WorkerThread.isAlive():
+                    WorkerThread.join(1)
+        finally:
+            if InWorker:
+                GenFdsGlobalVariable.__WorkerLock.acquire()
+
+        if True in FlagList and CallerFlags:
+            CallerFlags[-1] = True
+        if ErrorList:
+            # report the error of the first failed job in the list
+            ErrorList.sort(key=lambda Error: Error[0])
+            ErrorType, ErrorValue, ErrorTraceback = ErrorList[0][1]
+            raise ErrorType, ErrorValue, ErrorTraceback
+        return ResultList
 
     @staticmethod
     def GetAlignment (AlignString):
@@ -443,19 +873,22 @@ class GenFdsGlobalVariable:
 
         CommandFile = Output + '.txt'
         SaveFileOnChange(CommandFile, ' '.join(Cmd), False)
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
             return
         GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
 
-        GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FFS")
+        FfsData = None
+        if GenFdsGlobalVariable.NativeTools:
+            FfsData = SectionPacker.GenerateFfs(Input, Type, Guid, Fixed, CheckSum, Align, SectionAlign)
+        if FfsData != None:
+            GenFdsGlobalVariable.SaveOutput(Output, FfsData)
+        else:
+            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FFS")
+        GenFdsGlobalVariable.CommitUpdate(Output)
 
     @staticmethod
     def GenerateFirmwareVolume(Output, Input, BaseAddress=None, ForceRebase=None, Capsule=False, Dump=False,
                                AddressFile=None, MapFile=None, FfsList=[], FileSystemGuid=None):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input+FfsList):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = ["GenFv"]
         if BaseAddress not in [None, '']:
             Cmd += ["-r", BaseAddress]
@@ -479,14 +912,19 @@ class GenFdsGlobalVariable:
         for I in Input:
             Cmd += ["-i", I]
 
+        # GenFv writes the addresses of child FV images back to the address file
+        DigestInput = []
+        if AddressFile not in [None, '']:
+            DigestInput = [AddressFile]
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input + FfsList, Cmd, DigestInput):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FV")
+        GenFdsGlobalVariable.CommitUpdate(Output)
 
     @staticmethod
     def GenerateVtf(Output, Input, BaseAddress=None, FvSize=None):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = ["GenVtf"]
         if BaseAddress not in [None, ''] and FvSize not in [None, ''] \
             and len(BaseAddress) == len(FvSize):
@@ -496,16 +934,17 @@ class GenFdsGlobalVariable:
         for F in Input:
             Cmd += ["-f", F]
 
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate VTF")
+        GenFdsGlobalVariable.CommitUpdate(Output)
 
     @staticmethod
     def GenerateFirmwareImage(Output, Input, Type="efi", SubType=None, Zero=False,
                               Strip=False, Replace=False, TimeStamp=None, Join=False,
                               Align=None, Padding=None, Convert=False):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = ["GenFw"]
         if Type.lower() == "te":
             Cmd += ["-t"]
@@ -530,7 +969,12 @@ class GenFdsGlobalVariable:
         Cmd += ["-o", Output]
         Cmd += Input
 
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate firmware image")
+        GenFdsGlobalVariable.CommitUpdate(Output)
 
     @staticmethod
     def GenerateOptionRom(Output, EfiInput, BinaryInput, Compress=False, ClassCode=None,
@@ -554,11 +998,6 @@ class GenFdsGlobalVariable:
                 Cmd += [BinFile]
                 InputList.append (BinFile)
 
-        # Check List
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, InputList):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, InputList))
-                        
         if ClassCode != None:
             Cmd += ["-l", ClassCode]
         if Revision != None:
@@ -569,20 +1008,77 @@ class GenFdsGlobalVariable:
             Cmd += ["-f", VendorId]
 
         Cmd += ["-o", Output]    
+
+        # Check List
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, InputList, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, InputList))
+
         GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate option rom")
+        GenFdsGlobalVariable.CommitUpdate(Output)
 
+    ## Call the tool of GUIDed section
+    #
+    #   The options are split as shell does, so that a quoted option with
+    #   spaces is kept as one argument.
+    #
     @staticmethod
     def GuidTool(Output, Input, ToolPath, Options='', returnValue=[]):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
+        OptionList = shlex.split(Options, posix=(sys.platform != "win32"))
         Cmd = [ToolPath, ]
-        Cmd += Options.split(' ')
+        Cmd += OptionList
         Cmd += ["-o", Output]
         Cmd += Input
 
-        GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to call " + ToolPath, returnValue)
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
+        GenFdsGlobalVariable.__CallCachedTool(Cmd, "Failed to call " + ToolPath, Output, Input,
+                                              [ToolPath] + OptionList, returnValue)
+        if returnValue == [] or returnValue[0] == 0:
+            GenFdsGlobalVariable.CommitUpdate(Output)
+
+    ## Call external tool, unless the same input was processed by the same tool before
+    #
+    #   @param  Cmd             The command line
+    #   @param  ErrorMess       The error message if the tool fails
+    #   @param  Output          The output file of the tool
+    #   @param  Input           The list of input files of the tool
+    #   @param  ToolKey         The tool followed by its options, without any
+    #                           path of input or output file
+    #   @param  returnValue     See CallExternalTool()
+    #
+    @staticmethod
+    def __CallCachedTool(Cmd, ErrorMess, Output, Input, ToolKey, returnValue=[]):
+        Cache = GenFdsGlobalVariable.SectionCache
+        Key = None
+        if Cache != None:
+            Key = Cache.GetKey(ToolKey, Input)
+            if Key != None and Cache.Restore(Key, Output):
+                if GenFdsGlobalVariable.Profile != None:
+                    GenFdsGlobalVariable.Profile.SetStatus(Output, ToolProfile.STATUS_CACHE)
+                if returnValue != []:
+                    returnValue[0] = 0
+                return
+        GenFdsGlobalVariable.CallExternalTool(Cmd, ErrorMess, returnValue)
+        if Key != None and (returnValue == [] or returnValue[0] == 0) and os.path.exists(Output):
+            Cache.Store(Key, Output)
+
+    ## Start an external tool without waiting for it
+    #
+    #   At most ThreadNumber tools run at the same time, the others wait in
+    #   queue. The caller holding the lock of generation threads should give
+    #   it up while waiting for the job.
+    #
+    #   @param  Cmd             The command line in list
+    #   @retval ToolJob         The job of tool
+    #
+    @staticmethod
+    def SubmitTool(Cmd):
+        if GenFdsGlobalVariable.__Executor == None:
+            GenFdsGlobalVariable.__Executor = ToolExecutor(GenFdsGlobalVariable.ThreadNumber)
+        return GenFdsGlobalVariable.__Executor.Submit(Cmd)
 
     def CallExternalTool (cmd, errorMess, returnValue=[]):
 
@@ -603,23 +1099,29 @@ class GenFdsGlobalVariable:
             if GenFdsGlobalVariable.SharpCounter % GenFdsGlobalVariable.SharpNumberPerLine == 0:
                 sys.stdout.write('\n')
 
+        Job = GenFdsGlobalVariable.SubmitTool(cmd)
+        # let other generation threads run while waiting for the tool
+        InWorker = getattr(GenFdsGlobalVariable.__WorkerData, 'InWorker', False)
+        if InWorker:
+            GenFdsGlobalVariable.__WorkerLock.release()
         try:
-            PopenObject = subprocess.Popen(' '.join(cmd), stdout=subprocess.PIPE, stderr= subprocess.PIPE, shell=True)
-        except Exception, X:
-            EdkLogger.error("GenFds", COMMAND_FAILURE, ExtraData="%s: %s" % (str(X), cmd[0]))
-        (out, error) = PopenObject.communicate()
-
-        while PopenObject.returncode == None :
-            PopenObject.wait()
+            Job.Wait()
+        finally:
+            if InWorker:
+                GenFdsGlobalVariable.__WorkerLock.acquire()
+        if Job.Exception != None:
+            EdkLogger.error("GenFds", COMMAND_FAILURE, ExtraData="%s: %s" % (str(Job.Exception), cmd[0]))
+        if GenFdsGlobalVariable.Profile != None:
+            GenFdsGlobalVariable.Profile.AddToolTime(cmd, Job.Duration)
         if returnValue != [] and returnValue[0] != 0:
             #get command return value
-            returnValue[0] = PopenObject.returncode
+            returnValue[0] = Job.ReturnCode
             return
-        if PopenObject.returncode != 0 or GenFdsGlobalVariable.VerboseMode or GenFdsGlobalVariable.DebugLevel != -1:
-            GenFdsGlobalVariable.InfLogger ("Return Value = %d" %PopenObject.returncode)
-            GenFdsGlobalVariable.InfLogger (out)
-            GenFdsGlobalVariable.InfLogger (error)
-            if PopenObject.returncode != 0:
+        if Job.ReturnCode != 0 or GenFdsGlobalVariable.VerboseMode or GenFdsGlobalVariable.DebugLevel != -1:
+            GenFdsGlobalVariable.InfLogger ("Return Value = %d" %Job.ReturnCode)
+            GenFdsGlobalVariable.InfLogger (Job.Out)
+            GenFdsGlobalVariable.InfLogger (Job.Error)
+            if Job.ReturnCode != 0:
                 print "###", cmd
                 EdkLogger.error("GenFds", COMMAND_FAILURE, errorMess)
 
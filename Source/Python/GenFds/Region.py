@@ -17,7 +17,6 @@
 #
 from struct import *
 from GenFdsGlobalVariable import GenFdsGlobalVariable
-import StringIO
 from CommonDataClass.FdfClass import RegionClassObject
 import Common.LongFilePathOs as os
 from stat import *
@@ -29,6 +28,8 @@ from Common.LongFilePathSupport import OpenLongFilePath as open
 #
 #
 class Region(RegionClassObject):
+    # size of data copied or filled at a time
+    BLOCK_SIZE = 0x100000
 
     ## The constructor
     #
@@ -99,22 +100,20 @@ class Region(RegionClassObject):
                         if self.FvAddress % FvAlignValue != 0:
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "FV (%s) is NOT %s Aligned!" % (FvObj.UiFvName, FvObj.FvAlignment))
-                        FvBuffer = StringIO.StringIO('')
                         FvBaseAddress = '0x%X' %self.FvAddress
                         BlockSize = None
                         BlockNum = None
-                        FvObj.AddToBuffer(FvBuffer, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, vtfDict)
-                        if FvBuffer.len > Size:
-                            FvBuffer.close()
+                        FileName = FvObj.AddToBuffer(None, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, vtfDict)
+                        FileLength = os.stat(FileName)[ST_SIZE]
+                        if FileLength > Size:
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "Size of FV (%s) is larger than Region Size 0x%X specified." % (RegionData, Size))
                         #
                         # Put the generated image into FD buffer.
                         #
-                        Buffer.write(FvBuffer.getvalue())
-                        FvBuffer.close()
-                        FvOffset = FvOffset + FvBuffer.len
-                        Size = Size - FvBuffer.len
+                        self.CopyFileToBuffer(Buffer, FileName)
+                        FvOffset = FvOffset + FileLength
+                        Size = Size - FileLength
                         continue
                     else:
                         EdkLogger.error("GenFds", GENFDS_ERROR, "FV (%s) is NOT described in FDF file!" % (RegionData))
@@ -127,20 +126,13 @@ class Region(RegionClassObject):
                         EdkLogger.error("GenFds", GENFDS_ERROR,
                                         "Size of FV File (%s) is larger than Region Size 0x%X specified." \
                                         % (RegionData, Size))
-                    BinFile = open (FileName, 'r+b')
-                    Buffer.write(BinFile.read())
-                    BinFile.close()
+                    self.CopyFileToBuffer(Buffer, FileName)
                     Size = Size - FileLength
             #
             # Pad the left buffer
             #
             if Size > 0:
-                if (ErasePolarity == '1') :
-                    PadData = 0xFF
-                else :
-                    PadData = 0
-                for i in range(0, Size):
-                    Buffer.write(pack('B', PadData))
+                self.PadBuffer(Buffer, Size, ErasePolarity)
 
         if self.RegionType == 'CAPSULE':
             #
@@ -186,20 +178,13 @@ class Region(RegionClassObject):
                     EdkLogger.error("GenFds", GENFDS_ERROR,
                                     "Size 0x%X of Capsule File (%s) is larger than Region Size 0x%X specified." \
                                     % (FileLength, RegionData, Size))
-                BinFile = open (FileName, 'r+b')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                self.CopyFileToBuffer(Buffer, FileName)
                 Size = Size - FileLength
             #
             # Pad the left buffer
             #
             if Size > 0:
-                if (ErasePolarity == '1') :
-                    PadData = 0xFF
-                else :
-                    PadData = 0
-                for i in range(0, Size):
-                    Buffer.write(pack('B', PadData))
+                self.PadBuffer(Buffer, Size, ErasePolarity)
 
         if self.RegionType == 'FILE':
             for RegionData in self.RegionDataList:
@@ -217,20 +202,13 @@ class Region(RegionClassObject):
                                     "Size of File (%s) is larger than Region Size 0x%X specified." \
                                     % (RegionData, Size))
                 GenFdsGlobalVariable.InfLogger('   Region File Name = %s'%RegionData)
-                BinFile = open (RegionData, 'rb')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                self.CopyFileToBuffer(Buffer, RegionData)
                 Size = Size - FileLength
             #
             # Pad the left buffer
             #
             if Size > 0:
-                if (ErasePolarity == '1') :
-                    PadData = 0xFF
-                else :
-                    PadData = 0
-                for i in range(0, Size):
-                    Buffer.write(pack('B', PadData))
+                self.PadBuffer(Buffer, Size, ErasePolarity)
 
         if self.RegionType == 'DATA' :
             GenFdsGlobalVariable.InfLogger('   Region Name = DATA')
@@ -248,21 +226,48 @@ class Region(RegionClassObject):
             # Pad the left buffer
             #
             if Size > 0:
-                if (ErasePolarity == '1') :
-                    PadData = 0xFF
-                else :
-                    PadData = 0
-                for i in range(0, Size):
-                    Buffer.write(pack('B', PadData))
+                self.PadBuffer(Buffer, Size, ErasePolarity)
 
         if self.RegionType == None:
             GenFdsGlobalVariable.InfLogger('   Region Name = None')
-            if (ErasePolarity == '1') :
-                PadData = 0xFF
-            else :
-                PadData = 0
-            for i in range(0, Size):
-                Buffer.write(pack('B', PadData))
+            self.PadBuffer(Buffer, Size, ErasePolarity)
+
+    ## CopyFileToBuffer()
+    #
+    #   Write the content of a file to the buffer, a block at a time
+    #
+    #   @param  Buffer      The buffer the file content will be put
+    #   @param  FileName    The file path
+    #
+    def CopyFileToBuffer(self, Buffer, FileName):
+        BinFile = open (FileName, 'rb')
+        try:
+            while True:
+                Data = BinFile.read(self.BLOCK_SIZE)
+                if not Data:
+                    break
+                Buffer.write(Data)
+        finally:
+            BinFile.close()
+
+    ## PadBuffer()
+    #
+    #   Fill the buffer with the erase value of flash
+    #
+    #   @param  Buffer      The buffer the padding data will be put
+    #   @param  Size        The size of padding data
+    #   @param  ErasePolarity      Flash erase polarity
+    #
+    def PadBuffer(self, Buffer, Size, ErasePolarity):
+        if (ErasePolarity == '1') :
+            PadData = '\xFF'
+        else :
+            PadData = '\0'
+        PadBlock = PadData * min(Size, self.BLOCK_SIZE)
+        while Size > len(PadBlock):
+            Buffer.write(PadBlock)
+            Size -= len(PadBlock)
+        Buffer.write(PadBlock[:Size])
 
     def GetFvAlignValue(self, Str):
         AlignValue = 1
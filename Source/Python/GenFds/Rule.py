@@ -15,7 +15,9 @@
 ##
 # Import Modules
 #
+import copy
 from CommonDataClass.FdfClass import RuleClassObject
+from CommonDataClass.FdfClass import SectionClassObject
 
 ## Rule base class
 #
@@ -27,3 +29,26 @@ class Rule(RuleClassObject):
     #
     def __init__(self):
         RuleClassObject.__init__(self)
+
+## CopyRule() method
+#
+#   Get a copy of rule for one FFS statement. Generating sections changes the
+#   section objects, like expanding the macros of module and merging the
+#   alignments, so the FFS files generated concurrently get their own copies
+#   of the sections instead of overwriting each other's values in the rule.
+#
+#   @param  RuleObj     The rule object in FDF
+#   @retval object      The copy of rule, with copies of its sections
+#
+def CopyRule(RuleObj):
+    NewObj = copy.copy(RuleObj)
+    for Name, Value in vars(NewObj).items():
+        if type(Value) != type([]):
+            continue
+        NewList = []
+        for Item in Value:
+            if isinstance(Item, SectionClassObject):
+                Item = CopyRule(Item)
+            NewList.append(Item)
+        setattr(NewObj, Name, NewList)
+    return NewObj
@@ -0,0 +1,247 @@
+## @file
+# Content addressed cache of section data generated by external tools
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import Common.LongFilePathOs as os
+import sys
+import hashlib
+import uuid
+from Common import EdkLogger
+from Common.Misc import CreateDirectory
+from Common.LongFilePathSupport import CopyLongFilePath
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## Cache of the outputs of compression and GUIDed section tools
+#
+# The output of a tool is stored under the tool name, the digest of the
+# executable file of tool, its options and the content of its input files, so that the cache directory
+# can be shared by different workspaces, tool versions and several GenFds
+# running at the same time. Entries are written to a temporary file and renamed, and the
+# least recently used entries are removed once the cache grows over its size.
+#
+class SectionCache:
+    ## The constructor
+    #
+    #   @param  self        The object pointer
+    #   @param  Directory   The cache directory
+    #   @param  MaxSize     The max size of cache in bytes
+    #
+    def __init__(self, Directory, MaxSize):
+        self.Directory = os.path.normpath(Directory)
+        self.MaxSize = MaxSize
+        self.HitCount = 0
+        self.MissCount = 0
+        # {tool : full path of the executable file of tool}
+        self.ToolPathDict = {}
+        # {(full path, size, modification time) : digest of executable file}
+        self.ToolDigestDict = {}
+        CreateDirectory(self.Directory)
+
+    ## Get the full path of a tool, searched in PATH if no directory is given
+    def __GetToolPath(self, Tool):
+        if Tool in self.ToolPathDict:
+            return self.ToolPathDict[Tool]
+        ToolPath = None
+        ExtList = ['']
+        if sys.platform == "win32":
+            ExtList += os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(os.pathsep)
+        if os.path.dirname(Tool):
+            DirList = ['']
+        else:
+            DirList = os.environ.get("PATH", "").split(os.pathsep)
+        for Dir in DirList:
+            for Ext in ExtList:
+                FilePath = os.path.join(Dir, Tool + Ext)
+                if os.path.isfile(FilePath):
+                    ToolPath = os.path.normpath(os.path.abspath(FilePath))
+                    break
+            if ToolPath != None:
+                break
+        if ToolPath != None and self.__IsScript(ToolPath):
+            ToolPath = self.__GetWrappedToolPath(ToolPath)
+        self.ToolPathDict[Tool] = ToolPath
+        return ToolPath
+
+    ## Check if a tool file is a script, like the wrappers in BinWrappers
+    @staticmethod
+    def __IsScript(ToolPath):
+        if os.path.splitext(ToolPath)[1].lower() in ('.bat', '.cmd'):
+            return True
+        try:
+            Fd = open(ToolPath, 'rb')
+            try:
+                return Fd.read(2) == '#!'
+            finally:
+                Fd.close()
+        except IOError:
+            return False
+
+    ## Get the C tool binary run by a wrapper in BinWrappers/PosixLike
+    #
+    #   The wrappers of all C tools are the same file, so the binary is looked
+    #   up in the places the wrapper runs it from. None is returned for the
+    #   scripts running other tools or Python source, whose outputs are not
+    #   cached because their dependencies cannot be identified.
+    #
+    @staticmethod
+    def __GetWrappedToolPath(WrapperPath):
+        ToolName = os.path.basename(WrapperPath)
+        DirList = []
+        if os.environ.get("WORKSPACE"):
+            DirList.append(os.path.join(os.environ["WORKSPACE"], "Conf", "BaseToolsCBinaries"))
+            if os.environ.get("EDK_TOOLS_PATH"):
+                DirList.append(os.path.join(os.environ["EDK_TOOLS_PATH"], "Source", "C", "bin"))
+        DirList.append(os.path.join(os.path.dirname(WrapperPath), "..", "..", "Source", "C", "bin"))
+        for Dir in DirList:
+            FilePath = os.path.join(Dir, ToolName)
+            if os.path.isfile(FilePath):
+                if SectionCache.__IsScript(FilePath):
+                    return None
+                return os.path.normpath(os.path.abspath(FilePath))
+        return None
+
+    ## GetToolDigest() method
+    #
+    #   The tool is identified by the content of its executable file, so that
+    #   the same tool installed in different workspaces shares the cache
+    #   entries, and different versions of a tool don't.
+    #
+    #   @param  self        The object pointer
+    #   @param  Tool        The tool name or path
+    #   @retval string      The digest of the executable file of tool, None if
+    #                       the tool is not found
+    #
+    def GetToolDigest(self, Tool):
+        ToolPath = self.__GetToolPath(Tool)
+        if ToolPath == None:
+            return None
+        try:
+            Stat = os.stat(ToolPath)
+            ToolId = (ToolPath, Stat.st_size, Stat.st_mtime)
+            if ToolId not in self.ToolDigestDict:
+                Fd = open(ToolPath, 'rb')
+                try:
+                    self.ToolDigestDict[ToolId] = hashlib.md5(Fd.read()).hexdigest()
+                finally:
+                    Fd.close()
+        except (IOError, OSError):
+            return None
+        return self.ToolDigestDict[ToolId]
+
+    ## GetKey() method
+    #
+    #   @param  self        The object pointer
+    #   @param  ToolKey     The tool name or path, followed by its options
+    #   @param  Input       The list of input files
+    #   @retval string      The key of the output, None if the tool is not
+    #                       found or any input cannot be read
+    #
+    def GetKey(self, ToolKey, Input):
+        ToolDigest = self.GetToolDigest(ToolKey[0])
+        if ToolDigest == None:
+            return None
+        ToolName = os.path.splitext(os.path.basename(ToolKey[0]))[0]
+        Digest = hashlib.md5('\0'.join([ToolName, ToolDigest] + list(ToolKey[1:])))
+        for File in Input:
+            try:
+                Fd = open(File, 'rb')
+                try:
+                    Digest.update('\0' + hashlib.md5(Fd.read()).hexdigest())
+                finally:
+                    Fd.close()
+            except IOError:
+                return None
+        return Digest.hexdigest()
+
+    def __GetEntryPath(self, Key):
+        return os.path.join(self.Directory, Key[:2], Key)
+
+    ## Restore() method
+    #
+    #   Copy the cached output to the given file
+    #
+    #   @param  self        The object pointer
+    #   @param  Key         The key got by GetKey()
+    #   @param  Output      The output file path
+    #   @retval True        The output is restored from cache
+    #   @retval False       The output is not in cache
+    #
+    def Restore(self, Key, Output):
+        EntryPath = self.__GetEntryPath(Key)
+        try:
+            CopyLongFilePath(EntryPath, Output)
+            # mark it as recently used
+            os.utime(EntryPath, None)
+        except (IOError, OSError):
+            self.MissCount += 1
+            return False
+        self.HitCount += 1
+        EdkLogger.debug(EdkLogger.DEBUG_5, "%s is restored from section cache %s" % (Output, EntryPath))
+        return True
+
+    ## Store() method
+    #
+    #   Save the output of tool into cache
+    #
+    #   @param  self        The object pointer
+    #   @param  Key         The key got by GetKey()
+    #   @param  Output      The output file path
+    #
+    def Store(self, Key, Output):
+        EntryPath = self.__GetEntryPath(Key)
+        TempPath = EntryPath + '.' + uuid.uuid4().hex
+        try:
+            CreateDirectory(os.path.dirname(EntryPath))
+            CopyLongFilePath(Output, TempPath)
+            if os.path.exists(EntryPath):
+                os.remove(TempPath)
+            else:
+                os.rename(TempPath, EntryPath)
+        except (IOError, OSError):
+            # other GenFds may have stored the same entry at the same time
+            if os.path.exists(TempPath):
+                os.remove(TempPath)
+
+    ## Trim() method
+    #
+    #   Remove the least recently used entries until the cache fits its size
+    #
+    #   @param  self        The object pointer
+    #
+    def Trim(self):
+        EntryList = []
+        TotalSize = 0
+        for Root, Dirs, Files in os.walk(self.Directory):
+            for Name in Files:
+                # skip the temporary files being written
+                if '.' in Name:
+                    continue
+                EntryPath = os.path.join(Root, Name)
+                try:
+                    Stat = os.stat(EntryPath)
+                except OSError:
+                    continue
+                EntryList.append((Stat.st_mtime, Stat.st_size, EntryPath))
+                TotalSize += Stat.st_size
+        if TotalSize <= self.MaxSize:
+            return
+        EntryList.sort()
+        for MTime, Size, EntryPath in EntryList:
+            try:
+                os.remove(EntryPath)
+            except OSError:
+                continue
+            TotalSize -= Size
+            if TotalSize <= self.MaxSize:
+                break
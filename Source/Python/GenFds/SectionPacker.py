@@ -0,0 +1,368 @@
+## @file
+# Generate the common sections and FFS files in process
+#
+# The functions here produce the same output as GenSec and GenFfs for the
+# sections and FFS files generated for most of modules, so that GenFds needs
+# not start a process for each of them. None is returned for the cases they
+# don't handle, and the caller should call the tools for them instead.
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import re
+import struct
+import uuid
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## Sections and FFS files of this size or larger need the extended size in header
+MAX_SECTION_SIZE = 0x1000000
+MAX_FFS_SIZE = 0x1000000
+
+EFI_SECTION_COMPRESSION = 0x01
+EFI_SECTION_GUID_DEFINED = 0x02
+EFI_SECTION_PE32 = 0x10
+EFI_SECTION_TE = 0x12
+EFI_SECTION_VERSION = 0x14
+EFI_SECTION_FIRMWARE_VOLUME_IMAGE = 0x17
+EFI_SECTION_RAW = 0x19
+
+EFI_NOT_COMPRESSED = 0x00
+EFI_GUIDED_SECTION_PROCESSING_REQUIRED = 0x01
+EFI_TE_IMAGE_HEADER_SIGNATURE = 0x5A56
+EFI_TE_IMAGE_HEADER_SIZE = 40
+
+FFS_ATTRIB_LARGE_FILE = 0x01
+FFS_ATTRIB_FIXED = 0x04
+FFS_ATTRIB_CHECKSUM = 0x40
+FFS_FIXED_CHECKSUM = 0xAA
+EFI_FILE_HEADER_CONSTRUCTION = 0x01
+EFI_FILE_HEADER_VALID = 0x02
+EFI_FILE_DATA_VALID = 0x04
+
+## The leaf sections having nothing but the data after the common header
+LeafSectionType = {
+    'EFI_SECTION_PE32'                  : 0x10,
+    'EFI_SECTION_PIC'                   : 0x11,
+    'EFI_SECTION_TE'                    : 0x12,
+    'EFI_SECTION_DXE_DEPEX'             : 0x13,
+    'EFI_SECTION_COMPATIBILITY16'       : 0x16,
+    'EFI_SECTION_FIRMWARE_VOLUME_IMAGE' : 0x17,
+    'EFI_SECTION_FREEFORM_SUBTYPE_GUID' : 0x18,
+    'EFI_SECTION_RAW'                   : 0x19,
+    'EFI_SECTION_PEI_DEPEX'             : 0x1B,
+    'EFI_SECTION_SMM_DEPEX'             : 0x1C
+}
+
+FfsFileType = {
+    'EFI_FV_FILETYPE_RAW'                   : 0x01,
+    'EFI_FV_FILETYPE_FREEFORM'              : 0x02,
+    'EFI_FV_FILETYPE_SECURITY_CORE'         : 0x03,
+    'EFI_FV_FILETYPE_PEI_CORE'              : 0x04,
+    'EFI_FV_FILETYPE_DXE_CORE'              : 0x05,
+    'EFI_FV_FILETYPE_PEIM'                  : 0x06,
+    'EFI_FV_FILETYPE_DRIVER'                : 0x07,
+    'EFI_FV_FILETYPE_COMBINED_PEIM_DRIVER'  : 0x08,
+    'EFI_FV_FILETYPE_APPLICATION'           : 0x09,
+    'EFI_FV_FILETYPE_SMM'                   : 0x0A,
+    'EFI_FV_FILETYPE_FIRMWARE_VOLUME_IMAGE' : 0x0B,
+    'EFI_FV_FILETYPE_COMBINED_SMM_DXE'      : 0x0C,
+    'EFI_FV_FILETYPE_SMM_CORE'              : 0x0D
+}
+
+## The file types must have one and only one PE or TE section
+SinglePeFileTypes = (0x03, 0x04, 0x05)
+## The file types must have at least one PE or TE section
+PeFileTypes = (0x06, 0x07, 0x08, 0x09)
+
+SectionAlignName = ["1", "2", "4", "8", "16", "32", "64", "128", "256", "512",
+                    "1K", "2K", "4K", "8K", "16K", "32K", "64K"]
+FfsAlignName = ["8", "16", "128", "512", "1K", "4K", "32K", "64K"]
+FfsValidAlign = [0, 8, 16, 128, 512, 1024, 4096, 32768, 65536]
+
+gGuidPattern = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+## Version strings given as a plain word or in double quotes, whose value doesn't depend on shell
+gVersionPattern = re.compile(r'^(?:"([^"\\$`%!]*)"|([\w.,:/+=@-]*))$')
+
+## Read the content of a file, None if it cannot be read
+def _ReadFile(FileName):
+    try:
+        Fd = open(FileName, 'rb')
+        try:
+            return Fd.read()
+        finally:
+            Fd.close()
+    except IOError:
+        return None
+
+## Get the alignment value of an alignment string, None if it is invalid
+def _GetSectionAlignment(Align):
+    for Index in range(len(SectionAlignName)):
+        if Align.upper() == SectionAlignName[Index]:
+            return 1 << Index
+    return None
+
+## Pack the common section header
+#
+#   @param  Type        The section type
+#   @param  Size        The size of section including header, which must fit
+#                       in the header got
+#   @retval string      The common section header, or the extended one for
+#                       the size not fitting in 3 bytes
+#
+def _PackSectionHeader(Type, Size):
+    if Size >= MAX_SECTION_SIZE:
+        return struct.pack('<3sBI', '\xff\xff\xff', Type, Size)
+    return struct.pack('<HBB', Size & 0xffff, (Size >> 16) & 0xff, Type)
+
+## Compute the checksum making the sum of data zero
+def _CalculateChecksum8(Data):
+    return (0x100 - (sum(bytearray(Data)) & 0xff)) & 0xff
+
+## Concatenate the section files in the same way as GenSec and GenFfs
+#
+#   Each section starts at a 4-byte boundary, and a RAW section is inserted
+#   before the section whose data, or the PE image in TE section, doesn't meet
+#   its alignment.
+#
+#   @param  Input       The list of section files
+#   @param  AlignList   The list of alignment values of sections, or None
+#   @retval tuple       (data, max alignment, number of PE and TE sections),
+#                       or None if any file cannot be read
+#
+def _GetSectionContents(Input, AlignList):
+    DataList = []
+    Size = 0
+    MaxAlignment = 1
+    PeSectionNum = 0
+    for Index in range(len(Input)):
+        if Size & 0x03:
+            DataList.append('\0' * (4 - (Size & 0x03)))
+            Size += 4 - (Size & 0x03)
+
+        Data = _ReadFile(Input[Index])
+        if Data == None:
+            return None
+        FileSize = len(Data)
+
+        TeOffset = 0
+        if FileSize >= MAX_SECTION_SIZE:
+            HeaderSize = 8
+        else:
+            HeaderSize = 4
+        SectionType = None
+        if len(Data) >= HeaderSize:
+            SectionType = ord(Data[3])
+        if SectionType == EFI_SECTION_TE:
+            PeSectionNum += 1
+            if len(Data) >= HeaderSize + EFI_TE_IMAGE_HEADER_SIZE:
+                Signature, StrippedSize = struct.unpack_from('<H4xH', Data, HeaderSize)
+                if Signature == EFI_TE_IMAGE_HEADER_SIGNATURE:
+                    TeOffset = (StrippedSize - EFI_TE_IMAGE_HEADER_SIZE) & 0xffffffff
+        elif SectionType == EFI_SECTION_GUID_DEFINED:
+            PeSectionNum += 1
+            GuidHeaderSize = HeaderSize + 20
+            if len(Data) >= GuidHeaderSize:
+                DataOffset, Attributes = struct.unpack_from('<HH', Data, GuidHeaderSize - 4)
+                if (Attributes & EFI_GUIDED_SECTION_PROCESSING_REQUIRED) == 0:
+                    HeaderSize = DataOffset
+        elif SectionType in (EFI_SECTION_PE32, EFI_SECTION_COMPRESSION, EFI_SECTION_FIRMWARE_VOLUME_IMAGE):
+            # the encapsulation sections are assumed to contain PE or TE section
+            PeSectionNum += 1
+
+        if AlignList != None:
+            Align = AlignList[Index]
+            if Align > MaxAlignment:
+                MaxAlignment = Align
+            if TeOffset != 0:
+                TeOffset = (Align - (TeOffset % Align)) % Align
+            if (Size + HeaderSize + TeOffset) % Align != 0:
+                Offset = ((Size + 4 + HeaderSize + TeOffset + Align - 1) & ~(Align - 1)) & 0xffffffff
+                Offset = (Offset - Size - HeaderSize - TeOffset) & 0xffffffff
+                DataList.append(_PackSectionHeader(EFI_SECTION_RAW, Offset) + '\0' * (Offset - 4))
+                Size += Offset
+
+        DataList.append(Data)
+        Size += FileSize
+    return ''.join(DataList), MaxAlignment, PeSectionNum
+
+## Generate the data of a section
+#
+#   The leaf sections with common header, VERSION sections, compression
+#   sections without compression and the dummy sections concatenating other
+#   sections are supported.
+#
+#   @param  Input           The list of input files
+#   @param  Type            The section type name as accepted by GenSec
+#   @param  CompressionType The compression type name as accepted by GenSec
+#   @param  InputAlign      The list of alignment names of input files
+#   @param  Ver             The version string, whose quotes are processed
+#                           as by shell
+#   @param  BuildNumber     The build number string of VERSION section
+#   @retval string          The section data
+#   @retval None            The section is not supported and GenSec is needed
+#
+def GenerateSection(Input, Type=None, CompressionType=None, InputAlign=None, Ver=None, BuildNumber=None):
+    if Input == None:
+        Input = []
+    if Type not in [None, '']:
+        Type = Type.upper()
+    else:
+        Type = None
+    AlignList = None
+    if InputAlign:
+        if Type != None or len(InputAlign) != len(Input):
+            return None
+        AlignList = []
+        for Align in InputAlign:
+            Align = _GetSectionAlignment(Align)
+            if Align == None:
+                return None
+            AlignList.append(Align)
+
+    if Type == 'EFI_SECTION_VERSION':
+        if Input:
+            return None
+        Match = gVersionPattern.match(Ver or '')
+        if Match == None:
+            return None
+        VersionString = Match.group(1)
+        if VersionString == None:
+            VersionString = Match.group(2)
+        try:
+            VersionString = VersionString.encode('utf_16_le')
+        except UnicodeError:
+            return None
+        VersionNumber = 0
+        if BuildNumber:
+            if not str(BuildNumber).isdigit() or int(BuildNumber) > 0xffff:
+                return None
+            VersionNumber = int(BuildNumber)
+        Size = 4 + 2 + len(VersionString) + 2
+        return _PackSectionHeader(EFI_SECTION_VERSION, Size) + struct.pack('<H', VersionNumber) + VersionString + '\0\0'
+
+    if not Input:
+        return None
+    if Type == 'EFI_SECTION_COMPRESSION':
+        if CompressionType in [None, ''] or CompressionType.upper() != 'PI_NONE':
+            return None
+        Result = _GetSectionContents(Input, None)
+        if Result == None:
+            return None
+        Data = Result[0]
+        HeaderSize = 9
+        if len(Data) + HeaderSize >= MAX_SECTION_SIZE:
+            HeaderSize = 13
+        return _PackSectionHeader(EFI_SECTION_COMPRESSION, len(Data) + HeaderSize) + \
+               struct.pack('<IB', len(Data), EFI_NOT_COMPRESSED) + Data
+    if CompressionType not in [None, '']:
+        return None
+
+    if Type == None:
+        Result = _GetSectionContents(Input, AlignList)
+        if Result == None:
+            return None
+        return Result[0]
+
+    if Type not in LeafSectionType or len(Input) != 1:
+        return None
+    Data = _ReadFile(Input[0])
+    if Data == None:
+        return None
+    Size = 4 + len(Data)
+    if Size >= MAX_SECTION_SIZE:
+        Size = 8 + len(Data)
+    return _PackSectionHeader(LeafSectionType[Type], Size) + Data
+
+## Generate the data of an FFS file
+#
+#   @param  Input           The list of section files
+#   @param  Type            The FV file type name as accepted by GenFfs
+#   @param  Guid            The file GUID string
+#   @param  Fixed           Whether the file has fixed attribute
+#   @param  CheckSum        Whether the checksum of file data is needed
+#   @param  Align           The FFS alignment name
+#   @param  SectionAlign    The list of alignment names of sections
+#   @retval string          The FFS file data
+#   @retval None            The file cannot be generated here and GenFfs is
+#                           needed, such as for reporting an error
+#
+def GenerateFfs(Input, Type, Guid, Fixed=False, CheckSum=False, Align=None, SectionAlign=None):
+    if not Input or Type == None or Type.upper() not in FfsFileType:
+        return None
+    FileType = FfsFileType[Type.upper()]
+    if Guid == None or not gGuidPattern.match(Guid):
+        return None
+    FileGuid = uuid.UUID(Guid).bytes_le
+    if FileGuid == '\0' * 16:
+        return None
+
+    Attributes = 0
+    if Fixed:
+        Attributes |= FFS_ATTRIB_FIXED
+    if CheckSum:
+        Attributes |= FFS_ATTRIB_CHECKSUM
+    FfsAlign = 0
+    if Align not in [None, '']:
+        if Align.upper() not in FfsAlignName:
+            return None
+        FfsAlign = FfsAlignName.index(Align.upper())
+
+    AlignList = []
+    for Index in range(len(Input)):
+        SectAlign = 1
+        if SectionAlign not in [None, '', []] and SectionAlign[Index] not in [None, '']:
+            SectAlign = _GetSectionAlignment(SectionAlign[Index])
+            if SectAlign == None:
+                return None
+        AlignList.append(SectAlign)
+
+    Result = _GetSectionContents(Input, AlignList)
+    if Result == None:
+        return None
+    Data, MaxAlignment, PeSectionNum = Result
+    if FileType in SinglePeFileTypes and PeSectionNum != 1:
+        return None
+    if FileType in PeFileTypes and PeSectionNum < 1:
+        return None
+
+    # raise the FFS alignment to the max alignment of section data
+    for Index in range(len(FfsValidAlign) - 1):
+        if MaxAlignment > FfsValidAlign[Index] and MaxAlignment <= FfsValidAlign[Index + 1]:
+            break
+    else:
+        Index = len(FfsValidAlign) - 1
+    if FfsAlign < Index:
+        FfsAlign = Index
+
+    if len(Data) + 24 >= MAX_FFS_SIZE:
+        Attributes |= FFS_ATTRIB_LARGE_FILE
+        FileSize = len(Data) + 28
+        SizeField = 0
+        ExtendedSize = struct.pack('<I', FileSize)
+    else:
+        FileSize = len(Data) + 24
+        SizeField = FileSize
+        ExtendedSize = ''
+    Attributes = (Attributes | (FfsAlign << 3)) & 0xff
+
+    # the checksums and state are zero when the header checksum is computed
+    Header = FileGuid + struct.pack('<BBBBHBB', 0, 0, FileType, Attributes, SizeField & 0xffff,
+                                    (SizeField >> 16) & 0xff, 0) + ExtendedSize
+    HeaderChecksum = _CalculateChecksum8(Header)
+    if Attributes & FFS_ATTRIB_CHECKSUM:
+        FileChecksum = _CalculateChecksum8(Data)
+    else:
+        FileChecksum = FFS_FIXED_CHECKSUM
+    State = EFI_FILE_HEADER_CONSTRUCTION | EFI_FILE_HEADER_VALID | EFI_FILE_DATA_VALID
+    Header = FileGuid + struct.pack('<BBBBHBB', HeaderChecksum, FileChecksum, FileType, Attributes,
+                                    SizeField & 0xffff, (SizeField >> 16) & 0xff, State) + ExtendedSize
+    return Header + Data
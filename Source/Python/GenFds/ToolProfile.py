@@ -0,0 +1,287 @@
+## @file
+# Profile of the tool invocations of GenFds
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import Common.LongFilePathOs as os
+import json
+import threading
+import time
+from Common.Misc import CreateDirectory
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## How an output is handled
+STATUS_SKIPPED = 'skipped'      # the output is up to date
+STATUS_TOOL = 'tool'            # the output is generated by external tool
+STATUS_NATIVE = 'native'        # the output is generated in GenFds
+STATUS_CACHE = 'cache'          # the output is restored from section cache
+STATUS_FAILED = 'failed'        # the output is not generated because of error
+
+## Profile of the tool invocations
+#
+# An invocation record is created for each output checked by NeedsUpdate(),
+# and finished when the output is generated. The external tools run without
+# such a check, like the one for VTF, get records of their own.
+#
+class ToolProfile:
+    ## The constructor
+    #
+    #   @param  self        The object pointer
+    #
+    def __init__(self):
+        # the directory of FFS files, whose sub-directories are the output directories of modules
+        self.FfsDir = None
+        self.StartTime = time.time()
+        self.Lock = threading.Lock()
+        # list of invocation records, each of which is a dictionary
+        self.RecordList = []
+        # {output : record}, for outputs being generated
+        self.PendingDict = {}
+        # [(type, name, wall time)] of images generated
+        self.ImageList = []
+        self.SectionCacheHit = 0
+        self.SectionCacheMiss = 0
+
+    def __NewRecord(self, Tool, Output, Input, Status):
+        Record = {
+            'Tool'      : Tool,
+            'Output'    : Output,
+            'Input'     : list(Input or []),
+            'Module'    : None,
+            'Start'     : time.time() - self.StartTime,
+            'Duration'  : 0.0,
+            'ToolTime'  : 0.0,
+            'Status'    : Status
+        }
+        self.RecordList.append(Record)
+        return Record
+
+    ## Get the name of the module an output belongs to, None if it's not an output of module
+    def __GetModule(self, Output):
+        if not self.FfsDir or not Output:
+            return None
+        Path = os.path.normpath(Output)
+        FfsDir = os.path.join(os.path.normpath(self.FfsDir), '')
+        if not Path.startswith(FfsDir):
+            return None
+        Module = Path[len(FfsDir):].split(os.sep)[0]
+        if Module == os.path.basename(Path):
+            return None
+        return Module
+
+    ## Begin() method
+    #
+    #   Record the check of an output, and start timing it if it's generated
+    #
+    #   @param  self        The object pointer
+    #   @param  Output      The output file
+    #   @param  Input       The list of input files
+    #   @param  Command     The command line generating the output
+    #   @param  Update      Whether the output needs update
+    #
+    def Begin(self, Output, Input, Command, Update):
+        Tool = 'unknown'
+        if Command:
+            Tool = Command[0]
+        self.Lock.acquire()
+        try:
+            if Update:
+                self.PendingDict[Output] = self.__NewRecord(Tool, Output, Input, STATUS_NATIVE)
+            else:
+                self.__NewRecord(Tool, Output, Input, STATUS_SKIPPED)
+        finally:
+            self.Lock.release()
+
+    ## SetStatus() method
+    #
+    #   @param  self        The object pointer
+    #   @param  Output      The output file being generated
+    #   @param  Status      How the output is generated
+    #
+    def SetStatus(self, Output, Status):
+        self.Lock.acquire()
+        try:
+            if Output in self.PendingDict:
+                self.PendingDict[Output]['Status'] = Status
+        finally:
+            self.Lock.release()
+
+    ## AddToolTime() method
+    #
+    #   Record a run of external tool, which is added to the record of its
+    #   output if the output is being generated
+    #
+    #   @param  self        The object pointer
+    #   @param  Command     The command line of tool
+    #   @param  Duration    The time spent by tool
+    #
+    def AddToolTime(self, Command, Duration):
+        Output = None
+        if '-o' in Command and Command.index('-o') + 1 < len(Command):
+            Output = Command[Command.index('-o') + 1]
+        self.Lock.acquire()
+        try:
+            Record = self.PendingDict.get(Output)
+            if Record == None:
+                Record = self.__NewRecord(Command[0], Output, None, STATUS_TOOL)
+                Record['Duration'] = Duration
+            elif Record['Status'] == STATUS_NATIVE:
+                Record['Status'] = STATUS_TOOL
+            Record['ToolTime'] += Duration
+        finally:
+            self.Lock.release()
+
+    ## End() method
+    #
+    #   Finish the record of an output generated successfully
+    #
+    #   @param  self        The object pointer
+    #   @param  Output      The output file
+    #
+    def End(self, Output):
+        self.Lock.acquire()
+        try:
+            Record = self.PendingDict.pop(Output, None)
+            if Record != None:
+                Record['Duration'] = time.time() - self.StartTime - Record['Start']
+        finally:
+            self.Lock.release()
+
+    ## AddImage() method
+    #
+    #   @param  self        The object pointer
+    #   @param  Type        The image type, such as 'FV'
+    #   @param  Name        The image name
+    #   @param  Duration    The wall time of generating the image, including
+    #                       the images inside it
+    #
+    def AddImage(self, Type, Name, Duration):
+        self.Lock.acquire()
+        try:
+            self.ImageList.append((Type, Name, Duration))
+        finally:
+            self.Lock.release()
+
+    ## GetSummary() method
+    #
+    #   @param  self        The object pointer
+    #   @retval dict        The time and counts per tool, image and module
+    #
+    def GetSummary(self):
+        ToolDict = {}
+        ModuleDict = {}
+        StatusDict = {}
+        for Record in self.RecordList:
+            Record['Module'] = self.__GetModule(Record['Output'])
+            Status = Record['Status']
+            if Record['Output'] in self.PendingDict:
+                Status = STATUS_FAILED
+            StatusDict[Status] = StatusDict.get(Status, 0) + 1
+            Tool = ToolDict.setdefault(Record['Tool'], {'Count' : 0, 'Time' : 0.0, 'ToolTime' : 0.0})
+            Tool['Count'] += 1
+            Tool[Status] = Tool.get(Status, 0) + 1
+            Tool['Time'] += Record['Duration']
+            Tool['ToolTime'] += Record['ToolTime']
+            if Record['Module'] != None:
+                Module = ModuleDict.setdefault(Record['Module'], {'Count' : 0, 'Time' : 0.0})
+                Module['Count'] += 1
+                Module['Time'] += Record['Duration']
+        ImageDict = {}
+        for Type, Name, Duration in self.ImageList:
+            ImageDict['%s.%s' % (Type, Name)] = ImageDict.get('%s.%s' % (Type, Name), 0.0) + Duration
+        Total = len(self.RecordList)
+        Summary = {
+            'WallTime'          : time.time() - self.StartTime,
+            'Invocations'       : Total,
+            'Status'            : StatusDict,
+            'UpToDateRate'      : Total and float(StatusDict.get(STATUS_SKIPPED, 0)) / Total,
+            'SectionCacheHit'   : self.SectionCacheHit,
+            'SectionCacheMiss'  : self.SectionCacheMiss,
+            'Tools'             : ToolDict,
+            'Images'            : ImageDict,
+            'Modules'           : ModuleDict
+        }
+        CacheTotal = self.SectionCacheHit + self.SectionCacheMiss
+        Summary['SectionCacheHitRate'] = CacheTotal and float(self.SectionCacheHit) / CacheTotal
+        return Summary
+
+    ## GetReport() method
+    #
+    #   @param  self        The object pointer
+    #   @param  Summary     The summary got by GetSummary()
+    #   @param  TopNumber   The number of slowest modules and invocations listed
+    #   @retval string      The summary in text
+    #
+    def GetReport(self, Summary, TopNumber=20):
+        Lines = []
+        Lines.append('GenFds tool profile')
+        Lines.append('===================')
+        Lines.append('Wall time: %.3fs' % Summary['WallTime'])
+        Lines.append('Invocations: %d (%s)' % (Summary['Invocations'],
+                     ', '.join(['%s %d' % Item for Item in sorted(Summary['Status'].items())])))
+        Lines.append('Up to date rate: %.1f%%' % (Summary['UpToDateRate'] * 100))
+        Lines.append('Section cache: %d hit, %d miss, hit rate %.1f%%' % (Summary['SectionCacheHit'], Summary['SectionCacheMiss'],
+                                                                         Summary['SectionCacheHitRate'] * 100))
+        Lines.append('')
+        Lines.append('%-24s %8s %8s %8s %8s %8s %8s %10s %10s' % ('Tool', 'Count', 'Ran', 'Native', 'Cache', 'Skipped', 'Failed',
+                                                                  'Time(s)', 'ToolTime(s)'))
+        for Name, Tool in sorted(Summary['Tools'].items(), key=lambda Item: -Item[1]['Time']):
+            Lines.append('%-24s %8d %8d %8d %8d %8d %8d %10.3f %10.3f' % (Name, Tool['Count'], Tool.get(STATUS_TOOL, 0), Tool.get(STATUS_NATIVE, 0),
+                                                                           Tool.get(STATUS_CACHE, 0), Tool.get(STATUS_SKIPPED, 0),
+                                                                           Tool.get(STATUS_FAILED, 0), Tool['Time'], Tool['ToolTime']))
+        Lines.append('')
+        Lines.append('%-56s %10s' % ('Image', 'Time(s)'))
+        for Name, Duration in sorted(Summary['Images'].items(), key=lambda Item: -Item[1]):
+            Lines.append('%-56s %10.3f' % (Name, Duration))
+        Lines.append('')
+        Lines.append('%-56s %8s %10s' % ('Module (slowest %d)' % TopNumber, 'Count', 'Time(s)'))
+        for Name, Module in sorted(Summary['Modules'].items(), key=lambda Item: -Item[1]['Time'])[:TopNumber]:
+            Lines.append('%-56s %8d %10.3f' % (Name, Module['Count'], Module['Time']))
+        Lines.append('')
+        Lines.append('Slowest invocations:')
+        for Record in sorted(self.RecordList, key=lambda Record: -Record['Duration'])[:TopNumber]:
+            Lines.append('  %10.3fs %-8s %-12s %s' % (Record['Duration'], Record['Status'], Record['Tool'], Record['Output']))
+        return '\n'.join(Lines) + '\n'
+
+    ## Save() method
+    #
+    #   Save all invocation records and the summary in JSON, and the summary
+    #   in text
+    #
+    #   @param  self        The object pointer
+    #   @param  FileName    The report file path without extension
+    #   @param  FfsDir      The directory of FFS files
+    #   @retval string      The summary in text
+    #
+    def Save(self, FileName, FfsDir=None):
+        self.FfsDir = FfsDir
+        self.Lock.acquire()
+        try:
+            for Record in self.PendingDict.values():
+                Record['Status'] = STATUS_FAILED
+            Summary = self.GetSummary()
+            Report = self.GetReport(Summary)
+            CreateDirectory(os.path.dirname(os.path.abspath(FileName)))
+            JsonFile = open(FileName + '.json', 'w')
+            try:
+                json.dump({'Summary' : Summary, 'Invocations' : self.RecordList}, JsonFile, indent=2, sort_keys=True)
+            finally:
+                JsonFile.close()
+            TextFile = open(FileName + '.txt', 'w')
+            try:
+                TextFile.write(Report)
+            finally:
+                TextFile.close()
+        finally:
+            self.Lock.release()
+        return Report
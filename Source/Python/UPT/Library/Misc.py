@@ -291,27 +291,55 @@ def RealPath2(File, Dir='', OverrideDir=''):
 #
 #  The class implements a new kind of dict which its keys or values can be
 #  accessed in the order they are added into the dict. It guarantees the order
-#  by making use of an internal list to keep a copy of keys.
+#  by linking the keys in a circular doubly linked list, whose nodes are kept
+#  in a dict too, so that searching, adding, removing and inserting a key
+#  before or after another one take constant time.
 #
 class Sdict(IterableUserDict):
     ## Constructor
     #
     def __init__(self):
         IterableUserDict.__init__(self)
-        self._key_list = []
+        self.__InitList()
+
+    ## Initialize the empty list of keys
+    #
+    def __InitList(self):
+        #
+        # Each node is [previous node, next node, key], the root node is a sentinel
+        #
+        self._Root = []
+        self._Root[:] = [self._Root, self._Root, None]
+        self._NodeMap = {}
+
+    ## Link a new node of key before the given node
+    #
+    def __Link(self, Key, Next):
+        Prev = Next[0]
+        Node = [Prev, Next, Key]
+        Prev[1] = Node
+        Next[0] = Node
+        self._NodeMap[Key] = Node
+
+    ## Unlink the node of key from list
+    #
+    def __Unlink(self, Key):
+        Prev, Next = self._NodeMap.pop(Key)[:2]
+        Prev[1] = Next
+        Next[0] = Prev
 
     ## [] operator
     #
     def __setitem__(self, Key, Value):
-        if Key not in self._key_list:
-            self._key_list.append(Key)
+        if Key not in self._NodeMap:
+            self.__Link(Key, self._Root)
         IterableUserDict.__setitem__(self, Key, Value)
 
     ## del operator
     #
     def __delitem__(self, Key):
-        self._key_list.remove(Key)
         IterableUserDict.__delitem__(self, Key)
+        self.__Unlink(Key)
 
     ## used in "for k in dict" loop to ensure the correct order
     #
@@ -321,70 +349,99 @@ class Sdict(IterableUserDict):
     ## len() support
     #
     def __len__(self):
-        return len(self._key_list)
+        return len(self._NodeMap)
 
     ## "in" test support
     #
     def __contains__(self, Key):
-        return Key in self._key_list
+        return Key in self._NodeMap
+
+    ## pickle and copy support, the list of keys is too deep to be pickled by itself
+    #
+    def __getstate__(self):
+        return self.items()
+
+    def __setstate__(self, State):
+        IterableUserDict.__init__(self)
+        self.__InitList()
+        for Key, Value in State:
+            self[Key] = Value
+
+    ## Return a copy of the dict
+    #
+    def copy(self):
+        NewSdict = self.__class__()
+        NewSdict.append(self)
+        return NewSdict
 
     ## indexof support
     #
     def index(self, Key):
-        return self._key_list.index(Key)
+        if Key not in self._NodeMap:
+            raise ValueError("%s is not in Sdict" % str(Key))
+        Target = self._NodeMap[Key]
+        Index = 0
+        Node = self._Root[1]
+        while Node is not Target:
+            Node = Node[1]
+            Index += 1
+        return Index
 
     ## insert support
     #
     def insert(self, Key, Newkey, Newvalue, Order):
-        Index = self._key_list.index(Key)
+        Node = self._NodeMap[Key]
         if Order == 'BEFORE':
-            self._key_list.insert(Index, Newkey)
-            IterableUserDict.__setitem__(self, Newkey, Newvalue)
+            Next = Node
         elif Order == 'AFTER':
-            self._key_list.insert(Index + 1, Newkey)
+            Next = Node[1]
+        else:
+            return
+        if Newkey == Key:
             IterableUserDict.__setitem__(self, Newkey, Newvalue)
+            return
+        if Newkey in self._NodeMap:
+            if self._NodeMap[Newkey] is Next:
+                Next = Next[1]
+            self.__Unlink(Newkey)
+        self.__Link(Newkey, Next)
+        IterableUserDict.__setitem__(self, Newkey, Newvalue)
 
     ## append support
     #
     def append(self, Sdict2):
         for Key in Sdict2:
-            if Key not in self._key_list:
-                self._key_list.append(Key)
-            IterableUserDict.__setitem__(self, Key, Sdict2[Key])
+            self[Key] = Sdict2[Key]
     ## hash key
     #
     def has_key(self, Key):
-        return Key in self._key_list
+        return Key in self._NodeMap
 
     ## Empty the dict
     #
     def clear(self):
-        self._key_list = []
+        self.__InitList()
         IterableUserDict.clear(self)
 
     ## Return a copy of keys
     #
     def keys(self):
         Keys = []
-        for Key in self._key_list:
-            Keys.append(Key)
+        Node = self._Root[1]
+        while Node is not self._Root:
+            Keys.append(Node[2])
+            Node = Node[1]
         return Keys
 
     ## Return a copy of values
     #
     def values(self):
-        Values = []
-        for Key in self._key_list:
-            Values.append(self[Key])
-        return Values
+        return [self.data[Key] for Key in self.keys()]
 
     ## Return a copy of (key, value) list
     #
     def items(self):
-        Items = []
-        for Key in self._key_list:
-            Items.append((Key, self[Key]))
-        return Items
+        return [(Key, self.data[Key]) for Key in self.keys()]
 
     ## Iteration support
     #
@@ -405,7 +462,7 @@ class Sdict(IterableUserDict):
     #
     def pop(self, Key, *Dv):
         Value = None
-        if Key in self._key_list:
+        if Key in self._NodeMap:
             Value = self[Key]
             self.__delitem__(Key)
         elif len(Dv) != 0 :
@@ -415,7 +472,9 @@ class Sdict(IterableUserDict):
     ## Return (key, value) pair, and remove the (key, value) from the dict
     #
     def popitem(self):
-        Key = self._key_list[-1]
+        if not self._NodeMap:
+            raise KeyError("popitem(): Sdict is empty")
+        Key = self._Root[0][2]
         Value = self[Key]
         self.__delitem__(Key)
         return Key, Value
@@ -15,6 +15,8 @@
 # Import Modules
 #
 import Common.LongFilePathOs as os
+import cPickle
+import sqlite3
 
 import Common.EdkLogger as EdkLogger
 from CommonDataClass import DataClass
@@ -45,6 +47,8 @@ class Table(object):
         self.IdBase = int(IdBase)
         self.ID = int(IdBase)
         self.Temporary = Temporary
+        # records appended but not written into database yet
+        self._RecordList = []
 
     def __str__(self):
         return self.Table
@@ -79,6 +83,33 @@ class Table(object):
         self.Cur.execute(SqlCommand)
         return self.ID
 
+    ## Append a record to table
+    #
+    # Unlike Insert(), the values are not converted into SQL text but passed as
+    # parameters, and the records are buffered and written into database in one
+    # statement by Flush(), which is done before any query of the table.
+    #
+    # @retval ID:  The ID of the record
+    #
+    def Append(self, *Args):
+        self.ID = self.ID + self._ID_STEP_
+        if self.ID >= (self.IdBase + self._ID_MAX_):
+            self.ID = self.IdBase + self._ID_STEP_
+        if type(self.ID) == float:
+            # keep the precision of ID in SQL text, in which IDs are used by callers
+            self.ID = float(str(self.ID))
+        self._RecordList.append((self.ID,) + Args)
+        return self.ID
+
+    ## Write the appended records into database
+    def Flush(self):
+        if not self._RecordList:
+            return
+        SqlCommand = "insert into %s values(%s)" % (self.Table, ", ".join(["?"] * len(self._RecordList[0])))
+        EdkLogger.debug(EdkLogger.DEBUG_5, "%s (%d records)" % (SqlCommand, len(self._RecordList)))
+        self.Cur.executemany(SqlCommand, self._RecordList)
+        self._RecordList = []
+
     ## Query table
     #
     # Query all records of the table
@@ -95,6 +126,7 @@ class Table(object):
     # Drop the table
     #
     def Drop(self):
+        self._RecordList = []
         SqlCommand = """drop table IF EXISTS %s""" % self.Table
         self.Cur.execute(SqlCommand)
 
@@ -105,11 +137,13 @@ class Table(object):
     # @retval Count:  Total count of all records
     #
     def GetCount(self):
+        self.Flush()
         SqlCommand = """select count(ID) from %s""" % self.Table
         Record = self.Cur.execute(SqlCommand).fetchall()
         return Record[0][0]
 
     def GetId(self):
+        self.Flush()
         SqlCommand = """select max(ID) from %s""" % self.Table
         Record = self.Cur.execute(SqlCommand).fetchall()
         Id = Record[0][0]
@@ -129,12 +163,14 @@ class Table(object):
     # Exec Sql Command, return result
     #
     # @param SqlCommand:  The SqlCommand to be executed
+    # @param Parameters:  The values of parameters in SqlCommand
     #
     # @retval RecordSet:  The result after executed
     #
-    def Exec(self, SqlCommand):
+    def Exec(self, SqlCommand, Parameters=()):
+        self.Flush()
         EdkLogger.debug(EdkLogger.DEBUG_5, SqlCommand)
-        self.Cur.execute(SqlCommand)
+        self.Cur.execute(SqlCommand, Parameters)
         RecordSet = self.Cur.fetchall()
         return RecordSet
 
@@ -336,3 +372,49 @@ class TableDataModel(Table):
 
         return CrossIndex
 
+
+## TableMetaFileCache
+#
+# This class defined a table used to keep the data which is needed to reuse
+# the parsing result of meta files across builds, such as the digest of a file
+# or the side effects of post-processing a file. The data is pickled.
+#
+# @param object:       Inherited from object class
+#
+class TableMetaFileCache(Table):
+    _COLUMN_ = '''
+        ID INTEGER PRIMARY KEY,
+        Name VARCHAR NOT NULL UNIQUE,
+        Data BLOB
+        '''
+    def __init__(self, Cursor):
+        Table.__init__(self, Cursor, 'MetaFileCache')
+        self.Create(False)
+
+    ## Get the data of given name
+    #
+    #   @param  Name        Name of the data
+    #
+    #   @retval object      The data
+    #   @retval None        If there's no such data
+    #
+    def GetData(self, Name):
+        RecordList = self.Cur.execute("select Data from %s where Name = ?" % self.Table, (Name,)).fetchall()
+        if len(RecordList) == 0 or RecordList[0][0] == None:
+            return None
+        try:
+            return cPickle.loads(str(RecordList[0][0]))
+        except:
+            return None
+
+    ## Set the data of given name
+    #
+    #   @param  Name        Name of the data
+    #   @param  Data        The data, None to remove it
+    #
+    def SetData(self, Name, Data):
+        if Data == None:
+            self.Cur.execute("delete from %s where Name = ?" % self.Table, (Name,))
+            return
+        Data = sqlite3.Binary(cPickle.dumps(Data, cPickle.HIGHEST_PROTOCOL))
+        self.Cur.execute("insert or replace into %s (Name, Data) values (?, ?)" % self.Table, (Name, Data))
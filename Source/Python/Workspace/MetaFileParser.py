@@ -18,6 +18,7 @@ import Common.LongFilePathOs as os
 import re
 import time
 import copy
+import hashlib
 
 import Common.EdkLogger as EdkLogger
 import Common.GlobalData as GlobalData
@@ -26,11 +27,13 @@ from CommonDataClass.DataClass import *
 from Common.DataType import *
 from Common.String import *
 from Common.Misc import GuidStructureStringToGuidString, CheckPcdDatum, PathClass, AnalyzePcdData, AnalyzeDscPcd
+from Common.Misc import IncludeCache
 from Common.Expression import *
 from CommonDataClass.Exceptions import *
 from Common.LongFilePathSupport import OpenLongFilePath as open
 
 from MetaFileTable import MetaFileStorage
+from MetaDataTable import TableMetaFileCache
 from MetaFileCommentParser import CheckInfComment
 
 ## A decorator used to parse macro definition
@@ -834,6 +837,11 @@ class DscParser(MetaFileParser):
 
     SymbolPattern = ValueExpression.SymbolPattern
 
+    # Global data changed by post-process, besides GlobalData.gPlatformDefines
+    _POST_PROCESS_GLOBALS_ = ["gEdkGlobal", "gPlatformPcds", "gPlatformOtherPcds"]
+    # Max number of post-process results kept for one file
+    _POST_PROCESS_CACHE_SIZE_ = 16
+
     ## Constructor of DscParser
     #
     #  Initialize object of DscParser
@@ -1224,8 +1232,19 @@ class DscParser(MetaFileParser):
             MODEL_META_DATA_USER_EXTENSION                  :   self._SkipUserExtension,
         }
 
-        self._Table = MetaFileStorage(self._RawTable.Cur, self.MetaFile, MODEL_FILE_DSC, True)
+        # reuse the result of last post-process if nothing it depends on is changed,
+        # which is only possible when the records are kept in database
+        Fingerprint = None
+        if not self._RawTable.InMemory:
+            CacheTable = TableMetaFileCache(self._RawTable.Cur)
+            Fingerprint = self.__GetPostProcessFingerprint()
+            if self.__RestorePostProcess(CacheTable, Fingerprint):
+                return
+            OldGlobalState = self.__GetGlobalState()
+
+        self._Table = MetaFileStorage(self._RawTable.Cur, self.MetaFile, MODEL_FILE_DSC, True, Fingerprint)
         self._Table.Create()
+        self._IncludedFileList = []
         self._DirectiveStack = []
         self._DirectiveEvalStack = []
         self._FileWithError = self.MetaFile
@@ -1325,6 +1344,80 @@ class DscParser(MetaFileParser):
         self._PostProcessed = True
         self._Content = None
 
+        self._Table.SetEndFlag()
+        if Fingerprint:
+            self.__SavePostProcess(CacheTable, Fingerprint, OldGlobalState)
+
+    ## Get the fingerprint of everything post-process depends on
+    #
+    #   The included files are not known before post-process. They're checked
+    #   against the stamps saved together with the result.
+    #
+    def __GetPostProcessFingerprint(self):
+        Md5 = hashlib.md5(str(self.MetaFile))
+        Fd = open(str(self.MetaFile), 'rb')
+        try:
+            Md5.update(Fd.read())
+        finally:
+            Fd.close()
+        for Dict in [GlobalData.gGlobalDefines, GlobalData.gCommandLineDefines, GlobalData.gEdkGlobal,
+                     GlobalData.gPlatformPcds, GlobalData.gPlatformOtherPcds, self._Symbols, self._IdMapping]:
+            Md5.update(repr(sorted(Dict.items())))
+        return Md5.hexdigest()
+
+    ## Get the global data changed by post-process
+    def __GetGlobalState(self):
+        return dict([(Name, dict(getattr(GlobalData, Name))) for Name in self._POST_PROCESS_GLOBALS_])
+
+    ## Save the result of post-process for later builds
+    def __SavePostProcess(self, CacheTable, Fingerprint, OldGlobalState):
+        GlobalChanges = {}
+        for Name in self._POST_PROCESS_GLOBALS_:
+            OldDict = OldGlobalState[Name]
+            GlobalChanges[Name] = dict([(Key, Value) for Key, Value in getattr(GlobalData, Name).iteritems()
+                                        if Key not in OldDict or OldDict[Key] != Value])
+        IncludedFileList = [(File, IncludeCache.GetStamp(File)) for File in self._IncludedFileList]
+        CacheTable.SetData("PostProcess:" + Fingerprint,
+                           (IncludedFileList, GlobalChanges, dict(GlobalData.gPlatformDefines),
+                            self._FileLocalMacros, self._Symbols, self._IdMapping))
+        self._IncludedFileList = []
+
+        # only keep the results of a few latest post-processes of the file
+        ListName = "PostProcessList:" + str(self.MetaFile)
+        FingerprintList = [Fingerprint] + [F for F in (CacheTable.GetData(ListName) or []) if F != Fingerprint]
+        for OldFingerprint in FingerprintList[self._POST_PROCESS_CACHE_SIZE_:]:
+            CacheTable.SetData("PostProcess:" + OldFingerprint, None)
+            CacheTable.Exec("drop table IF EXISTS %s" % self._Table.Table.replace(Fingerprint, OldFingerprint))
+        CacheTable.SetData(ListName, FingerprintList[:self._POST_PROCESS_CACHE_SIZE_])
+        self._Table.Cur.connection.commit()
+
+    ## Restore the result of post-process saved by previous build
+    #
+    #   @retval True    The result is restored, no need to do post-process
+    #   @retval False   There's no valid result for given fingerprint
+    #
+    def __RestorePostProcess(self, CacheTable, Fingerprint):
+        Data = CacheTable.GetData("PostProcess:" + Fingerprint)
+        if Data == None:
+            return False
+        IncludedFileList, GlobalChanges, PlatformDefines, FileLocalMacros, Symbols, IdMapping = Data
+        for File, Stamp in IncludedFileList:
+            if Stamp == None or IncludeCache.GetStamp(File) != Stamp:
+                return False
+        Table = MetaFileStorage(self._RawTable.Cur, self.MetaFile, MODEL_FILE_DSC, True, Fingerprint)
+        if not Table.IsIntegral():
+            return False
+
+        for Name in GlobalChanges:
+            getattr(GlobalData, Name).update(GlobalChanges[Name])
+        GlobalData.gPlatformDefines = PlatformDefines
+        self._FileLocalMacros = FileLocalMacros
+        self._Symbols = Symbols
+        self._IdMapping = IdMapping
+        self._Table = Table
+        self._PostProcessed = True
+        return True
+
     def __ProcessSectionHeader(self):
         self._SectionName = self._ValueList[0]
         if self._SectionName in self.DataType:
@@ -1473,6 +1566,7 @@ class DscParser(MetaFileParser):
                                     Line=self._LineIndex + 1, ExtraData=ErrorInfo1 + "\n" + ErrorInfo2)
 
             self._FileWithError = IncludedFile1
+            self._IncludedFileList.append(str(IncludedFile1))
 
             IncludedFileTable = MetaFileStorage(self._Table.Cur, IncludedFile1, MODEL_FILE_DSC, False)
             Owner = self._Content[self._ContentIndex - 1][0]
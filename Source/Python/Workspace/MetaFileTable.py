@@ -15,11 +15,13 @@
 # Import Modules
 #
 import uuid
+import hashlib
+
+from Common.LongFilePathSupport import OpenLongFilePath as open
 
 import Common.EdkLogger as EdkLogger
 
-from MetaDataTable import Table, TableFile
-from MetaDataTable import ConvertToSqlString
+from MetaDataTable import Table, TableFile, TableMetaFileCache
 from CommonDataClass.DataClass import MODEL_FILE_DSC, MODEL_FILE_DEC, MODEL_FILE_INF, \
                                       MODEL_FILE_OTHERS
 
@@ -28,8 +30,17 @@ class MetaFileTable(Table):
     _ID_STEP_ = 0.00000001
     _ID_MAX_ = 0.99999999
 
+    # the records are kept in database, instead of in memory only
+    InMemory = False
+
     ## Constructor
-    def __init__(self, Cursor, MetaFile, FileType, Temporary):
+    #
+    #   @param  Fingerprint     The fingerprint of the data stored in the table.
+    #                           If given, the table is kept in database and named
+    #                           after it, so that the data can be reused by later
+    #                           builds as long as the fingerprint doesn't change
+    #
+    def __init__(self, Cursor, MetaFile, FileType, Temporary, Fingerprint=None):
         self.MetaFile = MetaFile
 
         self._FileIndexTable = TableFile(Cursor)
@@ -39,13 +50,18 @@ class MetaFileTable(Table):
         if not FileId:
             FileId = self._FileIndexTable.InsertFile(MetaFile, FileType)
 
-        if Temporary:
+        if Fingerprint:
+            TableName = "_%s_%s_%s" % (FileType, FileId, Fingerprint)
+            Temporary = False
+        elif Temporary:
             TableName = "_%s_%s_%s" % (FileType, FileId, uuid.uuid4().hex)
         else:
             TableName = "_%s_%s" % (FileType, FileId)
 
         #Table.__init__(self, Cursor, TableName, FileId, False)
         Table.__init__(self, Cursor, TableName, FileId, Temporary)
+        # SQL text of queries, which only differ in the values of parameters
+        self._SqlCommand = {}
         self.Create(not self.IsIntegrity())
 
     def IsIntegrity(self):
@@ -53,19 +69,38 @@ class MetaFileTable(Table):
             TimeStamp = self.MetaFile.TimeStamp
             Result = self.Cur.execute("select ID from %s where ID<0" % (self.Table)).fetchall()
             if not Result:
-                # update the timestamp in database
+                # update the timestamp and digest in database, for the table to be filled
                 self._FileIndexTable.SetFileTimeStamp(self.IdBase, TimeStamp)                
+                if not self.Temporary:
+                    TableMetaFileCache(self.Cur).SetData(self._DigestKey(), self.GetDigest())
                 return False
 
             if TimeStamp != self._FileIndexTable.GetFileTimeStamp(self.IdBase):
                 # update the timestamp in database
                 self._FileIndexTable.SetFileTimeStamp(self.IdBase, TimeStamp)
+                # the file is touched but its content is not changed
+                CacheTable = TableMetaFileCache(self.Cur)
+                Digest = self.GetDigest()
+                if Digest == CacheTable.GetData(self._DigestKey()):
+                    return True
+                CacheTable.SetData(self._DigestKey(), Digest)
                 return False
         except Exception, Exc:
             EdkLogger.debug(EdkLogger.DEBUG_5, str(Exc))
             return False
         return True
 
+    def _DigestKey(self):
+        return "Digest:%s" % self.Table
+
+    ## Get the digest of the content of meta file
+    def GetDigest(self):
+        Fd = open(str(self.MetaFile), 'rb')
+        try:
+            return hashlib.md5(Fd.read()).hexdigest()
+        finally:
+            Fd.close()
+
 ## Python class representation of table storing module data
 class ModuleTable(MetaFileTable):
     _ID_STEP_ = 0.00000001
@@ -89,8 +124,8 @@ class ModuleTable(MetaFileTable):
     _DUMMY_ = "-1, -1, '====', '====', '====', '====', '====', -1, -1, -1, -1, -1, -1"
 
     ## Constructor
-    def __init__(self, Cursor, MetaFile, Temporary):
-        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_INF, Temporary)
+    def __init__(self, Cursor, MetaFile, Temporary, Fingerprint=None):
+        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_INF, Temporary, Fingerprint)
 
     ## Insert a record into table Inf
     #
@@ -109,9 +144,7 @@ class ModuleTable(MetaFileTable):
     #
     def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON',
                BelongsToItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=0):
-        (Value1, Value2, Value3, Scope1, Scope2) = ConvertToSqlString((Value1, Value2, Value3, Scope1, Scope2))
-        return Table.Insert(
-                        self, 
+        return self.Append(
                         Model, 
                         Value1, 
                         Value2, 
@@ -135,18 +168,30 @@ class ModuleTable(MetaFileTable):
     # @retval:       A recordSet of all found records 
     #
     def Query(self, Model, Arch=None, Platform=None, BelongsToItem=None):
-        ConditionString = "Model=%s AND Enabled>=0" % Model
-        ValueString = "Value1,Value2,Value3,Scope1,Scope2,ID,StartLine"
-
+        Parameters = [Model]
         if Arch != None and Arch != 'COMMON':
-            ConditionString += " AND (Scope1='%s' OR Scope1='COMMON')" % Arch
+            Parameters.append(Arch)
+        else:
+            Arch = None
         if Platform != None and Platform != 'COMMON':
-            ConditionString += " AND (Scope2='%s' OR Scope2='COMMON' OR Scope2='DEFAULT')" % Platform
+            Parameters.append(Platform)
+        else:
+            Platform = None
         if BelongsToItem != None:
-            ConditionString += " AND BelongsToItem=%s" % BelongsToItem
-
-        SqlCommand = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
-        return self.Exec(SqlCommand)
+            Parameters.append(BelongsToItem)
+
+        SqlKey = (Arch != None, Platform != None, BelongsToItem != None)
+        if SqlKey not in self._SqlCommand:
+            ConditionString = "Model=? AND Enabled>=0"
+            ValueString = "Value1,Value2,Value3,Scope1,Scope2,ID,StartLine"
+            if SqlKey[0]:
+                ConditionString += " AND (Scope1=? OR Scope1='COMMON')"
+            if SqlKey[1]:
+                ConditionString += " AND (Scope2=? OR Scope2='COMMON' OR Scope2='DEFAULT')"
+            if SqlKey[2]:
+                ConditionString += " AND BelongsToItem=?"
+            self._SqlCommand[SqlKey] = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
+        return self.Exec(self._SqlCommand[SqlKey], Parameters)
 
 ## Python class representation of table storing package data
 class PackageTable(MetaFileTable):
@@ -169,8 +214,8 @@ class PackageTable(MetaFileTable):
     _DUMMY_ = "-1, -1, '====', '====', '====', '====', '====', -1, -1, -1, -1, -1, -1"
 
     ## Constructor
-    def __init__(self, Cursor, MetaFile, Temporary):
-        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_DEC, Temporary)
+    def __init__(self, Cursor, MetaFile, Temporary, Fingerprint=None):
+        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_DEC, Temporary, Fingerprint)
 
     ## Insert table
     #
@@ -191,9 +236,7 @@ class PackageTable(MetaFileTable):
     #
     def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON',
                BelongsToItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=0):
-        (Value1, Value2, Value3, Scope1, Scope2) = ConvertToSqlString((Value1, Value2, Value3, Scope1, Scope2))
-        return Table.Insert(
-                        self, 
+        return self.Append(
                         Model, 
                         Value1, 
                         Value2, 
@@ -216,22 +259,31 @@ class PackageTable(MetaFileTable):
     # @retval:       A recordSet of all found records 
     #
     def Query(self, Model, Arch=None):
-        ConditionString = "Model=%s AND Enabled>=0" % Model
-        ValueString = "Value1,Value2,Value3,Scope1,ID,StartLine"
-
+        Parameters = [Model]
         if Arch != None and Arch != 'COMMON':
-            ConditionString += " AND (Scope1='%s' OR Scope1='COMMON')" % Arch
-
-        SqlCommand = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
-        return self.Exec(SqlCommand)
+            Parameters.append(Arch)
+        else:
+            Arch = None
+
+        SqlKey = (Arch != None,)
+        if SqlKey not in self._SqlCommand:
+            ConditionString = "Model=? AND Enabled>=0"
+            ValueString = "Value1,Value2,Value3,Scope1,ID,StartLine"
+            if SqlKey[0]:
+                ConditionString += " AND (Scope1=? OR Scope1='COMMON')"
+            self._SqlCommand[SqlKey] = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
+        return self.Exec(self._SqlCommand[SqlKey], Parameters)
+
+    ## Get the Value1 of records of given PCD, in which the comments are kept
+    def _QueryPcdValue1(self, TokenSpaceGuid, PcdCName):
+        SqlCommand = "select Value1 from %s WHERE Value2=? and Value3=?" % (self.Table)
+        return self.Exec(SqlCommand, (TokenSpaceGuid, PcdCName))
 
     def GetValidExpression(self, TokenSpaceGuid, PcdCName):
-        SqlCommand = "select Value1 from %s WHERE Value2='%s' and Value3='%s'" % (self.Table, TokenSpaceGuid, PcdCName)
-        self.Cur.execute(SqlCommand)
         validateranges = []
         validlists = []
         expressions = []
-        for row in self.Cur:
+        for row in self._QueryPcdValue1(TokenSpaceGuid, PcdCName):
             comment = row[0]
             comment = comment.strip("#")
             comment = comment.strip()
@@ -267,8 +319,8 @@ class PlatformTable(MetaFileTable):
     _DUMMY_ = "-1, -1, '====', '====', '====', '====', '====', -1, -1, -1, -1, -1, -1, -1"
 
     ## Constructor
-    def __init__(self, Cursor, MetaFile, Temporary):
-        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_DSC, Temporary)
+    def __init__(self, Cursor, MetaFile, Temporary, Fingerprint=None):
+        MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_DSC, Temporary, Fingerprint)
 
     ## Insert table
     #
@@ -290,9 +342,7 @@ class PlatformTable(MetaFileTable):
     #
     def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON', BelongsToItem=-1, 
                FromItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=1):
-        (Value1, Value2, Value3, Scope1, Scope2) = ConvertToSqlString((Value1, Value2, Value3, Scope1, Scope2))
-        return Table.Insert(
-                        self, 
+        return self.Append(
                         Model, 
                         Value1, 
                         Value2, 
@@ -319,24 +369,257 @@ class PlatformTable(MetaFileTable):
     # @retval:       A recordSet of all found records 
     #
     def Query(self, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=None):
-        ConditionString = "Model=%s AND Enabled>0" % Model
-        ValueString = "Value1,Value2,Value3,Scope1,Scope2,ID,StartLine"
-
+        Parameters = [Model]
         if Scope1 != None and Scope1 != 'COMMON':
-            ConditionString += " AND (Scope1='%s' OR Scope1='COMMON')" % Scope1
+            Parameters.append(Scope1)
+        else:
+            Scope1 = None
         if Scope2 != None and Scope2 != 'COMMON':
-            ConditionString += " AND (Scope2='%s' OR Scope2='COMMON' OR Scope2='DEFAULT')" % Scope2
-
+            Parameters.append(Scope2)
+        else:
+            Scope2 = None
         if BelongsToItem != None:
-            ConditionString += " AND BelongsToItem=%s" % BelongsToItem
+            Parameters.append(BelongsToItem)
+        if FromItem != None:
+            Parameters.append(FromItem)
+
+        SqlKey = (Scope1 != None, Scope2 != None, BelongsToItem != None, FromItem != None)
+        if SqlKey not in self._SqlCommand:
+            ConditionString = "Model=? AND Enabled>0"
+            ValueString = "Value1,Value2,Value3,Scope1,Scope2,ID,StartLine"
+            if SqlKey[0]:
+                ConditionString += " AND (Scope1=? OR Scope1='COMMON')"
+            if SqlKey[1]:
+                ConditionString += " AND (Scope2=? OR Scope2='COMMON' OR Scope2='DEFAULT')"
+            if SqlKey[2]:
+                ConditionString += " AND BelongsToItem=?"
+            else:
+                ConditionString += " AND BelongsToItem<0"
+            if SqlKey[3]:
+                ConditionString += " AND FromItem=?"
+            self._SqlCommand[SqlKey] = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
+        return self.Exec(self._SqlCommand[SqlKey], Parameters)
+
+## Storage keeping the records of meta files in memory
+#
+# The storage is passed as the cursor to MetaFileStorage, which then produces
+# the in-memory tables instead of sqlite ones. Only the index of files is still
+# kept in database, through the real cursor.
+#
+class MetaFileMemoryStore(object):
+    def __init__(self, Cursor):
+        self.Cursor = Cursor
+        # {table name : MemoryTableData}
+        self.Tables = {}
+
+## The records of one in-memory table, and their index
+class MemoryTableData(object):
+    def __init__(self):
+        # full records, in the same layout as the columns of sqlite table
+        self.Records = []
+        # {Model : {BelongsToItem : {(Scope1, Scope2) : [position in Records]}}}
+        self.Index = {}
+        # the result of queries, cleared when records are added
+        self.QueryCache = {}
+        # the time stamp of meta file when the table is completed
+        self.TimeStamp = None
+
+## Base class of in-memory tables
+#
+# It must be put before the sqlite table class in the base class list, so that
+# the Insert() of sqlite table is reused, but the records are kept here.
+#
+class MemoryMetaFileTable(object):
+    InMemory = True
+
+    # position of the columns in the full records
+    _ID_       = 0
+    _MODEL_    = 1
+    _VALUE2_   = 3
+    _VALUE3_   = 4
+    _SCOPE1_   = 5
+    _SCOPE2_   = 6
+    _BELONGS_  = 7
+    _ENABLED_  = -1
+
+    ## Constructor
+    def __init__(self, Store, MetaFile, FileType, Temporary, Fingerprint=None):
+        self.MetaFile = MetaFile
+
+        self._FileIndexTable = TableFile(Store.Cursor)
+        self._FileIndexTable.Create(False)
+
+        FileId = self._FileIndexTable.GetFileId(MetaFile)
+        if not FileId:
+            FileId = self._FileIndexTable.InsertFile(MetaFile, FileType)
+
+        if Temporary:
+            TableName = "_%s_%s_%s" % (FileType, FileId, uuid.uuid4().hex)
         else:
-            ConditionString += " AND BelongsToItem<0"
+            TableName = "_%s_%s" % (FileType, FileId)
 
-        if FromItem != None:
-            ConditionString += " AND FromItem=%s" % FromItem
+        Table.__init__(self, Store, TableName, FileId, Temporary)
+        self._Data = Store.Tables.setdefault(TableName, MemoryTableData())
+        self.Create(not self.IsIntegrity())
 
-        SqlCommand = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
-        return self.Exec(SqlCommand)
+    def IsIntegrity(self):
+        return self._Data.TimeStamp != None and self._Data.TimeStamp == self.MetaFile.TimeStamp
+
+    def IsIntegral(self):
+        return self._Data.TimeStamp != None
+
+    def Create(self, NewTable=True):
+        if NewTable:
+            self.Drop()
+            self._Data = self.Cur.Tables.setdefault(self.Table, MemoryTableData())
+        self.ID = self.GetId()
+
+    def Drop(self):
+        self.Cur.Tables.pop(self.Table, None)
+        self._Data = MemoryTableData()
+
+    def GetId(self):
+        if not self._Data.Records:
+            return self.IdBase
+        return max([Record[self._ID_] for Record in self._Data.Records])
+
+    def GetCount(self):
+        return len(self._Data.Records)
+
+    def Flush(self):
+        pass
+
+    def SetEndFlag(self):
+        self._Data.TimeStamp = self.MetaFile.TimeStamp
+
+    def GetAll(self):
+        RecordList = [Record for Record in self._Data.Records if Record[self._ID_] > 0]
+        RecordList.sort(key=lambda Record: Record[self._ID_])
+        return RecordList
+
+    def Append(self, *Args):
+        self.ID = self.ID + self._ID_STEP_
+        if self.ID >= (self.IdBase + self._ID_MAX_):
+            self.ID = self.IdBase + self._ID_STEP_
+        self.ID = float(str(self.ID))
+
+        Data = self._Data
+        Record = (self.ID,) + Args
+        BelongsDict = Data.Index.setdefault(Record[self._MODEL_], {})
+        ScopeDict = BelongsDict.setdefault(Record[self._BELONGS_], {})
+        ScopeDict.setdefault((Record[self._SCOPE1_], Record[self._SCOPE2_]), []).append(len(Data.Records))
+        Data.Records.append(Record)
+        Data.QueryCache = {}
+        return self.ID
+
+    ## Find records by the index
+    #
+    #   @param  Model           The Model of records
+    #   @param  Scope1List      Valid Scope1 values, None for any value
+    #   @param  Scope2List      Valid Scope2 values, None for any value
+    #   @param  BelongsToItem   The BelongsToItem of records, None for any value,
+    #                           and -1 for any negative value
+    #   @param  MinEnabled      The min Enabled value of records
+    #   @param  ColumnList      The columns returned
+    #   @param  FromItem        The FromItem of records, None for any value
+    #
+    #   @retval list            The records found, in the order of insertion
+    #
+    def _Select(self, Model, Scope1List, Scope2List, BelongsToItem, MinEnabled, ColumnList, FromItem=None):
+        BelongsDict = self._Data.Index.get(Model)
+        if not BelongsDict:
+            return []
+        if BelongsToItem == None:
+            ScopeDictList = BelongsDict.values()
+        elif BelongsToItem < 0:
+            ScopeDictList = [BelongsDict[Item] for Item in BelongsDict if Item < 0]
+        elif BelongsToItem in BelongsDict:
+            ScopeDictList = [BelongsDict[BelongsToItem]]
+        else:
+            return []
+
+        PositionList = []
+        for ScopeDict in ScopeDictList:
+            if Scope1List != None and Scope2List != None:
+                for Scope1 in Scope1List:
+                    for Scope2 in Scope2List:
+                        PositionList.extend(ScopeDict.get((Scope1, Scope2), []))
+            else:
+                for Scope1, Scope2 in ScopeDict:
+                    if Scope1List != None and Scope1 not in Scope1List:
+                        continue
+                    if Scope2List != None and Scope2 not in Scope2List:
+                        continue
+                    PositionList.extend(ScopeDict[Scope1, Scope2])
+        PositionList.sort()
+
+        Records = self._Data.Records
+        Result = []
+        for Position in PositionList:
+            Record = Records[Position]
+            if Record[self._ENABLED_] < MinEnabled:
+                continue
+            if FromItem != None and Record[self._FROM_] != FromItem:
+                continue
+            Result.append(tuple([Record[Column] for Column in ColumnList]))
+        return Result
+
+    ## Query with the result cached until the table is changed
+    def _CachedSelect(self, Key, *Args):
+        if Key not in self._Data.QueryCache:
+            self._Data.QueryCache[Key] = self._Select(*Args)
+        return list(self._Data.QueryCache[Key])
+
+    ## Get the valid values of scope used in query
+    @staticmethod
+    def _ScopeList(Scope, *CommonScopes):
+        if Scope == None or Scope == 'COMMON':
+            return None
+        return (Scope,) + CommonScopes
+
+## In-memory table storing module data
+class ModuleMemoryTable(MemoryMetaFileTable, ModuleTable):
+    _COLUMNS_ = (2, 3, 4, 5, 6, 0, 8)
+
+    def __init__(self, Store, MetaFile, Temporary, Fingerprint=None):
+        MemoryMetaFileTable.__init__(self, Store, MetaFile, MODEL_FILE_INF, Temporary)
+
+    def Query(self, Model, Arch=None, Platform=None, BelongsToItem=None):
+        return self._CachedSelect((Model, Arch, Platform, BelongsToItem), Model,
+                                  self._ScopeList(Arch, 'COMMON'),
+                                  self._ScopeList(Platform, 'COMMON', 'DEFAULT'),
+                                  BelongsToItem, 0, self._COLUMNS_)
+
+## In-memory table storing package data
+class PackageMemoryTable(MemoryMetaFileTable, PackageTable):
+    _COLUMNS_ = (2, 3, 4, 5, 0, 8)
+
+    def __init__(self, Store, MetaFile, Temporary, Fingerprint=None):
+        MemoryMetaFileTable.__init__(self, Store, MetaFile, MODEL_FILE_DEC, Temporary)
+
+    def Query(self, Model, Arch=None):
+        return self._CachedSelect((Model, Arch), Model, self._ScopeList(Arch, 'COMMON'), None, None, 0,
+                                  self._COLUMNS_)
+
+    def _QueryPcdValue1(self, TokenSpaceGuid, PcdCName):
+        return [(Record[2],) for Record in self._Data.Records
+                if Record[self._VALUE2_] == TokenSpaceGuid and Record[self._VALUE3_] == PcdCName]
+
+## In-memory table storing platform data
+class PlatformMemoryTable(MemoryMetaFileTable, PlatformTable):
+    _COLUMNS_ = (2, 3, 4, 5, 6, 0, 9)
+    _FROM_ = 8
+
+    def __init__(self, Store, MetaFile, Temporary, Fingerprint=None):
+        MemoryMetaFileTable.__init__(self, Store, MetaFile, MODEL_FILE_DSC, Temporary)
+
+    def Query(self, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=None):
+        if BelongsToItem == None:
+            BelongsToItem = -1
+        return self._CachedSelect((Model, Scope1, Scope2, BelongsToItem, FromItem), Model,
+                                  self._ScopeList(Scope1, 'COMMON'),
+                                  self._ScopeList(Scope2, 'COMMON', 'DEFAULT'),
+                                  BelongsToItem, 1, self._COLUMNS_, FromItem)
 
 ## Factory class to produce different storage for different type of meta-file
 class MetaFileStorage(object):
@@ -347,6 +630,12 @@ class MetaFileStorage(object):
         MODEL_FILE_OTHERS   :   MetaFileTable,
     }
 
+    _MEMORY_FILE_TABLE_ = {
+        MODEL_FILE_INF      :   ModuleMemoryTable,
+        MODEL_FILE_DEC      :   PackageMemoryTable,
+        MODEL_FILE_DSC      :   PlatformMemoryTable,
+    }
+
     _FILE_TYPE_ = {
         ".inf"  : MODEL_FILE_INF,
         ".dec"  : MODEL_FILE_DEC,
@@ -354,7 +643,7 @@ class MetaFileStorage(object):
     }
 
     ## Constructor
-    def __new__(Class, Cursor, MetaFile, FileType=None, Temporary=False):
+    def __new__(Class, Cursor, MetaFile, FileType=None, Temporary=False, Fingerprint=None):
         # no type given, try to find one
         if not FileType:
             if MetaFile.Type in self._FILE_TYPE_:
@@ -362,12 +651,18 @@ class MetaFileStorage(object):
             else:
                 FileType = MODEL_FILE_OTHERS
 
+        # types without in-memory table are still kept in database
+        if isinstance(Cursor, MetaFileMemoryStore) and FileType not in Class._MEMORY_FILE_TABLE_:
+            Cursor = Cursor.Cursor
+
         # don't pass the type around if it's well known
         if FileType == MODEL_FILE_OTHERS:
-            Args = (Cursor, MetaFile, FileType, Temporary)
+            Args = (Cursor, MetaFile, FileType, Temporary, Fingerprint)
         else:
-            Args = (Cursor, MetaFile, Temporary)
+            Args = (Cursor, MetaFile, Temporary, Fingerprint)
 
         # create the storage object and return it to caller
+        if isinstance(Cursor, MetaFileMemoryStore):
+            return Class._MEMORY_FILE_TABLE_[FileType](*Args)
         return Class._FILE_TABLE_[FileType](*Args)
 
@@ -2655,6 +2655,30 @@ class InfBuildData(ModuleBuildClassObject):
     IsBinaryModule = property(_IsBinaryModule)
     IsSupportedArch = property(_IsSupportedArch)
 
+## Cursor of the workspace database
+#
+# All tables share the cursor through this object, so that they can be moved
+# to a new connection by binding another cursor, like in a forked process.
+#
+class DatabaseCursor(object):
+    def __init__(self, Cursor):
+        self.Bind(Cursor)
+
+    ## Use another sqlite cursor
+    def Bind(self, Cursor):
+        self._Cursor = Cursor
+        # the frequently used methods are called without forwarding
+        self.execute = Cursor.execute
+        self.executemany = Cursor.executemany
+        self.fetchall = Cursor.fetchall
+        self.fetchone = Cursor.fetchone
+
+    def __getattr__(self, Name):
+        return getattr(self._Cursor, Name)
+
+    def __iter__(self):
+        return iter(self._Cursor)
+
 ## Database
 #
 #   This class defined the build database for all modules, packages and platform.
@@ -2664,9 +2688,23 @@ class InfBuildData(ModuleBuildClassObject):
 # @param DbPath             Path of database file
 # @param GlobalMacros       Global macros used for replacement during file parsing
 # @prarm RenewDb=False      Create new database file if it's already there
+# @param InMemoryMetaData   Keep the records of meta files in memory instead
+#                           of database file
 #
 class WorkspaceDatabase(object):
+    # Version of the tables layout, increase it when any table is changed
+    _SCHEMA_VERSION_ = 1
+
+    # Name of the version record in database
+    _VERSION_NAME_ = "DatabaseVersion"
 
+    # Packages whose changes make the parsing result in database out of date.
+    # All python sources in them are checked, so that a new dependency of the
+    # parsers needs not be listed anywhere.
+    _TOOL_PACKAGES_ = ["Workspace", "CommonDataClass", "Common"]
+
+    # Version of schema and tool, got only once
+    _Version = None
 
     #
     # internal class used for call corresponding file parser and caching the result
@@ -2743,9 +2781,10 @@ class WorkspaceDatabase(object):
             MetaFile = self._FILE_PARSER_[FileType](
                                 FilePath, 
                                 FileType, 
-                                MetaFileStorage(self.WorkspaceDb.Cur, FilePath, FileType)
+                                MetaFileStorage(self.WorkspaceDb.MetaFileCur, FilePath, FileType)
                                 )
-            # alwasy do post-process, in case of macros change
+            # alwasy do post-process, in case of macros change. The result of last
+            # post-process is reused if neither the file nor the macros are changed
             MetaFile.DoPostProcess()
             # object the build is based on
             BuildObject = self._GENERATOR_[FileType](
@@ -2773,8 +2812,10 @@ class WorkspaceDatabase(object):
     # @param DbPath             Path of database file
     # @param GlobalMacros       Global macros used for replacement during file parsing
     # @prarm RenewDb=False      Create new database file if it's already there
+    # @param InMemoryMetaData   Keep the records of meta files in memory instead
+    #                           of database file
     #
-    def __init__(self, DbPath, RenewDb=False):
+    def __init__(self, DbPath, RenewDb=False, InMemoryMetaData=False):
         self._DbClosedFlag = False
         if not DbPath:
             DbPath = os.path.normpath(os.path.join(GlobalData.gWorkspace, 'Conf', GlobalData.gDatabasePath))
@@ -2789,17 +2830,20 @@ class WorkspaceDatabase(object):
             if self._CheckWhetherDbNeedRenew(RenewDb, DbPath):
                 os.remove(DbPath)
         
-        # create db with optimized parameters
-        self.Conn = sqlite3.connect(DbPath, isolation_level='DEFERRED')
-        self.Conn.execute("PRAGMA synchronous=OFF")
-        self.Conn.execute("PRAGMA temp_store=MEMORY")
-        self.Conn.execute("PRAGMA count_changes=OFF")
-        self.Conn.execute("PRAGMA cache_size=8192")
-        #self.Conn.execute("PRAGMA page_size=8192")
-
-        # to avoid non-ascii character conversion issue
-        self.Conn.text_factory = str
-        self.Cur = self.Conn.cursor()
+        # the database may be opened again after the current directory is changed
+        if DbPath != ':memory:':
+            DbPath = os.path.abspath(DbPath)
+        self.DbPath = DbPath
+        # connection inherited from parent process, which must not be used or closed
+        self._InheritedConn = None
+        self.Conn = self._Connect('DEFERRED')
+        self.Cur = DatabaseCursor(self.Conn.cursor())
+
+        # storage of the records of meta files
+        if InMemoryMetaData:
+            self.MetaFileCur = MetaFileMemoryStore(self.Cur)
+        else:
+            self.MetaFileCur = self.Cur
 
         # create table for internal uses
         self.TblDataModel = TableDataModel(self.Cur)
@@ -2810,12 +2854,55 @@ class WorkspaceDatabase(object):
         self.BuildObject = WorkspaceDatabase.BuildObjectFactory(self)
         self.TransformObject = WorkspaceDatabase.TransformObjectFactory(self)
 
+    ## Open a connection to the database file
+    #
+    # @param IsolationLevel     The isolation level of connection, None for
+    #                           autocommit mode
+    #
+    def _Connect(self, IsolationLevel):
+        # create db with optimized parameters, queries of each table are done
+        # through a few parameterized statements, keep them compiled
+        # GenFds may use the database in several threads, one at a time
+        Conn = sqlite3.connect(self.DbPath, isolation_level=IsolationLevel, cached_statements=1024, check_same_thread=False)
+        Conn.execute("PRAGMA synchronous=OFF")
+        Conn.execute("PRAGMA temp_store=MEMORY")
+        Conn.execute("PRAGMA count_changes=OFF")
+        Conn.execute("PRAGMA cache_size=8192")
+        #Conn.execute("PRAGMA page_size=8192")
+
+        # to avoid non-ascii character conversion issue
+        Conn.text_factory = str
+        return Conn
+
+    ## Reopen the database in a forked process
+    #
+    # A sqlite connection must not be used across fork, so the forked process
+    # moves all tables to a connection of its own. The connection is in
+    # autocommit mode, so that the processes sharing the database file don't
+    # lock each other out by keeping a transaction open. The changes of parent
+    # must be committed before forking.
+    #
+    def Reopen(self):
+        # a database in memory is copied by fork instead of being shared
+        if self.DbPath == ':memory:' or self._DbClosedFlag:
+            return
+        # keep the inherited connection from being closed in this process,
+        # which would release the file locks of parent
+        self._InheritedConn = self.Conn
+        self.Conn = self._Connect(None)
+        self.Cur.Bind(self.Conn.cursor())
+
     ## Check whether workspace database need to be renew.
     #  The renew reason maybe:
     #  1) If user force to renew;
     #  2) If user do not force renew, and
-    #     a) If the time of last modified python source is newer than database file;
-    #     b) If the time of last modified frozen executable file is newer than database file;
+    #     a) If the database is created in different schema version;
+    #     b) If the database is created by different version of tool, i.e. the
+    #        frozen executable file or the python sources which parse the meta
+    #        files are changed;
+    #
+    #  The version of schema and tool is recorded in database, so the check
+    #  costs the same no matter how many files the tool has.
     #
     #  @param force     User force renew database
     #  @param DbPath    The absolute path of workspace database file
@@ -2828,42 +2915,64 @@ class WorkspaceDatabase(object):
             
         # if user force to renew database, then not check whether database is out of date
         if force: return True
-        
-        #    
-        # Check the time of last modified source file or build.exe
-        # if is newer than time of database, then database need to be re-created.
-        #
-        timeOfToolModified = 0
-        if hasattr(sys, "frozen"):
-            exePath             = os.path.abspath(sys.executable)
-            timeOfToolModified  = os.stat(exePath).st_mtime
-        else:
-            curPath  = os.path.dirname(__file__) # curPath is the path of WorkspaceDatabase.py
-            rootPath = os.path.split(curPath)[0] # rootPath is root path of python source, such as /BaseTools/Source/Python
-            if rootPath == "" or rootPath == None:
-                EdkLogger.verbose("\nFail to find the root path of build.exe or python sources, so can not \
-determine whether database file is out of date!\n")
-        
-            # walk the root path of source or build's binary to get the time last modified.
-        
-            for root, dirs, files in os.walk (rootPath):
-                for dir in dirs:
-                    # bypass source control folder 
-                    if dir.lower() in [".svn", "_svn", "cvs"]:
-                        dirs.remove(dir)
-                        
-                for file in files:
-                    ext = os.path.splitext(file)[1]
-                    if ext.lower() == ".py":            # only check .py files
-                        fd = os.stat(os.path.join(root, file))
-                        if timeOfToolModified < fd.st_mtime:
-                            timeOfToolModified = fd.st_mtime
-        if timeOfToolModified > os.stat(DbPath).st_mtime:
+
+        DbVersion = None
+        try:
+            Conn = sqlite3.connect(DbPath)
+            try:
+                Conn.text_factory = str
+                DbVersion = TableMetaFileCache(Conn.cursor()).GetData(self._VERSION_NAME_)
+            finally:
+                Conn.close()
+        except Exception, Exc:
+            EdkLogger.debug(EdkLogger.DEBUG_5, str(Exc))
+
+        if DbVersion != self._GetVersion():
             EdkLogger.verbose("\nWorkspace database is out of data!")
             return True
-            
+
         return False
-            
+
+    ## Get the version of database schema and tool
+    #
+    #  Only the files of the frozen executable or the python packages which
+    #  decide the content of database are checked.
+    #
+    #  @return (schema version, ((file name, time stamp, size), ...))
+    #
+    def _GetVersion(self):
+        if WorkspaceDatabase._Version != None:
+            return WorkspaceDatabase._Version
+
+        if hasattr(sys, "frozen"):
+            FileList = [os.path.abspath(sys.executable)]
+        else:
+            FileList = []
+            for PackageName in self._TOOL_PACKAGES_:
+                Package = sys.modules.get(PackageName)
+                if Package == None or not hasattr(Package, "__file__"):
+                    continue
+                PackageDir = os.path.dirname(os.path.abspath(Package.__file__))
+                try:
+                    NameList = sorted(os.listdir(PackageDir))
+                except OSError:
+                    continue
+                # compiled files may be missing or out of date, check the sources
+                for Name in NameList:
+                    if os.path.splitext(Name)[1].lower() == ".py":
+                        FileList.append(os.path.join(PackageDir, Name))
+
+        ToolStamp = []
+        for FilePath in FileList:
+            try:
+                FileState = os.stat(FilePath)
+            except OSError:
+                continue
+            FileName = os.path.join(os.path.basename(os.path.dirname(FilePath)), os.path.basename(FilePath))
+            ToolStamp.append((FileName, FileState.st_mtime, FileState.st_size))
+        WorkspaceDatabase._Version = (self._SCHEMA_VERSION_, tuple(ToolStamp))
+        return WorkspaceDatabase._Version
+
     ## Initialize build database
     def InitDatabase(self):
         EdkLogger.verbose("\nInitialize build database started ...")
@@ -2878,6 +2987,14 @@ determine whether database file is out of date!\n")
         # Initialize table DataModel
         #
         self.TblDataModel.InitTable()
+
+        #
+        # Record the version of schema and tool creating the database
+        #
+        TblCache = TableMetaFileCache(self.Cur)
+        if TblCache.GetData(self._VERSION_NAME_) != self._GetVersion():
+            TblCache.SetData(self._VERSION_NAME_, self._GetVersion())
+            self.Conn.commit()
         EdkLogger.verbose("Initialize build database ... DONE!")
 
     ## Query a table
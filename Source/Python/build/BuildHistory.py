@@ -0,0 +1,155 @@
+## @file
+# Routines for keeping the build time history of modules.
+#
+# This module records the wall time and exit status of each module build in
+# multi-thread build mode, and saves them in the build cache directory so that
+# later builds can use them to schedule the longest module chains first and to
+# report the slowest modules.
+#
+# Copyright (c) 2015, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+## Import Modules
+#
+import Common.LongFilePathOs as os
+import threading
+import time
+from Common.Misc import CreateDirectory
+from Common.Misc import DataDump
+from Common.Misc import DataRestore
+
+## The file name of build time history in build cache directory
+gBuildHistoryFileName = "gBuildTimeHistory"
+
+## Version of the history data layout, history in other layout is discarded
+gBuildHistoryVersion = 1
+
+##
+# Build time history of modules
+#
+# Each record is kept in a dictionary keyed by (module path, arch, target,
+# tool chain), and the value is a tuple of (wall time in seconds, exit status,
+# time of the build). Only the latest build of each module is kept.
+#
+class BuildHistory(object):
+    ##
+    # Constructor function for class BuildHistory
+    #
+    # @param self            The object pointer
+    # @param CacheDirectory  The directory to save history in. None means the
+    #                        history is neither loaded nor saved
+    #
+    def __init__(self, CacheDirectory=None):
+        self._Lock = threading.Lock()
+        self._File = None
+        self._Records = {}
+        # average build time of modules in history, None if no history
+        self._Average = None
+        # records of modules built in current build
+        self.CurrentRecords = {}
+        if CacheDirectory:
+            self._File = os.path.join(CacheDirectory, gBuildHistoryFileName)
+            self.Load()
+
+    ##
+    # Get the history key of a module
+    #
+    # @param Ma              The ModuleAutoGen object
+    #
+    # @retval tuple          The key of the module in history
+    #
+    @staticmethod
+    def GetKey(Ma):
+        return (str(Ma.MetaFile), Ma.Arch, Ma.BuildTarget, Ma.ToolChain)
+
+    ##
+    # Load history from the cache directory
+    #
+    # @param self            The object pointer
+    #
+    def Load(self):
+        if not self._File or not os.path.isfile(self._File):
+            return
+        Data = DataRestore(self._File)
+        if type(Data) != type(()) or len(Data) != 2 or Data[0] != gBuildHistoryVersion:
+            return
+        self._Records = Data[1]
+        DurationList = [Record[0] for Record in self._Records.values() if Record[1] == 0]
+        if DurationList:
+            self._Average = sum(DurationList) / len(DurationList)
+
+    ##
+    # Save history to the cache directory
+    #
+    # @param self            The object pointer
+    #
+    def Save(self):
+        if not self._File or not self.CurrentRecords:
+            return
+        CreateDirectory(os.path.dirname(self._File))
+        self._Lock.acquire()
+        try:
+            DataDump((gBuildHistoryVersion, self._Records), self._File)
+        finally:
+            self._Lock.release()
+
+    ##
+    # Record the build result of a module
+    #
+    # This function may be called from any build thread.
+    #
+    # @param self            The object pointer
+    # @param Ma              The ModuleAutoGen object
+    # @param Duration        The wall time of the build in seconds
+    # @param Status          The exit status of the build, 0 for success
+    #
+    def Record(self, Ma, Duration, Status):
+        Key = self.GetKey(Ma)
+        self._Lock.acquire()
+        try:
+            self._Records[Key] = (Duration, Status, time.time())
+            self.CurrentRecords[Key] = (Duration, Status)
+        finally:
+            self._Lock.release()
+
+    ##
+    # Get the last successful build time of a module
+    #
+    # @param self            The object pointer
+    # @param Ma              The ModuleAutoGen object
+    #
+    # @retval float          The wall time in seconds
+    # @retval None           If the module has no successful build in history
+    #
+    def GetDuration(self, Ma):
+        Record = self._Records.get(self.GetKey(Ma))
+        if Record == None or Record[1] != 0:
+            return None
+        return Record[0]
+
+    ##
+    # Get the estimated build time of a module
+    #
+    # Modules never built before are estimated by the average build time of
+    # all modules in history loaded at the beginning of the build.
+    #
+    # @param self            The object pointer
+    # @param Ma              The ModuleAutoGen object
+    # @param Default         The value returned if there's no history at all
+    #
+    # @retval float          The estimated wall time in seconds
+    #
+    def GetEstimate(self, Ma, Default=1.0):
+        Duration = self.GetDuration(Ma)
+        if Duration != None:
+            return Duration
+        if self._Average == None:
+            return Default
+        return self._Average
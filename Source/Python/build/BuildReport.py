@@ -1409,6 +1409,123 @@ class FdReport(object):
 
 
 
+##
+# Reports module build time information
+#
+# This class reports the slowest modules and the critical path of the modules
+# built in multi-thread build mode, according to the build time history.
+#
+class BuildTimeReport(object):
+    ##
+    # Constructor function for class BuildTimeReport
+    #
+    # This constructor function generates BuildTimeReport object for a platform
+    # build.
+    #
+    # @param self            The object pointer
+    # @param Wa              Workspace context information
+    # @param History         The BuildHistory object of the build
+    #
+    def __init__(self, Wa, History):
+        self.ItemList = []
+        self.CriticalPath = []
+        self.TotalTime = 0.0
+        if History == None:
+            return
+
+        #
+        # ModuleAutoGen objects of different arch are equal if they are built
+        # from the same INF, so the history key is used to identify them.
+        #
+        self._History = History
+        self._ModuleDict = {}
+        self._DurationDict = {}
+        for Pa in Wa.AutoGenObjectList:
+            for Ma in Pa.ModuleAutoGenList + Pa.LibraryAutoGenList:
+                Key = History.GetKey(Ma)
+                Record = History.CurrentRecords.get(Key)
+                if Record == None or Key in self._DurationDict:
+                    continue
+                self._ModuleDict[Key] = Ma
+                self._DurationDict[Key] = Record[0]
+                self.ItemList.append((Record[0], Record[1], Ma.Arch, str(Ma)))
+                self.TotalTime += Record[0]
+        self.ItemList.sort(reverse=True)
+
+        #
+        # The finish time of a module is its own build time plus the latest
+        # finish time of the libraries it depends on.
+        #
+        FinishTime = {}
+        Previous = {}
+        for Key in self._DurationDict:
+            self._GetFinishTime(Key, FinishTime, Previous)
+        if FinishTime:
+            Key = max(FinishTime, key=lambda Item: FinishTime[Item])
+            while Key != None:
+                Ma = self._ModuleDict[Key]
+                self.CriticalPath.insert(0, (FinishTime[Key], self._DurationDict[Key], Ma.Arch, str(Ma)))
+                Key = Previous[Key]
+
+    ##
+    # Calculate the finish time of a module in an ideal parallel build
+    #
+    # @param self            The object pointer
+    # @param Key             The history key of the module
+    # @param FinishTime      The dictionary of calculated finish time
+    # @param Previous        The dictionary of the library on critical path of a module
+    #
+    def _GetFinishTime(self, Key, FinishTime, Previous):
+        if Key in FinishTime:
+            return FinishTime[Key]
+        Start = 0.0
+        Previous[Key] = None
+        for La in self._ModuleDict[Key].LibraryAutoGenList:
+            LibraryKey = self._History.GetKey(La)
+            if LibraryKey not in self._DurationDict:
+                continue
+            LibraryFinish = self._GetFinishTime(LibraryKey, FinishTime, Previous)
+            if LibraryFinish > Start:
+                Start = LibraryFinish
+                Previous[Key] = LibraryKey
+        FinishTime[Key] = Start + self._DurationDict[Key]
+        return FinishTime[Key]
+
+    ##
+    # Generate report for module build time
+    #
+    # @param self            The object pointer
+    # @param File            The file object for report
+    # @param MaxNumber       The maximum number of slowest modules to report
+    #
+    def GenerateReport(self, File, MaxNumber=20):
+        if len(self.ItemList) == 0:
+            return
+        FileWrite(File, gSectionStart)
+        FileWrite(File, "Module Build Time")
+        FileWrite(File, "Modules Built:        %d" % len(self.ItemList))
+        FileWrite(File, "Total Module Time:    %.2fs" % self.TotalTime)
+        if self.CriticalPath:
+            FileWrite(File, "Critical Path Time:   %.2fs" % self.CriticalPath[-1][0])
+
+        FileWrite(File, gSubSectionStart)
+        FileWrite(File, "Slowest Modules")
+        FileWrite(File, gSubSectionSep)
+        FileWrite(File, "%10s %-6s %-8s %s" % ("Time(s)", "Status", "Arch", "Module INF Path"))
+        for (Duration, Status, Arch, Path) in self.ItemList[:MaxNumber]:
+            FileWrite(File, "%10.2f %-6s %-8s %s" % (Duration, Status == 0 and "PASS" or "FAIL", Arch, Path))
+        FileWrite(File, gSubSectionEnd)
+
+        FileWrite(File, gSubSectionStart)
+        FileWrite(File, "Critical Path")
+        FileWrite(File, gSubSectionSep)
+        FileWrite(File, "%10s %10s %-8s %s" % ("Finish(s)", "Time(s)", "Arch", "Module INF Path"))
+        for (Finish, Duration, Arch, Path) in self.CriticalPath:
+            FileWrite(File, "%10.2f %10.2f %-8s %s" % (Finish, Duration, Arch, Path))
+        FileWrite(File, gSubSectionEnd)
+
+        FileWrite(File, gSectionEnd)
+
 ##
 # Reports platform information
 #
@@ -1425,8 +1542,9 @@ class PlatformReport(object):
     # @param self            The object pointer
     # @param Wa              Workspace context information
     # @param MaList          The list of modules in the platform build
+    # @param History         The BuildHistory object of the build
     #
-    def __init__(self, Wa, MaList, ReportType):
+    def __init__(self, Wa, MaList, ReportType, History=None):
         self._WorkspaceDir = Wa.WorkspaceDir
         self.PlatformName = Wa.Name
         self.PlatformDscPath = Wa.Platform
@@ -1452,6 +1570,10 @@ class PlatformReport(object):
         self.DepexParser = None
         if "DEPEX" in ReportType:
             self.DepexParser = DepexParser(Wa)
+
+        self.BuildTimeReport = None
+        if "BUILD_TIME" in ReportType and MaList == None:
+            self.BuildTimeReport = BuildTimeReport(Wa, History)
             
         self.ModuleReportList = []
         if MaList != None:
@@ -1505,6 +1627,9 @@ class PlatformReport(object):
             if "EXECUTION_ORDER" in ReportType:
                 self.PredictionReport.GenerateReport(File, None)
 
+            if "BUILD_TIME" in ReportType:
+                self.BuildTimeReport.GenerateReport(File)
+
 ## BuildReport class
 #
 #  This base class contain the routines to collect data and then
@@ -1524,6 +1649,7 @@ class BuildReport(object):
     #
     def __init__(self, ReportFile, ReportType):
         self.ReportFile = ReportFile
+        self.BuildHistory = None
         if ReportFile:
             self.ReportList = []
             self.ReportType = []
@@ -1534,6 +1660,15 @@ class BuildReport(object):
             else:
                 self.ReportType = ["PCD", "LIBRARY", "BUILD_FLAGS", "DEPEX", "FLASH", "FIXED_ADDRESS"]
     ##
+    # Sets the build time history used by BUILD_TIME report
+    #
+    # @param self            The object pointer
+    # @param History         The BuildHistory object of the build
+    #
+    def SetBuildHistory(self, History):
+        self.BuildHistory = History
+
+    ##
     # Adds platform report to the list
     #
     # This function adds a platform report to the final report list.
@@ -1560,7 +1695,7 @@ class BuildReport(object):
             try:
                 File = StringIO('')
                 for (Wa, MaList) in self.ReportList:
-                    PlatformReport(Wa, MaList, self.ReportType).GenerateReport(File, BuildDuration, self.ReportType)
+                    PlatformReport(Wa, MaList, self.ReportType, self.BuildHistory).GenerateReport(File, BuildDuration, self.ReportType)
                 Content = FileLinesSplit(File.getvalue(), gLineMaxLength)
                 SaveFileOnChange(self.ReportFile, Content, True)
                 EdkLogger.quiet("Build report can be found at %s" % os.path.abspath(self.ReportFile))
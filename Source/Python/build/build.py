@@ -24,10 +24,13 @@ import glob
 import time
 import platform
 import traceback
+import signal
+import multiprocessing
 import encodings.ascii
 
 from struct import *
 from threading import *
+from heapq import heappush, heappop
 from optparse import OptionParser
 from subprocess import *
 from Common import Misc as Utils
@@ -43,6 +46,7 @@ from Common.BuildToolError import *
 from Workspace.WorkspaceDatabase import *
 
 from BuildReport import BuildReport
+from BuildHistory import BuildHistory
 from GenPatchPcdTable.GenPatchPcdTable import *
 from PatchPcdValue.PatchPcdValue import *
 
@@ -297,6 +301,51 @@ def LaunchCommand(Command, WorkingDir):
             Command = " ".join(Command)
         EdkLogger.error("build", COMMAND_FAILURE, ExtraData="%s [%s]" % (Command, WorkingDir))
 
+## AutoGen objects shared with AutoGen worker processes
+#
+# The worker processes are forked after this list is ready, so that they inherit
+# the parsed meta-data and the AutoGen objects instead of parsing them again.
+#
+gAutoGenObjectList = []
+
+## Initialize an AutoGen worker process
+#
+# Ctrl-C is left to the main process, which terminates the worker pool. The
+# worker opens the workspace database again, because the connection of the
+# main process must not be used across fork.
+#
+# @param  Db                    The WorkspaceDatabase object of main process
+#
+def AutoGenWorkerInit(Db):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    Db.Reopen()
+
+## Create AutoGen code and makefile of a module in an AutoGen worker process
+#
+# Only the module itself is generated. Its libraries are separate items in
+# gAutoGenObjectList so that no file is generated by two processes.
+#
+# @param  Task                  A tuple of (index in gAutoGenObjectList, flag of
+#                               creating code files, flag of creating makefile)
+#
+# @retval tuple                 (index, DepexGenerated, error code, error info,
+#                               include cache entries scanned by the worker)
+#
+def AutoGenWorker(Task):
+    Index, CreateCodeFile, CreateMakeFile = Task
+    Ma = gAutoGenObjectList[Index]
+    GlobalData.gGlobalDefines['ARCH'] = Ma.Arch
+    try:
+        if CreateCodeFile:
+            Ma.CreateCodeFile(False)
+        if CreateMakeFile:
+            Ma.CreateMakeFile(False)
+    except FatalError, X:
+        return (Index, False, X.args[0], repr(Ma), {})
+    except:
+        return (Index, False, CODE_ERROR, "%s\n%s" % (repr(Ma), traceback.format_exc()), {})
+    return (Index, Ma.DepexGenerated, 0, '', Utils.gIncludeCache.PopNewEntries())
+
 ## The smallest unit that can be built in multi-thread build mode
 #
 # This is the base class of build unit. The "Obj" parameter must provide
@@ -407,29 +456,39 @@ class PlatformMakeUnit(BuildUnit):
 # This class manages the build tasks in multi-thread build mode. Its jobs include
 # scheduling thread running, catching thread error, monitor the thread status, etc.
 #
+# The scheduler is event driven. Each task counts its unfinished dependencies
+# and keeps a list of the tasks depending on it. When a task completes, the
+# counters of its dependents are decreased and those reaching zero are moved
+# into the ready queue at once. Ready tasks are started in the order of their
+# critical path, i.e. the longest chain of estimated build time from the task
+# to the end of the build, so that long library chains start as early as
+# possible.
+#
 class BuildTask:
-    # queue for tasks waiting for schedule
+    # queue for tasks waiting for their dependencies
     _PendingQueue = sdict()
-    _PendingQueueLock = threading.Lock()
 
-    # queue for tasks ready for running
-    _ReadyQueue = sdict()
-    _ReadyQueueLock = threading.Lock()
+    # heap of [-CriticalPath, Sequence, BuildTask] for tasks ready for running
+    _ReadyQueue = []
+    _ReadySequence = 0
 
     # queue for run tasks
     _RunningQueue = sdict()
-    _RunningQueueLock = threading.Lock()
 
     # queue containing all build tasks, in case duplicate build
     _TaskQueue = sdict()
 
+    # lock protecting all queues above, notified on any scheduling event
+    _SchedulerCondition = threading.Condition(threading.RLock())
+
     # flag indicating error occurs in a running thread
     _ErrorFlag = threading.Event()
     _ErrorFlag.clear()
     _ErrorMessage = ""
 
-    # BoundedSemaphore object used to control the number of running threads
-    _Thread = None
+    # build time history of modules, used to weight critical path
+    _DefaultCost = 1.0
+    _History = None
 
     # flag indicating if the scheduler is started or not
     _SchedulerStopped = threading.Event()
@@ -442,100 +501,121 @@ class BuildTask:
     #
     @staticmethod
     def StartScheduler(MaxThreadNumber, ExitFlag):
+        # mark the scheduler started before the thread runs so that callers
+        # never see a stale "stopped" state
+        BuildTask._SchedulerStopped.clear()
         SchedulerThread = Thread(target=BuildTask.Scheduler, args=(MaxThreadNumber, ExitFlag))
         SchedulerThread.setName("Build-Task-Scheduler")
         SchedulerThread.setDaemon(False)
         SchedulerThread.start()
-        # wait for the scheduler to be started, especially useful in Linux
-        while not BuildTask.IsOnGoing():
-            time.sleep(0.01)
 
     ## Scheduler method
     #
+    #   The scheduler sleeps on _SchedulerCondition and is only woken up when
+    #   a task is added, a task completes, or the build is asked to stop.
+    #
     #   @param  MaxThreadNumber     The maximum thread number
     #   @param  ExitFlag            Flag used to end the scheduler
     #
     @staticmethod
     def Scheduler(MaxThreadNumber, ExitFlag):
         BuildTask._SchedulerStopped.clear()
+        Condition = BuildTask._SchedulerCondition
+        Condition.acquire()
         try:
-            # use BoundedSemaphore to control the maximum running threads
-            BuildTask._Thread = BoundedSemaphore(MaxThreadNumber)
-            #
-            # scheduling loop, which will exits when no pending/ready task and
-            # indicated to do so, or there's error in running thread
-            #
-            while (len(BuildTask._PendingQueue) > 0 or len(BuildTask._ReadyQueue) > 0 \
-                   or not ExitFlag.isSet()) and not BuildTask._ErrorFlag.isSet():
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Pending Queue (%d), Ready Queue (%d)"
-                                % (len(BuildTask._PendingQueue), len(BuildTask._ReadyQueue)))
-
-                # get all pending tasks
-                BuildTask._PendingQueueLock.acquire()
-                BuildObjectList = BuildTask._PendingQueue.keys()
+            try:
                 #
-                # check if their dependency is resolved, and if true, move them
-                # into ready queue
+                # scheduling loop, which will exits when no pending/ready task and
+                # indicated to do so, or there's error in running thread
                 #
-                for BuildObject in BuildObjectList:
-                    Bt = BuildTask._PendingQueue[BuildObject]
-                    if Bt.IsReady():
-                        BuildTask._ReadyQueue[BuildObject] = BuildTask._PendingQueue.pop(BuildObject)
-                BuildTask._PendingQueueLock.release()
-
-                # launch build thread until the maximum number of threads is reached
                 while not BuildTask._ErrorFlag.isSet():
-                    # empty ready queue, do nothing further
-                    if len(BuildTask._ReadyQueue) == 0:
-                        break
+                    EdkLogger.debug(EdkLogger.DEBUG_8, "Pending Queue (%d), Ready Queue (%d), Running Queue (%d)"
+                                    % (len(BuildTask._PendingQueue), len(BuildTask._ReadyQueue), len(BuildTask._RunningQueue)))
 
-                    # wait for active thread(s) exit
-                    BuildTask._Thread.acquire(True)
-
-                    # start a new build thread
-                    Bo = BuildTask._ReadyQueue.keys()[0]
-                    Bt = BuildTask._ReadyQueue.pop(Bo)
-
-                    # move into running queue
-                    BuildTask._RunningQueueLock.acquire()
-                    BuildTask._RunningQueue[Bo] = Bt
-                    BuildTask._RunningQueueLock.release()
-
-                    Bt.Start()
-                    # avoid tense loop
-                    time.sleep(0.01)
-
-                # avoid tense loop
-                time.sleep(0.01)
-
-            # wait for all running threads exit
-            if BuildTask._ErrorFlag.isSet():
-                EdkLogger.quiet("\nWaiting for all build threads exit...")
-            # while not BuildTask._ErrorFlag.isSet() and \
-            while len(BuildTask._RunningQueue) > 0:
-                EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Threads [%s]" % ", ".join([Th.getName() for Th in threading.enumerate()]))
-                # avoid tense loop
-                time.sleep(0.1)
-        except BaseException, X:
-            #
-            # TRICK: hide the output of threads left runing, so that the user can
-            #        catch the error message easily
-            #
-            EdkLogger.SetLevel(EdkLogger.ERROR)
-            BuildTask._ErrorFlag.set()
-            BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
+                    # launch build thread until the maximum number of threads is reached
+                    while len(BuildTask._ReadyQueue) > 0 and len(BuildTask._RunningQueue) < MaxThreadNumber:
+                        Bt = BuildTask._PopReadyTask()
+                        if Bt == None:
+                            continue
+                        BuildTask._RunningQueue[Bt.BuildItem] = Bt
+                        Bt.Start()
 
-        BuildTask._PendingQueue.clear()
-        BuildTask._ReadyQueue.clear()
-        BuildTask._RunningQueue.clear()
-        BuildTask._TaskQueue.clear()
+                    if ExitFlag.isSet() and len(BuildTask._ReadyQueue) == 0:
+                        if len(BuildTask._PendingQueue) == 0:
+                            break
+                        if len(BuildTask._RunningQueue) == 0:
+                            raise Exception("unresolvable dependency of %s" % ", ".join(
+                                                [str(Bo) for Bo in BuildTask._PendingQueue]))
+
+                    Condition.wait()
+
+                # wait for all running threads exit
+                if BuildTask._ErrorFlag.isSet():
+                    EdkLogger.quiet("\nWaiting for all build threads exit...")
+                while len(BuildTask._RunningQueue) > 0:
+                    EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
+                    EdkLogger.debug(EdkLogger.DEBUG_8, "Threads [%s]" % ", ".join([Th.getName() for Th in threading.enumerate()]))
+                    Condition.wait()
+            except BaseException, X:
+                #
+                # TRICK: hide the output of threads left runing, so that the user can
+                #        catch the error message easily
+                #
+                EdkLogger.SetLevel(EdkLogger.ERROR)
+                BuildTask._ErrorFlag.set()
+                BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
+
+            BuildTask._PendingQueue.clear()
+            BuildTask._ReadyQueue = []
+            BuildTask._RunningQueue.clear()
+            BuildTask._TaskQueue.clear()
+        finally:
+            Condition.release()
         BuildTask._SchedulerStopped.set()
 
+    ## Wake up the scheduler to re-check its queues and exit conditions
+    #
+    @staticmethod
+    def _Notify():
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            BuildTask._SchedulerCondition.notifyAll()
+        finally:
+            BuildTask._SchedulerCondition.release()
+
+    ## Put a task, whose dependencies are all completed, into ready queue
+    #
+    #   The caller must hold _SchedulerCondition.
+    #
+    @staticmethod
+    def _PushReadyTask(Bt):
+        BuildTask._ReadySequence += 1
+        heappush(BuildTask._ReadyQueue, [-Bt.CriticalPath, BuildTask._ReadySequence, Bt])
+
+    ## Get the ready task with the longest critical path
+    #
+    #   The critical path of a task may have grown since it was queued, because
+    #   new dependents can still be added. Such an entry is queued again with its
+    #   current value instead of being returned. The caller must hold
+    #   _SchedulerCondition.
+    #
+    #   @retval BuildTask   The task to run, or None if the entry was re-queued
+    #
+    @staticmethod
+    def _PopReadyTask():
+        Entry = heappop(BuildTask._ReadyQueue)
+        Bt = Entry[2]
+        if -Entry[0] < Bt.CriticalPath:
+            BuildTask._PushReadyTask(Bt)
+            return None
+        return Bt
+
     ## Wait for all running method exit
     #
     @staticmethod
     def WaitForComplete():
+        # the exit or error flag may have just been set; let the scheduler see it
+        BuildTask._Notify()
         BuildTask._SchedulerStopped.wait()
 
     ## Check if the scheduler is running or not
@@ -569,29 +649,56 @@ class BuildTask:
     def GetErrorMessage():
         return BuildTask._ErrorMessage
 
+    ## Set the build time history used to estimate and record build time
+    #
+    #   @param  History         A BuildHistory object, or None
+    #
+    @staticmethod
+    def SetHistory(History):
+        BuildTask._History = History
+
+    ## Get the estimated build time of a build unit
+    #
+    #   @param  BuildItem       A BuildUnit object
+    #
+    #   @retval float           Estimated cost used to weight the critical path
+    #
+    @staticmethod
+    def GetCost(BuildItem):
+        if BuildTask._History == None:
+            return BuildTask._DefaultCost
+        return BuildTask._History.GetEstimate(BuildItem.BuildObject, BuildTask._DefaultCost)
+
     ## Factory method to create a BuildTask object
     #
     #   This method will check if a module is building or has been built. And if
     #   true, just return the associated BuildTask object in the _TaskQueue. If
     #   not, create and return a new BuildTask object. The new BuildTask object
-    #   will be appended to the _PendingQueue for scheduling later.
+    #   will be appended to the _PendingQueue, or to the _ReadyQueue directly if
+    #   it has no unfinished dependency.
     #
     #   @param  BuildItem       A BuildUnit object representing a build object
     #   @param  Dependency      The dependent build object of BuildItem
     #
     @staticmethod
     def New(BuildItem, Dependency=None):
-        if BuildItem in BuildTask._TaskQueue:
-            Bt = BuildTask._TaskQueue[BuildItem]
-            return Bt
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            if BuildItem in BuildTask._TaskQueue:
+                Bt = BuildTask._TaskQueue[BuildItem]
+                return Bt
 
-        Bt = BuildTask()
-        Bt._Init(BuildItem, Dependency)
-        BuildTask._TaskQueue[BuildItem] = Bt
+            Bt = BuildTask()
+            Bt._Init(BuildItem, Dependency)
+            BuildTask._TaskQueue[BuildItem] = Bt
 
-        BuildTask._PendingQueueLock.acquire()
-        BuildTask._PendingQueue[BuildItem] = Bt
-        BuildTask._PendingQueueLock.release()
+            if Bt.UnfinishedDependency == 0:
+                BuildTask._PushReadyTask(Bt)
+            else:
+                BuildTask._PendingQueue[BuildItem] = Bt
+            BuildTask._SchedulerCondition.notifyAll()
+        finally:
+            BuildTask._SchedulerCondition.release()
 
         return Bt
 
@@ -604,25 +711,26 @@ class BuildTask:
         self.BuildItem = BuildItem
 
         self.DependencyList = []
+        # tasks which cannot start before this one completes
+        self.DependentList = []
+        # number of tasks in DependencyList which are not completed yet
+        self.UnfinishedDependency = 0
+        # estimated build time of this task and of the longest chain after it
+        self.Cost = BuildTask.GetCost(BuildItem)
+        self.CriticalPath = self.Cost
+        # flag indicating build completes, used to avoid unnecessary re-build
+        self.CompleteFlag = False
+
         if Dependency == None:
             Dependency = BuildItem.Dependency
         else:
             Dependency.extend(BuildItem.Dependency)
         self.AddDependency(Dependency)
-        # flag indicating build completes, used to avoid unnecessary re-build
-        self.CompleteFlag = False
 
     ## Check if all dependent build tasks are completed or not
     #
     def IsReady(self):
-        ReadyFlag = True
-        for Dep in self.DependencyList:
-            if Dep.CompleteFlag == True:
-                continue
-            ReadyFlag = False
-            break
-
-        return ReadyFlag
+        return self.UnfinishedDependency == 0
 
     ## Add dependent build task
     #
@@ -631,7 +739,43 @@ class BuildTask:
     def AddDependency(self, Dependency):
         for Dep in Dependency:
             if not Dep.BuildObject.IsBinaryModule:
-                self.DependencyList.append(BuildTask.New(Dep))    # BuildTask list
+                DepTask = BuildTask.New(Dep)
+                if DepTask in self.DependencyList:
+                    continue
+                self.DependencyList.append(DepTask)    # BuildTask list
+                DepTask.DependentList.append(self)
+                if not DepTask.CompleteFlag:
+                    self.UnfinishedDependency += 1
+                DepTask._UpdateCriticalPath(self.CriticalPath)
+
+    ## Propagate a longer critical path of a dependent to this task and its dependencies
+    #
+    #   Dependents are only ever added, so critical paths never shrink and the
+    #   propagation stops as soon as a task's value is not increased.
+    #
+    #   @param  DependentPath   The critical path of one of the dependents
+    #
+    def _UpdateCriticalPath(self, DependentPath):
+        TaskList = [(self, DependentPath)]
+        while TaskList:
+            Bt, Path = TaskList.pop()
+            if Bt.Cost + Path <= Bt.CriticalPath:
+                continue
+            Bt.CriticalPath = Bt.Cost + Path
+            for Dep in Bt.DependencyList:
+                TaskList.append((Dep, Bt.CriticalPath))
+
+    ## Mark the task completed and release the dependents waiting for it
+    #
+    #   The caller must hold _SchedulerCondition.
+    #
+    def _Complete(self):
+        self.CompleteFlag = True
+        for Bt in self.DependentList:
+            Bt.UnfinishedDependency -= 1
+            if Bt.UnfinishedDependency == 0 and Bt.BuildItem in BuildTask._PendingQueue:
+                BuildTask._PendingQueue.pop(Bt.BuildItem)
+                BuildTask._PushReadyTask(Bt)
 
     ## The thread wrapper of LaunchCommand function
     #
@@ -639,9 +783,11 @@ class BuildTask:
     # @param  WorkingDir            The directory in which the program will be running
     #
     def _CommandThread(self, Command, WorkingDir):
+        Success = False
+        StartTime = time.time()
         try:
             LaunchCommand(Command, WorkingDir)
-            self.CompleteFlag = True
+            Success = True
         except:
             #
             # TRICK: hide the output of threads left runing, so that the user can
@@ -657,11 +803,17 @@ class BuildTask:
             BuildTask._ErrorFlag.set()
             BuildTask._ErrorMessage = "%s broken\n    %s [%s]" % \
                                       (threading.currentThread().getName(), Command, WorkingDir)
+        if BuildTask._History != None:
+            BuildTask._History.Record(self.BuildItem.BuildObject, time.time() - StartTime, int(not Success))
         # indicate there's a thread is available for another build task
-        BuildTask._RunningQueueLock.acquire()
-        BuildTask._RunningQueue.pop(self.BuildItem)
-        BuildTask._RunningQueueLock.release()
-        BuildTask._Thread.release()
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            if Success:
+                self._Complete()
+            BuildTask._RunningQueue.pop(self.BuildItem)
+            BuildTask._SchedulerCondition.notifyAll()
+        finally:
+            BuildTask._SchedulerCondition.release()
 
     ## Start build task thread
     #
@@ -730,11 +882,15 @@ class Build():
         self.CapList        = BuildOptions.CapName
         self.SilentMode     = BuildOptions.SilentMode
         self.ThreadNumber   = BuildOptions.ThreadNumber
+        self.PipelineBuild  = BuildOptions.PipelineBuild
+        self.AutoGenJobs    = BuildOptions.AutoGenJobs
         self.SkipAutoGen    = BuildOptions.SkipAutoGen
         self.Reparse        = BuildOptions.Reparse
+        self.DisableCache   = BuildOptions.DisableCache
         self.SkuId          = BuildOptions.SkuId
         self.ConfDirectory = BuildOptions.ConfDirectory
         self.SpawnMode      = True
+        self.BuildHistory   = None
         self.BuildReport    = BuildReport(BuildOptions.ReportFile, BuildOptions.ReportType)
         self.TargetTxt      = TargetTxtClassObject()
         self.ToolDef        = ToolDefClassObject()
@@ -755,10 +911,17 @@ class Build():
         GlobalData.gConfDirectory = ConfDirectoryPath
         GlobalData.gDatabasePath = os.path.normpath(os.path.join(ConfDirectoryPath, GlobalData.gDatabasePath))
 
+        InMemoryMetaData = BuildOptions.MetaDataStorage == 'memory'
         if BuildOptions.DisableCache:
-            self.Db         = WorkspaceDatabase(":memory:")
+            self.Db         = WorkspaceDatabase(":memory:", InMemoryMetaData=InMemoryMetaData)
+            self.BuildHistory = BuildHistory()
         else:
-            self.Db = WorkspaceDatabase(GlobalData.gDatabasePath, self.Reparse)
+            self.Db = WorkspaceDatabase(GlobalData.gDatabasePath, self.Reparse, InMemoryMetaData)
+            self.BuildHistory = BuildHistory(os.path.dirname(GlobalData.gDatabasePath))
+            if not self.Reparse:
+                self.RestoreBuildData()
+        self.BuildReport.SetBuildHistory(self.BuildHistory)
+        BuildTask.SetHistory(self.BuildHistory)
         self.BuildDatabase = self.Db.BuildObject
         self.Platform = None
         self.LoadFixAddress = 0
@@ -1590,21 +1753,21 @@ class Build():
                 # multi-thread exit flag
                 ExitFlag = threading.Event()
                 ExitFlag.clear()
+
+                # generate AutoGen code and makefiles of all archs in worker processes
+                ModulesQueued = False
+                if self.AutoGenJobs > 1 and not GlobalData.gIsWindows:
+                    ModulesQueued = self._ParallelAutoGen(Wa, ExitFlag)
+
                 for Arch in Wa.ArchList:
                     GlobalData.gGlobalDefines['ARCH'] = Arch
                     Pa = PlatformAutoGen(Wa, self.PlatformFile, BuildTarget, ToolChain, Arch)
                     if Pa == None:
                         continue
-                    ModuleList = []
-                    for Inf in Pa.Platform.Modules:
-                        ModuleList.append(Inf)
-                    # Add the INF only list in FDF
-                    if GlobalData.gFdfParser != None:
-                        for InfName in GlobalData.gFdfParser.Profile.InfList:
-                            Inf = PathClass(NormPath(InfName), self.WorkspaceDir, Arch)
-                            if Inf in Pa.Platform.Modules:
-                                continue
-                            ModuleList.append(Inf)
+                    # build messages would mix with progress characters
+                    if self.PipelineBuild:
+                        self.Progress.Stop("done!")
+                    ModuleList = self._GetPlatformModuleList(Pa, Arch)
                     for Module in ModuleList:
                         # Get ModuleAutoGen object to generate C code file and makefile
                         Ma = ModuleAutoGen(Wa, Module, BuildTarget, ToolChain, Arch, self.PlatformFile)
@@ -1624,22 +1787,14 @@ class Build():
                             if self.Target == "genmake":
                                 continue
                         self.BuildModules.append(Ma)
+                        # hand the module to scheduler as soon as its files are ready
+                        if self.PipelineBuild and not ModulesQueued:
+                            self._AddBuildTask(Ma, Pa, ExitFlag)
                     self.Progress.Stop("done!")
 
-                    for Ma in self.BuildModules:
-                        # Generate build task for the module
-                        if not Ma.IsBinaryModule:
-                            Bt = BuildTask.New(ModuleMakeUnit(Ma, self.Target))
-                        # Break build if any build thread has error
-                        if BuildTask.HasError():
-                            # we need a full version of makefile for platform
-                            ExitFlag.set()
-                            BuildTask.WaitForComplete()
-                            Pa.CreateMakeFile(False)
-                            EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
-                        # Start task scheduler
-                        if not BuildTask.IsOnGoing():
-                            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag)
+                    if not self.PipelineBuild:
+                        for Ma in self.BuildModules:
+                            self._AddBuildTask(Ma, Pa, ExitFlag)
 
                     # in case there's an interruption. we need a full version of makefile for platform
                     Pa.CreateMakeFile(False)
@@ -1647,11 +1802,15 @@ class Build():
                         EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
 
                 #
-                # Save temp tables to a TmpTableDict.
+                # Save temp tables to a TmpTableDict. The tables kept for later
+                # builds, like the post-process result of DSC, are not temporary.
+                # The tables in memory are not in database file.
                 #
                 for Key in Wa.BuildDatabase._CACHE_:
                     if Wa.BuildDatabase._CACHE_[Key]._RawData and Wa.BuildDatabase._CACHE_[Key]._RawData._Table and Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Table:
-                        if TemporaryTablePattern.match(Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Table):
+                        if Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Temporary and \
+                           not Wa.BuildDatabase._CACHE_[Key]._RawData._Table.InMemory and \
+                           TemporaryTablePattern.match(Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Table):
                             TmpTableDict[Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Table] = Wa.BuildDatabase._CACHE_[Key]._RawData._Table.Cur
                 #
                 #
@@ -1709,6 +1868,151 @@ class Build():
                     #
                     self._SaveMapFile(MapBuffer, Wa)
 
+    ## Put a module into build task queue and start the scheduler if it's not running
+    #
+    #   @param  Ma              The ModuleAutoGen object whose files are generated
+    #   @param  Pa              The PlatformAutoGen object of the module
+    #   @param  ExitFlag        Flag used to end the scheduler
+    #
+    def _AddBuildTask(self, Ma, Pa, ExitFlag):
+        # Generate build task for the module
+        if not Ma.IsBinaryModule:
+            Bt = BuildTask.New(ModuleMakeUnit(Ma, self.Target))
+        # Break build if any build thread has error
+        if BuildTask.HasError():
+            # we need a full version of makefile for platform
+            ExitFlag.set()
+            BuildTask.WaitForComplete()
+            Pa.CreateMakeFile(False)
+            EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
+        # Start task scheduler
+        if not BuildTask.IsOnGoing():
+            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag)
+
+    ## Get the modules of a platform to be built, including INF files only listed in FDF
+    #
+    #   @param  Pa              The PlatformAutoGen object
+    #   @param  Arch            The arch of the platform
+    #
+    #   @retval list            The list of module PathClass objects
+    #
+    def _GetPlatformModuleList(self, Pa, Arch):
+        ModuleList = []
+        for Inf in Pa.Platform.Modules:
+            ModuleList.append(Inf)
+        # Add the INF only list in FDF
+        if GlobalData.gFdfParser != None:
+            for InfName in GlobalData.gFdfParser.Profile.InfList:
+                Inf = PathClass(NormPath(InfName), self.WorkspaceDir, Arch)
+                if Inf in Pa.Platform.Modules:
+                    continue
+                ModuleList.append(Inf)
+        return ModuleList
+
+    ## Create AutoGen code and makefiles of all modules in AutoGen worker processes
+    #
+    #   The ModuleAutoGen objects of modules and libraries of all archs are
+    #   created in main process first, then generated exactly once each by a
+    #   pool of forked processes which inherit the parsed meta-data. The main
+    #   process only marks them as generated, so the following build steps skip
+    #   the generation.
+    #
+    #   In pipelined build mode, a module is put into build task queue once it
+    #   and all its libraries are generated.
+    #
+    #   @param  Wa              The WorkspaceAutoGen object
+    #   @param  ExitFlag        Flag used to end the scheduler
+    #
+    #   @retval True            If the modules are put into build task queue
+    #   @retval False           If the modules are not put into the queue
+    #
+    def _ParallelAutoGen(self, Wa, ExitFlag):
+        global gAutoGenObjectList
+
+        if self.Target in ['clean', 'cleanlib', 'cleanall', 'run', 'fds']:
+            return False
+        CreateCodeFile = not self.SkipAutoGen or self.Target == 'genc'
+        CreateMakeFile = (not self.SkipAutoGen or self.Target == 'genmake') and self.Target != 'genc'
+        if not CreateCodeFile and not CreateMakeFile:
+            return False
+
+        gAutoGenObjectList = []
+        AutoGenObjectSet = set()
+        # modules to build in pipelined mode: {key : [Ma, Pa, keys of itself and libraries not generated]}
+        WaitingModules = {}
+        # {key of module or library : [keys of modules waiting for it]}
+        WaitingUsers = {}
+        PipelineBuild = self.PipelineBuild and self.Target not in ['genc', 'genmake']
+        for Arch in Wa.ArchList:
+            GlobalData.gGlobalDefines['ARCH'] = Arch
+            Pa = PlatformAutoGen(Wa, self.PlatformFile, Wa.BuildTarget, Wa.ToolChain, Arch)
+            if Pa == None:
+                continue
+            # make sure libraries know all modules referencing them before forking
+            Pa.LibraryAutoGenList
+            for Module in self._GetPlatformModuleList(Pa, Arch):
+                Ma = ModuleAutoGen(Wa, Module, Wa.BuildTarget, Wa.ToolChain, Arch, self.PlatformFile)
+                if Ma == None:
+                    continue
+                ModuleKey = (str(Ma), Ma.Arch)
+                if PipelineBuild and ModuleKey not in WaitingModules:
+                    WaitingModules[ModuleKey] = [Ma, Pa, set()]
+                for AutoGenObject in Ma.LibraryAutoGenList + [Ma]:
+                    Key = (str(AutoGenObject), AutoGenObject.Arch)
+                    if PipelineBuild:
+                        WaitingModules[ModuleKey][2].add(Key)
+                        WaitingUsers.setdefault(Key, []).append(ModuleKey)
+                    if Key in AutoGenObjectSet:
+                        continue
+                    AutoGenObjectSet.add(Key)
+                    gAutoGenObjectList.append(AutoGenObject)
+
+        # workers open the database again, and must see all records parsed so far
+        self.Db.Conn.commit()
+        # workers only report include cache entries they scan by themselves
+        Utils.gIncludeCache.PopNewEntries()
+
+        TaskList = [(Index, CreateCodeFile, CreateMakeFile) for Index in range(len(gAutoGenObjectList))]
+        # no thread should be writing console when forking
+        self.Progress.Stop("done!")
+        sys.stdout.flush()
+        Pool = multiprocessing.Pool(self.AutoGenJobs, AutoGenWorkerInit, (self.Db,))
+        # build messages would mix with progress characters in pipelined mode
+        if not PipelineBuild:
+            self.Progress.Start("Generating code and makefiles in %d processes" % self.AutoGenJobs)
+        try:
+            for Index, DepexGenerated, ErrorCode, ErrorInfo, IncludeEntries in Pool.imap_unordered(AutoGenWorker, TaskList):
+                if ErrorCode != 0:
+                    EdkLogger.error("build", ErrorCode, "Failed to generate AutoGen files", ExtraData=ErrorInfo)
+                Utils.gIncludeCache.Merge(IncludeEntries)
+                AutoGenObject = gAutoGenObjectList[Index]
+                AutoGenObject.DepexGenerated = DepexGenerated
+                if CreateCodeFile:
+                    AutoGenObject.IsCodeFileCreated = True
+                if CreateMakeFile:
+                    AutoGenObject.IsMakeFileCreated = True
+                if not PipelineBuild:
+                    continue
+
+                # start building modules which don't wait for any generation
+                Key = (str(AutoGenObject), AutoGenObject.Arch)
+                for ModuleKey in WaitingUsers.pop(Key, []):
+                    if ModuleKey not in WaitingModules:
+                        continue
+                    WaitingModules[ModuleKey][2].discard(Key)
+                    if not WaitingModules[ModuleKey][2]:
+                        Ma, Pa, Dummy = WaitingModules.pop(ModuleKey)
+                        self._AddBuildTask(Ma, Pa, ExitFlag)
+        except:
+            Pool.terminate()
+            Pool.join()
+            raise
+        Pool.close()
+        Pool.join()
+        self.Progress.Stop("done!")
+        gAutoGenObjectList = []
+        return PipelineBuild
+
     ## Generate GuidedSectionTools.txt in the FV directories.
     #
     def CreateGuidedSectionToolsFile(self):
@@ -1809,24 +2113,18 @@ class Build():
             BuildTask.Abort()
         EdkLogger.SetLevel(OldLogLevel)
 
+    ## Save build data which can be reused by next build into build cache directory
     def DumpBuildData(self):
         CacheDirectory = os.path.dirname(GlobalData.gDatabasePath)
         Utils.CreateDirectory(CacheDirectory)
-        Utils.DataDump(Utils.gFileTimeStampCache, os.path.join(CacheDirectory, "gFileTimeStampCache"))
-        Utils.DataDump(Utils.gDependencyDatabase, os.path.join(CacheDirectory, "gDependencyDatabase"))
+        Utils.gIncludeCache.Save(os.path.join(CacheDirectory, "gIncludeCache"))
 
+    ## Restore build data saved by previous build from build cache directory
     def RestoreBuildData(self):
-        FilePath = os.path.join(os.path.dirname(GlobalData.gDatabasePath), "gFileTimeStampCache")
-        if Utils.gFileTimeStampCache == {} and os.path.isfile(FilePath):
-            Utils.gFileTimeStampCache = Utils.DataRestore(FilePath)
-            if Utils.gFileTimeStampCache == None:
-                Utils.gFileTimeStampCache = {}
-
-        FilePath = os.path.join(os.path.dirname(GlobalData.gDatabasePath), "gDependencyDatabase")
-        if Utils.gDependencyDatabase == {} and os.path.isfile(FilePath):
-            Utils.gDependencyDatabase = Utils.DataRestore(FilePath)
-            if Utils.gDependencyDatabase == None:
-                Utils.gDependencyDatabase = {}
+        # the include cache validates each entry against file system by itself
+        FilePath = os.path.join(os.path.dirname(GlobalData.gDatabasePath), "gIncludeCache")
+        if os.path.isfile(FilePath):
+            Utils.gIncludeCache.Restore(FilePath)
 
 def ParseDefines(DefineList=[]):
     DefineDict = {}
@@ -1877,6 +2175,12 @@ def MyOptionParser():
     Parser.add_option("-n", action="callback", type="int", dest="ThreadNumber", callback=SingleCheckCallback,
         help="Build the platform using multi-threaded compiler. The value overrides target.txt's MAX_CONCURRENT_THREAD_NUMBER. Less than 2 will disable multi-thread builds.")
 
+    Parser.add_option("--pipeline-build", action="store_true", dest="PipelineBuild", default=False,
+        help="Hand each module to the build scheduler as soon as its AutoGen code and makefile are created, "\
+             "instead of after all modules of an arch are created. Only used in multi-thread build mode.")
+    Parser.add_option("--autogen-jobs", action="store", type="int", dest="AutoGenJobs", default=0,
+        help="Create AutoGen code and makefiles of modules in the given number of processes in multi-thread build mode. Less than 2 disables it. Not supported on Windows.")
+
     Parser.add_option("-f", "--fdf", action="callback", type="string", dest="FdfFile", callback=SingleCheckCallback,
         help="The name of the FDF file to use, which overrides the setting in the DSC file.")
     Parser.add_option("-r", "--rom-image", action="append", type="string", dest="RomImage", default=[],
@@ -1903,14 +2207,17 @@ def MyOptionParser():
     Parser.add_option("-D", "--define", action="append", type="string", dest="Macros", help="Macro: \"Name [= Value]\".")
 
     Parser.add_option("-y", "--report-file", action="store", dest="ReportFile", help="Create/overwrite the report to the specified filename.")
-    Parser.add_option("-Y", "--report-type", action="append", type="choice", choices=['PCD','LIBRARY','FLASH','DEPEX','BUILD_FLAGS','FIXED_ADDRESS', 'EXECUTION_ORDER'], dest="ReportType", default=[],
-        help="Flags that control the type of build report to generate.  Must be one of: [PCD, LIBRARY, FLASH, DEPEX, BUILD_FLAGS, FIXED_ADDRESS, EXECUTION_ORDER].  "\
+    Parser.add_option("-Y", "--report-type", action="append", type="choice", choices=['PCD','LIBRARY','FLASH','DEPEX','BUILD_FLAGS','FIXED_ADDRESS', 'EXECUTION_ORDER', 'BUILD_TIME'], dest="ReportType", default=[],
+        help="Flags that control the type of build report to generate.  Must be one of: [PCD, LIBRARY, FLASH, DEPEX, BUILD_FLAGS, FIXED_ADDRESS, EXECUTION_ORDER, BUILD_TIME].  "\
              "To specify more than one flag, repeat this option on the command line and the default flag set is [PCD, LIBRARY, FLASH, DEPEX, BUILD_FLAGS, FIXED_ADDRESS]")
     Parser.add_option("-F", "--flag", action="store", type="string", dest="Flag",
         help="Specify the specific option to parse EDK UNI file. Must be one of: [-c, -s]. -c is for EDK framework UNI file, and -s is for EDK UEFI UNI file. "\
              "This option can also be specified by setting *_*_*_BUILD_FLAGS in [BuildOptions] section of platform DSC. If they are both specified, this value "\
              "will override the setting in [BuildOptions] section of platform DSC.")
     Parser.add_option("-N", "--no-cache", action="store_true", dest="DisableCache", default=False, help="Disable build cache mechanism")
+    Parser.add_option("--metadata-storage", action="store", type="choice", choices=['sqlite', 'memory'], dest="MetaDataStorage", default="sqlite",
+        help="Where to keep the parsed data of meta files. 'sqlite' keeps them in the database in build cache, which is reused by later builds. "\
+             "'memory' keeps them in memory indexed for faster lookup, but all meta files are parsed again in every build.")
     Parser.add_option("--conf", action="store", type="string", dest="ConfDirectory", help="Specify the customized Conf directory.")
     Parser.add_option("--check-usage", action="store_true", dest="CheckUsage", default=False, help="Check usage content of entries listed in INF file.")
     Parser.add_option("--ignore-sources", action="store_true", dest="IgnoreSources", default=False, help="Focus to a binary build and ignore all source files")
@@ -2034,7 +2341,8 @@ def Main():
         for TmpTableName in TmpTableDict:
             SqlCommand = """drop table IF EXISTS %s""" % TmpTableName
             TmpTableDict[TmpTableName].execute(SqlCommand)
-        #MyBuild.DumpBuildData()
+        if not MyBuild.DisableCache:
+            MyBuild.DumpBuildData()
     except FatalError, X:
         if MyBuild != None:
             # for multi-thread build exits safely
@@ -2095,6 +2403,7 @@ def Main():
     else:
         BuildDurationStr = time.strftime("%H:%M:%S", BuildDuration)
     if MyBuild != None:
+        MyBuild.BuildHistory.Save()
         MyBuild.BuildReport.GenerateReport(BuildDurationStr)
         MyBuild.Db.Close()
     EdkLogger.SetLevel(EdkLogger.QUIET)
@@ -20,8 +20,10 @@ import sys
 import unittest
 
 import TianoCompress
+import GenFdsSectionPacker
 modules = (
     TianoCompress,
+    GenFdsSectionPacker,
     )
 
 
@@ -0,0 +1,190 @@
+## @file
+# Unit tests for the sections and FFS files generated in GenFds
+#
+# The output of GenFds/SectionPacker.py must be byte-for-byte the same as the
+# output of GenSec and GenFfs for the same inputs and options.
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import os
+import random
+import struct
+import sys
+import unittest
+
+import TestTools
+
+sys.path.append(TestTools.PythonSourceDir)
+sys.path.append(os.path.join(TestTools.PythonSourceDir, 'GenFds'))
+
+import SectionPacker
+
+SectionAligns = ['1', '4', '8', '16', '32', '64', '128', '512', '1K', '4K', '64K']
+FfsAligns = [None, '8', '16', '128', '1K', '4K', '64K']
+
+class Tests(TestTools.BaseToolsTest):
+
+    def setUp(self):
+        TestTools.BaseToolsTest.setUp(self)
+        random.seed(0x5EC)
+        self.Index = 0
+
+    def WriteInput(self, data):
+        self.Index += 1
+        path = self.GetTmpFilePath('input%d' % self.Index)
+        f = open(path, 'wb')
+        f.write(data)
+        f.close()
+        return path
+
+    def MakeSection(self, type, data):
+        size = len(data) + 4
+        return self.WriteInput(struct.pack('<HBB', size & 0xFFFF, size >> 16, type) + data)
+
+    def RunAndRead(self, toolName, *args):
+        output = self.GetTmpFilePath('output')
+        if os.path.exists(output):
+            os.remove(output)
+        result = self.RunTool(toolName=toolName, *(list(args) + ['-o', output]))
+        self.assertTrue(result == 0)
+        f = open(output, 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def GenSec(self, *args):
+        return self.RunAndRead('GenSec', *args)
+
+    def GenFfs(self, *args):
+        return self.RunAndRead('GenFfs', *args)
+
+    def assertSameOutput(self, native, tool):
+        self.assertTrue(native is not None)
+        if native != tool:
+            self.DisplayBinaryData('native', native)
+            self.DisplayBinaryData('tool', tool)
+        self.assertTrue(native == tool)
+
+    ## Sections of different kinds, used as the inputs of dummy sections and FFS files
+    def MakeSections(self):
+        teHeader = struct.pack('<HHBBHII', SectionPacker.EFI_TE_IMAGE_HEADER_SIGNATURE,
+                               0x8664, 3, 11, 0x1F8, 0, 0) + '\0' * 24
+        return [
+            self.MakeSection(SectionPacker.EFI_SECTION_TE, teHeader + self.GetRandomString(201)),
+            self.MakeSection(SectionPacker.EFI_SECTION_PE32, self.GetRandomString(333)),
+            # GUIDed sections with and without the processing required attribute
+            self.MakeSection(SectionPacker.EFI_SECTION_GUID_DEFINED,
+                             self.GetRandomString(16) + struct.pack('<HH', 0x20, 2) +
+                             self.GetRandomString(8) + self.GetRandomString(77)),
+            self.MakeSection(SectionPacker.EFI_SECTION_GUID_DEFINED,
+                             self.GetRandomString(16) + struct.pack('<HH', 0x18, 1) +
+                             self.GetRandomString(50)),
+            self.MakeSection(SectionPacker.EFI_SECTION_RAW, self.GetRandomString(13)),
+            self.WriteInput(self.GetRandomString(0, 300)),
+            ]
+
+    def testLeafSection(self):
+        for count in range(3):
+            input = self.WriteInput(self.GetRandomString(0, 300))
+            for type in SectionPacker.LeafSectionType:
+                self.assertSameOutput(
+                    SectionPacker.GenerateSection([input], type),
+                    self.GenSec('-s', type, input)
+                    )
+
+    def testVersionSection(self):
+        # the quotes of version string in the command of GenFds are removed by shell
+        for ver, build in (('"1.0"', None), ('abc', '12'), ('x', '65535')):
+            args = ['-s', 'EFI_SECTION_VERSION', '-n', ver.strip('"')]
+            if build:
+                args += ['-j', build]
+            self.assertSameOutput(
+                SectionPacker.GenerateSection([], 'EFI_SECTION_VERSION', Ver=ver, BuildNumber=build),
+                self.GenSec(*args)
+                )
+
+    def testCompressionSection(self):
+        inputs = self.MakeSections()
+        self.assertSameOutput(
+            SectionPacker.GenerateSection(inputs, 'EFI_SECTION_COMPRESSION', 'PI_NONE'),
+            self.GenSec('-s', 'EFI_SECTION_COMPRESSION', '-c', 'PI_NONE', *inputs)
+            )
+
+    def testDummySectionPadding(self):
+        sections = self.MakeSections()
+        for count in range(50):
+            inputs = [random.choice(sections) for x in range(random.randint(1, 5))]
+            aligns = [random.choice(SectionAligns) for x in inputs]
+            args = []
+            for align in aligns:
+                args += ['--sectionalign', align]
+            self.assertSameOutput(
+                SectionPacker.GenerateSection(inputs, None, InputAlign=aligns),
+                self.GenSec(*(args + inputs))
+                )
+
+    def testFfsAlignment(self):
+        sections = self.MakeSections()
+        for count in range(50):
+            inputs = [random.choice(sections) for x in range(random.randint(1, 5))]
+            aligns = [random.choice([None] + SectionAligns) for x in inputs]
+            type = random.choice(SectionPacker.FfsFileType.keys())
+            guid = '%08X-1234-5678-9ABC-DEF012345678' % random.randint(1, 0xFFFFFFFF)
+            fixed = random.random() < 0.5
+            checksum = random.random() < 0.5
+            align = random.choice(FfsAligns)
+            args = ['-t', type, '-g', guid]
+            if fixed:
+                args.append('-x')
+            if checksum:
+                args.append('-s')
+            if align:
+                args += ['-a', align]
+            for input, inputAlign in zip(inputs, aligns):
+                args += ['-i', input]
+                if inputAlign:
+                    args += ['-n', inputAlign]
+            native = SectionPacker.GenerateFfs(inputs, type, guid, fixed, checksum, align, aligns)
+            # the file types requiring PE or TE sections are left to GenFfs
+            # when the inputs don't have them
+            if native is None and SectionPacker.FfsFileType[type] in \
+                SectionPacker.SinglePeFileTypes + SectionPacker.PeFileTypes:
+                continue
+            self.assertSameOutput(native, self.GenFfs(*args))
+
+    def testLargeHeader(self):
+        data = self.GetRandomString(1000) * ((SectionPacker.MAX_SECTION_SIZE / 1000) + 1)
+        input = self.WriteInput(data)
+        self.assertSameOutput(
+            SectionPacker.GenerateSection([input], 'EFI_SECTION_RAW'),
+            self.GenSec('-s', 'EFI_SECTION_RAW', input)
+            )
+        section = self.WriteInput(SectionPacker.GenerateSection([input], 'EFI_SECTION_RAW'))
+        self.assertSameOutput(
+            SectionPacker.GenerateSection([section], 'EFI_SECTION_COMPRESSION', 'PI_NONE'),
+            self.GenSec('-s', 'EFI_SECTION_COMPRESSION', '-c', 'PI_NONE', section)
+            )
+        raw = self.MakeSection(SectionPacker.EFI_SECTION_RAW, self.GetRandomString(13))
+        guid = '11111111-2222-3333-4444-555555555555'
+        self.assertSameOutput(
+            SectionPacker.GenerateFfs([section, raw], 'EFI_FV_FILETYPE_FREEFORM', guid, False, True, None, ['16', '4K']),
+            self.GenFfs('-t', 'EFI_FV_FILETYPE_FREEFORM', '-g', guid, '-s',
+                        '-i', section, '-n', '16', '-i', raw, '-n', '4K')
+            )
+
+TheTestSuite = TestTools.MakeTheTestSuite(locals())
+
+if __name__ == '__main__':
+    allTests = TheTestSuite()
+    unittest.TextTestRunner().run(allTests)
+
@@ -0,0 +1,180 @@
+## @file
+# Micro-benchmark of the storage of meta file records
+#
+# It fills the same module, package and platform tables in the sqlite and the
+# in-memory storage of meta file, then runs the queries of the parsers against
+# them, and prints the time spent by each storage. Each query is different from
+# the others on the same table, like the ones of the build, so that they are
+# not answered by the query cache of in-memory storage.
+#
+# Usage: MetaFileStorageBenchmark.py [file count] [record count per file]
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import os
+import sys
+import time
+import shutil
+import sqlite3
+
+import TestTools
+
+sys.path.append(TestTools.PythonSourceDir)
+
+import Common.EdkLogger as EdkLogger
+from Common.Misc import PathClass
+from CommonDataClass.DataClass import *
+from Workspace.MetaFileTable import MetaFileStorage
+from Workspace.MetaFileTable import MetaFileMemoryStore
+
+ArchList = ['COMMON', 'IA32', 'X64', 'IPF', 'ARM', 'EBC']
+ModuleTypeList = ['COMMON', 'BASE', 'PEIM', 'DXE_DRIVER']
+ModuleModelList = [MODEL_EFI_SOURCE_FILE, MODEL_EFI_LIBRARY_CLASS, MODEL_EFI_GUID, MODEL_EFI_PROTOCOL,
+                   MODEL_EFI_PPI, MODEL_PCD_FIXED_AT_BUILD, MODEL_PCD_PATCHABLE_IN_MODULE]
+PackageModelList = [MODEL_PCD_FIXED_AT_BUILD, MODEL_PCD_PATCHABLE_IN_MODULE, MODEL_PCD_FEATURE_FLAG,
+                    MODEL_EFI_GUID, MODEL_EFI_PROTOCOL, MODEL_EFI_PPI, MODEL_EFI_LIBRARY_CLASS]
+PlatformModelList = [MODEL_EFI_LIBRARY_CLASS, MODEL_PCD_FIXED_AT_BUILD, MODEL_PCD_FEATURE_FLAG,
+                     MODEL_PCD_DYNAMIC_DEFAULT, MODEL_META_DATA_BUILD_OPTION]
+# the records in the scope of each component in platform
+ComponentModelList = [MODEL_EFI_LIBRARY_CLASS, MODEL_PCD_FIXED_AT_BUILD, MODEL_META_DATA_BUILD_OPTION]
+# the number of files included by platform
+IncludeCount = 3
+
+## Fill a module table, and return the queries of its parser
+def FillModule(Table, Count):
+    for Index in range(Count):
+        Table.Insert(ModuleModelList[Index % len(ModuleModelList)], "Value%d" % Index, "gTokenSpaceGuid", "",
+                     ArchList[Index % len(ArchList)], ModuleTypeList[Index % len(ModuleTypeList)],
+                     -1, Index, -1, Index, -1, 0)
+    Table.SetEndFlag()
+    QueryList = []
+    for Model in ModuleModelList:
+        for Arch in ArchList:
+            for ModuleType in ModuleTypeList:
+                QueryList.append((Table.Query, (Model, Arch, ModuleType)))
+    return QueryList
+
+## Fill a package table, and return the queries of its parser
+def FillPackage(Table, Count):
+    for Index in range(Count):
+        Table.Insert(PackageModelList[Index % len(PackageModelList)], "gTokenSpaceGuid", "Name%d" % Index,
+                     "0x1|UINT32|0x%x" % Index, ArchList[Index % len(ArchList)], 'COMMON',
+                     -1, Index, -1, Index, -1, 0)
+    Table.SetEndFlag()
+    QueryList = []
+    for Model in PackageModelList:
+        for Arch in ArchList:
+            QueryList.append((Table.Query, (Model, Arch)))
+    # the comments of PCDs are looked up one by one
+    for Index in range(0, Count, 10):
+        QueryList.append((Table.GetValidExpression, ("gTokenSpaceGuid", "Name%d" % Index)))
+    return QueryList
+
+## Fill a platform table with components and the records in their scope, and return the queries of its parser
+def FillPlatform(Table, Count):
+    ComponentList = []
+    Index = 0
+    while Index < Count:
+        Arch = ArchList[Index % len(ArchList)]
+        FromItem = (Index % (IncludeCount + 1)) - 1
+        if Index % 10 == 0:
+            ComponentList.append(Table.Insert(MODEL_META_DATA_COMPONENT, "Module%d.inf" % Index, "", "",
+                                              Arch, 'COMMON', -1, FromItem, Index, -1, Index, -1, 1))
+        elif ComponentList and Index % 10 > 6:
+            Table.Insert(ComponentModelList[Index % len(ComponentModelList)], "Value%d" % Index, "", "",
+                         Arch, 'COMMON', ComponentList[-1], FromItem, Index, -1, Index, -1, 1)
+        else:
+            Table.Insert(PlatformModelList[Index % len(PlatformModelList)], "Value%d" % Index, "", "",
+                         Arch, ModuleTypeList[Index % len(ModuleTypeList)], -1, FromItem, Index, -1, Index, -1, 1)
+        Index += 1
+    Table.SetEndFlag()
+    QueryList = []
+    for Model in PlatformModelList + [MODEL_META_DATA_COMPONENT]:
+        for Arch in ArchList:
+            for ModuleType in ModuleTypeList:
+                QueryList.append((Table.Query, (Model, Arch, ModuleType)))
+        for FromItem in range(-1, IncludeCount):
+            QueryList.append((Table.Query, (Model, None, None, None, FromItem)))
+    for Component in ComponentList:
+        for Model in ComponentModelList:
+            QueryList.append((Table.Query, (Model, None, None, Component)))
+    return QueryList
+
+## Fill tables of the given type, run their queries, and return the results and the time spent
+def RunTables(Storage, FileList, FileType, Fill, RecordCount):
+    ResultList = []
+    QueryCount = 0
+    Start = time.time()
+    TableList = []
+    QueryList = []
+    for MetaFile in FileList:
+        Table = MetaFileStorage(Storage, MetaFile, FileType, True)
+        TableList.append(Table)
+        QueryList.extend(Fill(Table, RecordCount))
+    FillTime = time.time() - Start
+    Start = time.time()
+    for Query, Args in QueryList:
+        ResultList.append(Query(*Args))
+    QueryTime = time.time() - Start
+    for Table in TableList:
+        Table.Drop()
+    return ResultList, len(QueryList), FillTime, QueryTime
+
+def Main():
+    FileCount = 50
+    RecordCount = 500
+    if len(sys.argv) > 1:
+        FileCount = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        RecordCount = int(sys.argv[2])
+
+    EdkLogger.Initialize()
+    EdkLogger.SetLevel(EdkLogger.QUIET)
+
+    if not os.path.exists(TestTools.TestTempDir):
+        os.makedirs(TestTools.TestTempDir)
+    TypeList = [
+        ('module', '.inf', MODEL_FILE_INF, FillModule),
+        ('package', '.dec', MODEL_FILE_DEC, FillPackage),
+        ('platform', '.dsc', MODEL_FILE_DSC, FillPlatform),
+    ]
+    FileDict = {}
+    for Name, Ext, FileType, Fill in TypeList:
+        FileDict[Name] = []
+        for Index in range(FileCount):
+            FilePath = os.path.join(TestTools.TestTempDir, 'Benchmark%d%s' % (Index, Ext))
+            open(FilePath, 'w').write('## Meta file for storage benchmark\n')
+            FileDict[Name].append(PathClass(FilePath))
+
+    Connection = sqlite3.connect(':memory:')
+    Connection.text_factory = str
+    Cursor = Connection.cursor()
+
+    Status = 0
+    for Name, Ext, FileType, Fill in TypeList:
+        ResultList = []
+        for StorageName, Storage in [('sqlite', Cursor), ('memory', MetaFileMemoryStore(Cursor))]:
+            Result, QueryCount, FillTime, QueryTime = RunTables(Storage, FileDict[Name], FileType, Fill, RecordCount)
+            ResultList.append(Result)
+            print "%-8s %-8s fill %d x %d records: %8.3fs, %d queries: %8.3fs" % (Name, StorageName, FileCount, RecordCount,
+                                                                                 FillTime, QueryCount, QueryTime)
+        if ResultList[0] != ResultList[1]:
+            print "The %s query results of storage are different!" % Name
+            Status = 1
+
+    Connection.close()
+    shutil.rmtree(TestTools.TestTempDir, True)
+    return Status
+
+if __name__ == '__main__':
+    sys.exit(Main())
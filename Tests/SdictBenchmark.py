@@ -0,0 +1,229 @@
+## @file
+# Micro-benchmark of the ordered dict sdict
+#
+# It runs the typical uses of sdict in the build against sdict and against
+# the list based ordered dict it replaced, and prints the time spent by each
+# of them. The default sizes are close to the number of modules and PCDs of
+# a large platform.
+#
+# Usage: SdictBenchmark.py [module count] [pcd count] [iteration count]
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import sys
+import time
+from UserDict import IterableUserDict
+
+import TestTools
+
+sys.path.append(TestTools.PythonSourceDir)
+
+from Common.Misc import sdict
+
+## The ordered dict keeping a list of keys, which sdict was before, copied as it was
+class ListSdict(IterableUserDict):
+    ## Constructor
+    def __init__(self):
+        IterableUserDict.__init__(self)
+        self._key_list = []
+
+    ## [] operator
+    def __setitem__(self, key, value):
+        if key not in self._key_list:
+            self._key_list.append(key)
+        IterableUserDict.__setitem__(self, key, value)
+
+    ## del operator
+    def __delitem__(self, key):
+        self._key_list.remove(key)
+        IterableUserDict.__delitem__(self, key)
+
+    ## used in "for k in dict" loop to ensure the correct order
+    def __iter__(self):
+        return self.iterkeys()
+
+    ## len() support
+    def __len__(self):
+        return len(self._key_list)
+
+    ## "in" test support
+    def __contains__(self, key):
+        return key in self._key_list
+
+    ## indexof support
+    def index(self, key):
+        return self._key_list.index(key)
+
+    ## insert support
+    def insert(self, key, newkey, newvalue, order):
+        index = self._key_list.index(key)
+        if order == 'BEFORE':
+            self._key_list.insert(index, newkey)
+            IterableUserDict.__setitem__(self, newkey, newvalue)
+        elif order == 'AFTER':
+            self._key_list.insert(index + 1, newkey)
+            IterableUserDict.__setitem__(self, newkey, newvalue)
+
+    ## append support
+    def append(self, sdict):
+        for key in sdict:
+            if key not in self._key_list:
+                self._key_list.append(key)
+            IterableUserDict.__setitem__(self, key, sdict[key])
+
+    def has_key(self, key):
+        return key in self._key_list
+
+    ## Empty the dict
+    def clear(self):
+        self._key_list = []
+        IterableUserDict.clear(self)
+
+    ## Return a copy of keys
+    def keys(self):
+        keys = []
+        for key in self._key_list:
+            keys.append(key)
+        return keys
+
+    ## Return a copy of values
+    def values(self):
+        values = []
+        for key in self._key_list:
+            values.append(self[key])
+        return values
+
+    ## Return a copy of (key, value) list
+    def items(self):
+        items = []
+        for key in self._key_list:
+            items.append((key, self[key]))
+        return items
+
+    ## Iteration support
+    def iteritems(self):
+        return iter(self.items())
+
+    ## Keys interation support
+    def iterkeys(self):
+        return iter(self.keys())
+
+    ## Values interation support
+    def itervalues(self):
+        return iter(self.values())
+
+    ## Return value related to a key, and remove the (key, value) from the dict
+    def pop(self, key, *dv):
+        value = None
+        if key in self._key_list:
+            value = self[key]
+            self.__delitem__(key)
+        elif len(dv) != 0 :
+            value = kv[0]
+        return value
+
+    ## Return (key, value) pair, and remove the (key, value) from the dict
+    def popitem(self):
+        key = self._key_list[-1]
+        value = self[key]
+        self.__delitem__(key)
+        return key, value
+
+    def update(self, dict=None, **kwargs):
+        if dict != None:
+            for k, v in dict.items():
+                self[k] = v
+        if len(kwargs):
+            for k, v in kwargs.items():
+                self[k] = v
+
+## Move modules through the pending, ready and running queues, like BuildTask does
+def RunQueues(Class, Count):
+    Pending = Class()
+    Ready = Class()
+    Running = Class()
+    for Index in range(Count):
+        Pending["Module%d.inf" % Index] = Index
+    for Index in range(Count):
+        Name = "Module%d.inf" % Index
+        if Name in Pending and Name not in Ready:
+            Ready[Name] = Pending[Name]
+            del Pending[Name]
+    for Index in range(Count):
+        Name = "Module%d.inf" % Index
+        Running[Name] = Ready[Name]
+        del Ready[Name]
+    for Index in range(Count):
+        del Running["Module%d.inf" % Index]
+    return len(Pending) + len(Ready) + len(Running)
+
+## Collect PCDs of modules into a platform map, like AutoGen does
+def CollectPcds(Class, Count):
+    Pcds = Class()
+    for Index in range(Count * 2):
+        Key = ("PcdName%d" % (Index % Count), "gTokenSpaceGuid")
+        if Key not in Pcds:
+            Pcds[Key] = Index
+    # insert a PCD before every 10th PCD, like the UPT object model does
+    for Index in range(0, Count, 10):
+        Pcds.insert(("PcdName%d" % Index, "gTokenSpaceGuid"), ("PcdNew%d" % Index, "gTokenSpaceGuid"), Index, 'BEFORE')
+    return Pcds.keys()
+
+## Walk the keys, values and items of a map many times, like the reports and makefile generation do
+def IterateMap(Class, Count, PassCount):
+    Map = Class()
+    for Index in range(Count):
+        Map["Module%d.inf" % Index] = Index
+    Total = 0
+    for Pass in range(PassCount):
+        for Key in Map:
+            Total += 1
+        for Key, Value in Map.items():
+            Total += Value
+        Total += len(Map.keys())
+    return Total
+
+def Main():
+    ModuleCount = 3000
+    PcdCount = 5000
+    PassCount = 500
+    if len(sys.argv) > 1:
+        ModuleCount = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        PcdCount = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        PassCount = int(sys.argv[3])
+
+    ResultList = []
+    for Name, Class in [('list', ListSdict), ('sdict', sdict)]:
+        Start = time.time()
+        QueueResult = RunQueues(Class, ModuleCount)
+        QueueTime = time.time() - Start
+        Start = time.time()
+        PcdResult = CollectPcds(Class, PcdCount)
+        PcdTime = time.time() - Start
+        Start = time.time()
+        IterateResult = IterateMap(Class, ModuleCount, PassCount)
+        IterateTime = time.time() - Start
+        ResultList.append((QueueResult, PcdResult, IterateResult))
+        print "%-8s queue %d modules: %8.3fs, collect %d PCDs: %8.3fs, iterate %d times: %8.3fs" % \
+              (Name, ModuleCount, QueueTime, PcdCount, PcdTime, PassCount, IterateTime)
+
+    if ResultList[0] != ResultList[1]:
+        print "The results of ordered dict are different!"
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
+